@@ -1,43 +1,137 @@
-import os 
-import pandas as pd 
-import streamlit as st 
-import plotly.express as px 
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import pandas as pd
+import streamlit as st
+import plotly.express as px
 
+# --- SCANNER ---
+# Directories are listed with os.scandir (the DirEntry stat results are used
+# as is) and subtrees fan out over a thread pool. Each directory's own file
+# count and size are cached keyed by its mtime, so a rescan only lists the
+# directories whose entries changed. Recursive totals are rolled up bottom-up.
+# Note: editing a file in place does not change its directory's mtime; use a
+# full rescan to pick up size changes of existing files.
+
+SCAN_WORKERS = 16   # I/O bound: threads mostly wait on the filesystem
+
+class FolderScanner:
+    def __init__(self, workers=SCAN_WORKERS):
+        self.workers = workers
+        self.cache = {}   # dir -> (mtime_ns, num_files, size, [subdirs])
+        self.lock = threading.Lock()
+
+    def _list(self, path):
+        """(num_files, size, subdirs, reused) for one directory, from the cache if its mtime is unchanged."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return 0, 0, [], False
+        with self.lock:
+            hit = self.cache.get(path)
+        if hit and hit[0] == mtime:
+            return hit[1], hit[2], hit[3], True
+        num, size, subdirs = 0, 0, []
+        try:
+            with os.scandir(path) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            subdirs.append(e.path)
+                        elif e.is_file(follow_symlinks=False):
+                            num += 1
+                            size += e.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass  # skip unreadable files
+        except OSError:
+            pass
+        with self.lock:
+            self.cache[path] = (mtime, num, size, subdirs)
+        return num, size, subdirs, False
+
+    def scan(self, root):
+        """One row per folder with its own and recursive file counts/sizes, plus scan stats."""
+        root = os.path.abspath(root)
+        t0 = time.perf_counter()
+        own, children = {}, {}
+        reused = 0
+        with ThreadPoolExecutor(self.workers) as ex:
+            pending = {ex.submit(self._list, root): root}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    path = pending.pop(f)
+                    num, size, subdirs, hit = f.result()
+                    own[path] = (num, size)
+                    children[path] = subdirs
+                    reused += hit
+                    for d in subdirs:
+                        pending[ex.submit(self._list, d)] = d
+        # bottom-up rollup: deepest folders first
+        total = {}
+        for path in sorted(own, key=lambda p: p.count(os.sep), reverse=True):
+            num, size = own[path]
+            for c in children[path]:
+                cn, cs = total.get(c, (0, 0))
+                num, size = num + cn, size + cs
+            total[path] = (num, size)
+        # forget folders under root that are gone
+        prefix = root.rstrip(os.sep) + os.sep
+        with self.lock:
+            for k in [k for k in self.cache if (k == root or k.startswith(prefix)) and k not in own]:
+                del self.cache[k]
+        rows = [{"Folder": p, "Num_Files": own[p][0], "Size_MB": round(own[p][1] / (1024 * 1024), 2),
+                 "Total_Files": total[p][0], "Total_Size_MB": round(total[p][1] / (1024 * 1024), 2)}
+                for p in own]
+        stats = {"folders": len(own), "rescanned": len(own) - reused, "reused": reused,
+                 "seconds": round(time.perf_counter() - t0, 3)}
+        return pd.DataFrame(rows), stats
+
+@st.cache_resource
+def get_scanner():
+    return FolderScanner()
+
+def top_n(df, col, n):
+    """The n largest rows by `col`, the rest summed into one "(other)" row."""
+    df = df.sort_values(col, ascending=False)
+    top, rest = df.head(n), df.iloc[n:]
+    if len(rest) and rest[col].sum() > 0:
+        top = pd.concat([top, pd.DataFrame([{"Folder": f"(other {len(rest)} folders)", col: rest[col].sum()}])])
+    return top
+
+# --- UI ---
 st.title("📂 Folder Analyzer")
 st.write("Analyze all folders and visualize file counts and sizes")
 
 
 
 root_dir=st.text_input("enter root directory path :" ,".")
+N = st.slider("Folders to chart", 5, 50, 15)
+full = st.checkbox("Full rescan (ignore cache)", value=False)
 
 if st.button("Scan Folder"):
-    data = []
-
-    for foldername, subfolders, filenames in os.walk(root_dir):
-        total_size = 0
-        for file in filenames:
-            try:
-                filepath = os.path.join(foldername, file)
-                total_size += os.path.getsize(filepath)
-            except Exception:
-                pass  # skip unreadable files
-
-        data.append({
-            "Folder": foldername,
-            "Num_Files": len(filenames),
-            "Total_Size_MB": round(total_size / (1024 * 1024), 2)
-        })
-
-    df = pd.DataFrame(data)
+    scanner = get_scanner()
+    if full:
+        scanner.cache.clear()
+    st.session_state.scan = scanner.scan(root_dir)
+
+if "scan" in st.session_state:
+    df, stats = st.session_state.scan
+    root = df.iloc[0]
+    st.write(f"{int(root['Total_Files'])} files, {root['Total_Size_MB']} MB in {stats['folders']} folders — "
+             f"scanned in {stats['seconds']}s ({stats['rescanned']} listed, {stats['reused']} from cache)")
     st.write("### Folder Data")
-    st.dataframe(df)
+    st.dataframe(df.sort_values("Total_Size_MB", ascending=False), use_container_width=True)
 
     # --- Bar Chart ---
     st.write("### 📊 Number of Files per Folder")
-    fig1 = px.bar(df, x="Folder", y="Num_Files", title="Files in Each Folder")
+    fig1 = px.bar(df.sort_values("Total_Files", ascending=False).head(N), x="Folder", y="Total_Files",
+                  hover_data=["Num_Files"], title=f"Files in the {N} largest folders (including subfolders)")
     st.plotly_chart(fig1, use_container_width=True)
 
     # --- Pie Chart ---
+    # folders' own sizes: they don't overlap, so the slices add up to the whole tree
     st.write("### 🥧 Folder Size Distribution (MB)")
-    fig2 = px.pie(df, values="Total_Size_MB", names="Folder", title="Folder Size Distribution")
+    fig2 = px.pie(top_n(df, "Size_MB", N), values="Size_MB", names="Folder", title="Folder Size Distribution")
     st.plotly_chart(fig2, use_container_width=True)
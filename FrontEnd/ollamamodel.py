@@ -1,34 +1,30 @@
+import sys
+from pathlib import Path
 import streamlit as st
-import requests
-import json
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from RAG.llmclient import get_client, throttle, DEFAULT_LLM
 
 st.title("💬 Ollama Web Interface")
 st.write("Talk to your local Ollama model!")
 
+client = get_client()  # shared keep-alive pool; identical concurrent prompts share one generation
+models = client.models()
+
 prompt = st.text_area("Enter your prompt:", "Explain quantum computing in simple terms")
-model_name = st.text_input("Model name:", "llama3")
+if models:
+    model_name = st.selectbox("Model name:", models, index=models.index(DEFAULT_LLM) if DEFAULT_LLM in models else 0)
+else:
+    model_name = st.text_input("Model name:", DEFAULT_LLM)
 
 if st.button("Run Model"):
     st.write("### Response:")
-    with st.spinner("Generating..."):
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={"model": model_name, "prompt": prompt},
-            stream=True,
-        )
-
-        placeholder = st.empty()
-        full_reply = ""
-
-        for line in response.iter_lines():
-            if line:
-                data = json.loads(line.decode("utf-8"))
-                if "response" in data:
-                    text = data["response"]
-                    # Clean up escaped characters
-                    text = text.replace("\\n", "\n").replace("\\t", "    ")
-                    full_reply += text
-                    placeholder.markdown(full_reply)
-
-        st.success("Done!")
+    stats = {}
+    try:
+        with st.spinner("Generating..."):
+            # the text arrives JSON-decoded (real newlines/tabs); redraw in batches, not per token
+            full_reply = st.write_stream(throttle(client.generate(prompt, model_name, stats)))
+        st.success(f"Done! First token after {stats.get('ttft')}s, {stats.get('seconds')}s in total.")
         st.text_area("Full Response:", full_reply, height=200)
+    except Exception as e:
+        st.error(f"Ollama not available at {client.url} ({e}).")
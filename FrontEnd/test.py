@@ -1,5 +1,12 @@
+import sys
+from pathlib import Path
 import streamlit as st
-import ollama
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from RAG.answer import answer, read_span
+from RAG.llmclient import get_client, throttle
+from RAG.service import INDEX_DIR, REPOS_DIR, EXTRACT_DIR, query_repo
+from RAG.store import index_paths
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -10,12 +17,14 @@ st.set_page_config(
 
 # --- HELPER FUNCTION ---
 def get_ollama_models():
-    """Fetches the list of available models from the Ollama server."""
-    try:
-        models = ollama.list().get("models", [])
-        return [model["name"] for model in models]
-    except Exception:
+    """Fetches the list of available models from the Ollama server (cached for a few seconds)."""
+    return get_client().models()
+
+def get_indexed_repos():
+    """Local repos that have a built index."""
+    if not REPOS_DIR.is_dir():
         return []
+    return sorted(p.name for p in REPOS_DIR.iterdir() if index_paths(INDEX_DIR, p.name)["status"].exists())
 
 # --- CUSTOM CSS ---
 st.markdown("""
@@ -118,6 +127,10 @@ with st.sidebar:
         st.warning("Ollama server not detected. Please start it with `ollama serve`.")
         st.session_state.selected_model = None
         
+    indexed = get_indexed_repos()
+    st.selectbox("Answer from repository", ["(none — general knowledge)"] + indexed, key="qa_repo",
+                 help="Build an index in the main RepoMind app (app.py) first.")
+
     theme = st.selectbox("Theme", ["Light", "Dark", "Auto"], index=0, key="theme_setting")
     st.markdown("<div style='margin-top: 2rem;'>Made with ❤️ by Team RepoMind</div>", unsafe_allow_html=True)
 
@@ -134,28 +147,35 @@ if st.session_state.page == "repo":
 # Page: AI Q&A
 elif st.session_state.page == "qna":
     st.subheader("🔍 AI Q&A")
-    st.info("Ask questions about your repository. The AI will respond based on its general knowledge for now.")
+    qa_repo = st.session_state.get("qa_repo", "")
+    if qa_repo in get_indexed_repos():
+        st.info(f"Answers are grounded in the indexed code of **{qa_repo}**.")
+    else:
+        qa_repo = None
+        st.info("Ask questions about your repository. Pick an indexed repository in the sidebar settings to ground the answers in its code.")
 
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
     if prompt := st.chat_input("Ask a question about the code..."):
-        st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
         with st.chat_message("assistant"):
             if st.session_state.selected_model:
                 try:
-                    with st.spinner("RepoMind is thinking..."):
-                        response = ollama.chat(
-                            model=st.session_state.selected_model,
-                            messages=st.session_state.messages
-                        )
-                        full_response = response['message']['content']
-                        st.markdown(full_response)
-                        st.session_state.messages.append({"role": "assistant", "content": full_response})
+                    # retrieved chunks packed into a token budget + trimmed history, streamed back
+                    results = query_repo(qa_repo, prompt, 8) if qa_repo else []
+                    read = lambda hit: read_span(REPOS_DIR / qa_repo, hit, EXTRACT_DIR)
+                    stats = {}
+                    pieces = answer(prompt, results, read, st.session_state.messages, st.session_state.selected_model,
+                                    stats=stats)
+                    full_response = st.write_stream(throttle(pieces))
+                    st.caption(f"First token after {stats.get('ttft')}s, {stats.get('seconds')}s in total.")
+                    # the turn goes into the history only once it has an answer
+                    st.session_state.messages += [{"role": "user", "content": prompt},
+                                                  {"role": "assistant", "content": full_response}]
                 except Exception as e:
                     st.error(f"An error occurred: {e}")
             else:
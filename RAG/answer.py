@@ -0,0 +1,165 @@
+import hashlib
+from itertools import islice
+from pathlib import Path
+
+from RAG.filereader import extract_many
+from RAG.optional import HAS_TIKTOKEN
+from RAG.llmclient import get_client, OLLAMA_URL, DEFAULT_LLM
+from RAG.tracing import span
+
+# Answer pipeline: retrieved chunks are de-duplicated (overlapping line ranges
+# of a file are merged), packed best-first into a token budget, the chat
+# history is trimmed to its own budget, and the reply is streamed from an
+# Ollama-compatible /api/chat endpoint (through the shared client in
+# RAG/llmclient.py), measuring time to first token.
+
+CONTEXT_TOKENS = 3000    # retrieved code/docs in the prompt
+HISTORY_TOKENS = 1000    # earlier turns of the conversation
+MIN_PIECE_TOKENS = 120   # don't bother packing a truncated chunk smaller than this
+
+SYSTEM_PROMPT = ("You are RepoMind, an assistant that answers questions about a code repository. "
+                 "Answer from the context excerpts below and cite files as `path:line`. "
+                 "If the context does not contain the answer, say so.")
+
+# ---------- Tokens ----------
+
+_encoder = None
+
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        _encoder = False
+        if HAS_TIKTOKEN:
+            try:
+                import tiktoken
+                _encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                pass  # no cached BPE file and no network: estimate instead
+    return _encoder
+
+def count_tokens(text):
+    enc = _get_encoder()
+    return len(enc.encode(text, disallowed_special=())) if enc else (len(text) + 3) // 4
+
+def truncate_tokens(text, n):
+    enc = _get_encoder()
+    if enc:
+        return enc.decode(enc.encode(text, disallowed_special=())[:n])
+    return text[:n * 4]
+
+# ---------- Context ----------
+
+def merge_hits(results):
+    """Merge hits on overlapping/adjacent line ranges of the same file (and page); best score first.
+
+    Hits without a line span (a row whose metadata is gone) are dropped.
+    """
+    spans = {}
+    for r in results:
+        m = r["meta"]
+        if "start_line" not in m or "end_line" not in m:
+            continue
+        spans.setdefault((m["file"], m.get("page")), []).append([m["start_line"], m["end_line"], r["score"]])
+    merged = []
+    for (file, page), rs in spans.items():
+        rs.sort()
+        cur = rs[0]
+        for s, e, score in rs[1:]:
+            if s <= cur[1] + 1:
+                cur[1], cur[2] = max(cur[1], e), max(cur[2], score)
+            else:
+                merged.append({"file": file, "page": page, "start_line": cur[0], "end_line": cur[1], "score": cur[2]})
+                cur = [s, e, score]
+        merged.append({"file": file, "page": page, "start_line": cur[0], "end_line": cur[1], "score": cur[2]})
+    merged.sort(key=lambda h: -h["score"])
+    return merged
+
+def read_span(repo_path: Path, hit, extract_cache=None):
+    """Text of a merged hit, read back from the checkout (documents: from their extracted page)."""
+    path = Path(repo_path) / hit["file"]
+    start, end = hit["start_line"] - 1, hit["end_line"]
+    try:
+        if hit["page"] is None:
+            with open(path, encoding="utf-8", errors="ignore", newline="") as fh:
+                return "".join(islice(fh, start, end))
+        for _, units in extract_many([str(path)], cache_dir=extract_cache):
+            for label, text in units:
+                if label == hit["page"]:
+                    return "\n".join(text.split("\n")[start:end])
+    except OSError:
+        pass
+    return ""
+
+def pack_context(hits, read, budget=CONTEXT_TOKENS):
+    """Pack hits best-first into `budget` tokens; returns (context, sources).
+
+    `read(hit)` returns the hit's text. Identical texts are packed once; a hit
+    that no longer fits is cut down if at least MIN_PIECE_TOKENS remain.
+    """
+    blocks, sources, seen = [], [], set()
+    used = 0
+    for h in hits:
+        text = read(h)
+        digest = hashlib.sha1(text.encode("utf-8", errors="ignore")).digest()
+        if not text.strip() or digest in seen:
+            continue
+        seen.add(digest)
+        where = f"{h['file']}:{h['start_line']}-{h['end_line']}" + (f" ({h['page']})" if h.get("page") else "")
+        head = f"### {where}\n```\n"
+        cost = count_tokens(head + text) + 2
+        if used + cost > budget:
+            room = budget - used - count_tokens(head) - 2
+            if room < MIN_PIECE_TOKENS:
+                continue
+            text = truncate_tokens(text, room)
+            cost = count_tokens(head + text) + 2
+        blocks.append(f"{head}{text}\n```")
+        sources.append({**h, "tokens": cost})
+        used += cost
+    return "\n\n".join(blocks), sources
+
+def trim_history(messages, budget=HISTORY_TOKENS):
+    """The most recent messages that fit in `budget` tokens, oldest dropped first."""
+    kept, used = [], 0
+    for m in reversed(messages):
+        cost = count_tokens(m["content"]) + 4
+        if used + cost > budget:
+            break
+        kept.append(m)
+        used += cost
+    kept.reverse()
+    # never start with a dangling assistant reply
+    while kept and kept[0]["role"] == "assistant":
+        kept.pop(0)
+    return kept
+
+def build_messages(question, context="", history=(), history_budget=HISTORY_TOKENS):
+    system = SYSTEM_PROMPT + (f"\n\nContext:\n{context}" if context else "")
+    return [{"role": "system", "content": system}, *trim_history(list(history), history_budget),
+            {"role": "user", "content": question}]
+
+# ---------- Streaming ----------
+
+def stream_chat(messages, model=DEFAULT_LLM, url=OLLAMA_URL, stats=None, options=None):
+    """Yield reply text as it streams from `url`/api/chat.
+
+    `stats` (a dict) gets ttft (seconds to the first token), seconds, pieces and,
+    when the server reports them, prompt/completion token counts. Identical
+    concurrent requests share one generation (stats["coalesced"]).
+    """
+    return get_client(url).chat(messages, model, stats, options)
+
+def answer(question, results, read, history=(), model=DEFAULT_LLM, url=OLLAMA_URL, stats=None,
+           context_budget=CONTEXT_TOKENS, history_budget=HISTORY_TOKENS):
+    """Stream an answer to `question` grounded in the search `results`.
+
+    `read(hit)` returns the text of a merged hit (see read_span). `stats` gets
+    the sources used and the token counts of the prompt, plus stream_chat's timings.
+    """
+    stats = {} if stats is None else stats
+    with span("pack_context"):
+        context, sources = pack_context(merge_hits(results), read, context_budget)
+    messages = build_messages(question, context, history, history_budget)
+    stats.update(sources=sources, context_tokens=sum(s["tokens"] for s in sources),
+                 history_messages=len(messages) - 2)
+    return stream_chat(messages, model, url, stats)
@@ -0,0 +1,101 @@
+import time, threading
+from collections import OrderedDict
+import numpy as np
+
+# Answers to earlier questions, per repo. A new question is served from the
+# cache when its embedding is within SIMILARITY (cosine) of a cached question
+# asked with the same parameters (k, retrieval mode, model). Everything cached
+# for a repo is dropped as soon as its index version (the mtime of the build
+# summary, see RAG/store.py) changes. Each repo keeps at most MAX_ENTRIES
+# answers, least recently used evicted first; entries expire after TTL seconds.
+
+SIMILARITY = 0.92
+MAX_ENTRIES = 256    # per repo
+TTL = 24 * 3600.0    # seconds
+
+class AnswerCache:
+    def __init__(self, similarity=SIMILARITY, max_entries=MAX_ENTRIES, ttl=TTL):
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.repos = {}   # repo -> {"version", "entries": OrderedDict(id -> entry), "matrix"}
+        self.next_id = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self.saved_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def _repo(self, repo, version):
+        r = self.repos.get(repo)
+        if r is not None and r["version"] != version:
+            self.invalidations += len(r["entries"])
+            r = None
+        if r is None:
+            r = self.repos[repo] = {"version": version, "entries": OrderedDict(), "matrix": None}
+        return r
+
+    def get(self, repo, version, qvec, params=()):
+        """The cached entry for the most similar earlier question, or None.
+
+        An entry is a dict: question, answer, results, stats, seconds (what
+        producing it took), similarity (to this question).
+        """
+        q = np.asarray(qvec, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        now = time.monotonic()
+        with self.lock:
+            r = self._repo(repo, version)
+            entries = r["entries"]
+            for eid in [eid for eid, e in entries.items() if now - e["time"] > self.ttl]:
+                del entries[eid]
+                r["matrix"] = None
+                self.evictions += 1
+            best, best_sim = None, self.similarity
+            if entries:
+                if r["matrix"] is None:
+                    r["matrix"] = (list(entries), np.stack([e["vec"] for e in entries.values()]))
+                ids, matrix = r["matrix"]
+                sims = matrix @ q
+                for i in np.argsort(-sims):
+                    if sims[i] < best_sim:
+                        break
+                    if entries[ids[i]]["params"] == tuple(params):
+                        best, best_sim = ids[i], float(sims[i])
+                        break
+            if best is None:
+                self.misses += 1
+                return None
+            entries.move_to_end(best)
+            e = entries[best]
+            self.hits += 1
+            self.saved_seconds += e["seconds"]
+            return {**{k: v for k, v in e.items() if k not in ("vec", "time", "params")}, "similarity": round(best_sim, 4)}
+
+    def put(self, repo, version, qvec, question, answer, params=(), results=(), stats=None, seconds=0.0):
+        q = np.asarray(qvec, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        with self.lock:
+            r = self._repo(repo, version)
+            entries = r["entries"]
+            entries[self.next_id] = {"vec": q, "params": tuple(params), "question": question, "answer": answer,
+                                     "results": list(results), "stats": dict(stats or {}),
+                                     "seconds": seconds, "time": time.monotonic()}
+            self.next_id += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self.evictions += 1
+            r["matrix"] = None
+
+    def forget(self, repo):
+        with self.lock:
+            r = self.repos.pop(repo, None)
+            if r:
+                self.invalidations += len(r["entries"])
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                    "saved_seconds": round(self.saved_seconds, 2),
+                    "entries": sum(len(r["entries"]) for r in self.repos.values()),
+                    "evictions": self.evictions, "invalidations": self.invalidations}
@@ -0,0 +1,156 @@
+import ast
+
+from RAG.markdown import split_markdown
+
+# Structure-aware chunking. A file is cut into units at syntactic boundaries
+# (top-level defs/classes for Python, headings for markdown, top-level
+# blocks for brace/indent languages), oversized units are split further at
+# their own inner boundaries, and consecutive small units are packed together
+# up to `max_chars`. Chunks never overlap and every chunk knows its lines.
+
+CHUNK_CHARS = 1200
+CHUNKER_VERSION = 2   # bump when boundaries change so stored indexes get rebuilt
+
+def _lines(text):
+    # split on "\n" only, so line numbers agree with ast and editors
+    parts = text.split("\n")
+    lines = [p + "\n" for p in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+def _size(lines, start, end):
+    return sum(len(l) for l in lines[start - 1:end])
+
+def _line_windows(lines, start, end, max_chars):
+    """Last resort: consecutive whole lines up to max_chars."""
+    units = []
+    s = start
+    size = 0
+    for i in range(start, end + 1):
+        n = len(lines[i - 1])
+        if size and size + n > max_chars:
+            units.append((s, i - 1))
+            s, size = i, 0
+        size += n
+    units.append((s, end))
+    return units
+
+def _pack(units, lines, max_chars):
+    """Merge consecutive units while they fit in max_chars."""
+    chunks = []
+    for start, end in units:
+        if chunks and _size(lines, chunks[-1][0], end) <= max_chars:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+    return chunks
+
+def _split_long_lines(text, start, end, max_chars):
+    # a single huge line (minified code, data) can only be cut by characters
+    return [(text[i:i + max_chars], start, end) for i in range(0, len(text), max_chars)]
+
+# ---------- Python ----------
+
+def _node_start(node, lines):
+    start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+    # comments directly above belong to the definition
+    while start > 1 and lines[start - 2].lstrip().startswith("#"):
+        start -= 1
+    return start
+
+def _py_units(nodes, first, last, lines, max_chars):
+    starts = {}
+    for node in nodes:
+        s = _node_start(node, lines)
+        if first < s <= last:
+            starts.setdefault(s, node)
+    bounds = [first] + sorted(starts)
+    units = []
+    for i, b in enumerate(bounds):
+        end = bounds[i + 1] - 1 if i + 1 < len(bounds) else last
+        if _size(lines, b, end) <= max_chars:
+            units.append((b, end))
+            continue
+        body = getattr(starts.get(b), "body", None)
+        if isinstance(body, list) and body:
+            # oversized class/function: cut between its own statements
+            units.extend(_py_units(body, b, end, lines, max_chars))
+        else:
+            units.extend(_line_windows(lines, b, end, max_chars))
+    return units
+
+# ---------- Brace / indent languages ----------
+
+def _block_units(lines, max_chars):
+    """Top-level blocks: a unit starts at an unindented line at brace depth 0
+    that follows a blank line or a line closing a top-level block."""
+    bounds = [1]
+    depth = 0
+    prev_closed = False
+    for i, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if i > 1 and depth == 0 and stripped and not line[0].isspace():
+            if not lines[i - 2].strip() or prev_closed:
+                bounds.append(i)
+        opened = line.count("{") + line.count("[")
+        closed = line.count("}") + line.count("]")
+        new_depth = max(0, depth + opened - closed)
+        if stripped:
+            prev_closed = depth > 0 and new_depth == 0
+        depth = new_depth
+    units = []
+    for i, b in enumerate(bounds):
+        end = bounds[i + 1] - 1 if i + 1 < len(bounds) else len(lines)
+        units.extend(_line_windows(lines, b, end, max_chars) if _size(lines, b, end) > max_chars else [(b, end)])
+    return units
+
+# ---------- Markdown ----------
+
+def _md_units(text, lines, max_chars):
+    units = []
+    titles = {}
+    for start, end, title in split_markdown(text):
+        titles[start] = title
+        if _size(lines, start, end) <= max_chars:
+            units.append((start, end))
+        else:
+            # long section: paragraphs, then lines
+            for s, e in _block_units(lines[start - 1:end], max_chars):
+                units.append((s + start - 1, e + start - 1))
+    return units, titles
+
+# ---------- Entry point ----------
+
+def chunk_file(name: str, text: str, max_chars=CHUNK_CHARS):
+    """Chunk one file: [{"text", "start_line", "end_line"(, "section")}], lines 1-based inclusive."""
+    lines = _lines(text)
+    if not lines:
+        return []
+    titles = {}
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    units = None
+    if ext == "py":
+        try:
+            units = _py_units(ast.parse(text).body, 1, len(lines), lines, max_chars)
+        except (SyntaxError, ValueError):
+            units = None
+    elif ext in ("md", "markdown"):
+        units, titles = _md_units(text, lines, max_chars)
+    if units is None:
+        units = _block_units(lines, max_chars)
+
+    chunks = []
+    heads = sorted(titles)
+    for start, end in _pack(units, lines, max_chars):
+        section = titles[max((h for h in heads if h <= start), default=heads[0])] if heads else ""
+        body = "".join(lines[start - 1:end])
+        if not body.strip():
+            continue
+        pieces = _split_long_lines(body, start, end, max_chars) if len(body) > max_chars else [(body, start, end)]
+        for piece, s, e in pieces:
+            chunk = {"text": piece, "start_line": s, "end_line": e}
+            if titles:
+                chunk["section"] = section
+            chunks.append(chunk)
+    return chunks
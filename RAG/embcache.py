@@ -0,0 +1,129 @@
+import os, re, json, hashlib, threading
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:     # Windows: the directory lock is not taken
+    fcntl = None
+
+# On-disk embedding cache shared by every repo and every rebuild.
+#
+#   <root>/<model>/vectors.f32   float32 memmap, `capacity` rows of `dim`
+#   <root>/<model>/tags.u64      uint64 memmap: tag of the key whose vector is in each row
+#   <root>/<model>/index.json    {"dim", "capacity", "entries": [[sha1, slot], ...]}
+#   <root>/<model>/lock          flock'ed by the process that has the cache open
+#
+# Entries are kept in LRU order (oldest first); when the store is full the
+# least recently used slot is overwritten. index.json is only rewritten by
+# save(), so a row's tag is set before its vector: entries of index.json
+# whose row was reused since (by a build that never got to save) don't match
+# their tag on the next open and are dropped. One instance may be shared by
+# several indexing threads. Only one process may have a directory open (both
+# would hand out the same free slots): a second one gets CacheBusy.
+
+DEFAULT_CAPACITY = 100_000  # ~150 MB of vectors at dim=384
+
+class CacheBusy(OSError):
+    """The cache directory is open in another process."""
+
+def _lock_dir(path: Path):
+    """Open and flock `path`/lock; the lock is held until the returned file is closed."""
+    fh = open(path / "lock", "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            raise CacheBusy(f"embedding cache {path} is in use by another process")
+    return fh
+
+def _tag(key):
+    return int.from_bytes(hashlib.sha1(key.encode()).digest()[:8], "little")
+
+class EmbeddingCache:
+    def __init__(self, root: Path, model_name: str, dim: int, capacity=DEFAULT_CAPACITY):
+        self.dir = Path(root) / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock_file = _lock_dir(self.dir)
+        self.dim = dim
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.slots = OrderedDict()  # sha1 -> row in the memmap
+        self.lock = threading.Lock()
+        vec_path = self.dir / "vectors.f32"
+        tag_path = self.dir / "tags.u64"
+        index_path = self.dir / "index.json"
+        try:
+            index = json.loads(index_path.read_text(encoding="utf-8"))
+            if (index["dim"] != dim or index["capacity"] != capacity or not vec_path.exists()
+                    or not tag_path.exists()):
+                raise ValueError("cache layout changed")
+            entries = index["entries"]
+            mode = "r+"
+        except Exception:
+            entries = []
+            mode = "w+"
+        self.vectors = np.memmap(str(vec_path), dtype=np.float32, mode=mode, shape=(capacity, dim))
+        self.tags = np.memmap(str(tag_path), dtype=np.uint64, mode=mode, shape=(capacity,))
+        self.slots.update((k, s) for k, s in entries if int(self.tags[s]) == _tag(k))
+        self.free = sorted(set(range(capacity)) - set(self.slots.values()), reverse=True)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def get_many(self, keys):
+        """Return a list with a vector (copy) for every cached key, None otherwise."""
+        with self.lock:
+            return self._get_many(keys)
+
+    def _get_many(self, keys):
+        out = []
+        for k in keys:
+            slot = self.slots.get(k)
+            if slot is None:
+                self.misses += 1
+                out.append(None)
+            else:
+                self.hits += 1
+                self.slots.move_to_end(k)
+                out.append(np.array(self.vectors[slot]))
+        return out
+
+    def put_many(self, keys, vecs):
+        with self.lock:
+            self._put_many(keys, vecs)
+
+    def _put_many(self, keys, vecs):
+        for k, v in zip(keys, vecs):
+            slot = self.slots.get(k)
+            if slot is None:
+                if self.free:
+                    slot = self.free.pop()
+                else:
+                    _, slot = self.slots.popitem(last=False)  # evict LRU
+            self.slots[k] = slot
+            self.slots.move_to_end(k)
+            self.tags[slot] = _tag(k)
+            self.vectors[slot] = v
+
+    def save(self):
+        with self.lock:
+            self.tags.flush()
+            self.vectors.flush()
+            index = {"dim": self.dim, "capacity": self.capacity, "entries": list(self.slots.items())}
+        tmp = self.dir / "index.json.tmp"
+        tmp.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp, self.dir / "index.json")
+
+    def close(self):
+        """Save and release the directory for other processes."""
+        self.save()
+        self._lock_file.close()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.slots),
+                "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,108 @@
+import hashlib, threading, time
+from collections import deque
+import numpy as np
+
+# Optional imports (used if available; torch is only imported when a model is loaded)
+from RAG.optional import HAS_SBER
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+def get_id(s: str):
+    return hashlib.sha1(s.encode()).hexdigest()
+
+# Embedding provider wrapper
+class EmbeddingProvider:
+    def __init__(self, model_name=DEFAULT_MODEL):
+        self.model = None
+        self.dim = None
+        self.model_name = model_name
+        self.lock = threading.Lock()
+        self.encode_times = deque(maxlen=100)  # (batch size, seconds) of recent encode calls
+        t0 = time.perf_counter()
+        if HAS_SBER:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self.model = SentenceTransformer(model_name)
+                self.dim = self.model.get_sentence_embedding_dimension()
+            except Exception:
+                self.model = None
+                self.dim = 384
+        else:
+            # fallback dimension
+            self.dim = 384
+        self.load_seconds = time.perf_counter() - t0
+        if self.model is None:
+            # keep fallback vectors apart from real ones in the embedding cache
+            self.model_name = "hash-fallback"
+
+    def encode(self, texts):
+        """Embed `texts` into a (len(texts), dim) float32 matrix."""
+        t0 = time.perf_counter()
+        if self.model is not None:
+            # one model shared by every session: don't interleave batches
+            with self.lock:
+                embs = self.model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
+            embs = np.asarray(embs, dtype=np.float32).reshape(-1, self.dim)
+        else:
+            # fallback: random vectors (placeholder) — replace with a real embedding service
+            embs = np.empty((len(texts), self.dim), dtype=np.float32)
+            for i, t in enumerate(texts):
+                rng = np.random.RandomState(int(get_id(t)[:8], 16))
+                embs[i] = rng.rand(self.dim)
+        self.encode_times.append((len(texts), time.perf_counter() - t0))
+        return embs
+
+    def embed(self, texts, cache=None):
+        if cache is None:
+            return self.encode(texts)
+        # content-addressed: only texts whose sha1 is not cached go to the model
+        keys = [get_id(t) for t in texts]
+        embs = cache.get_many(keys)
+        todo = {}
+        for i, (k, e) in enumerate(zip(keys, embs)):
+            if e is None and k not in todo:
+                todo[k] = i
+        if todo:
+            new = self.encode([texts[i] for i in todo.values()])
+            cache.put_many(list(todo), new)
+            fresh = dict(zip(todo, new))
+            embs = [fresh[k] if e is None else e for k, e in zip(keys, embs)]
+        return np.array(embs, dtype=np.float32).reshape(-1, self.dim)
+
+    def stats(self):
+        batches = list(self.encode_times)
+        n = sum(b for b, _ in batches)
+        secs = sum(s for _, s in batches)
+        return {"model": self.model_name, "dim": self.dim,
+                "load_seconds": round(self.load_seconds, 3),
+                "batches": len(batches),
+                "last_batch": {"size": batches[-1][0], "seconds": round(batches[-1][1], 4)} if batches else None,
+                "texts_per_sec": round(n / secs, 1) if secs else None}
+
+# ---------- Process-wide registry ----------
+# Streamlit re-executes the script on every interaction, but imported modules
+# stay loaded, so providers kept here are shared by all sessions.
+
+_providers = {}
+_registry_lock = threading.Lock()
+
+def get_provider(model_name=DEFAULT_MODEL) -> EmbeddingProvider:
+    """Return the shared provider for `model_name`, loading it on first use."""
+    prov = _providers.get(model_name)
+    if prov is None:
+        with _registry_lock:
+            prov = _providers.get(model_name)
+            if prov is None:
+                prov = _providers[model_name] = EmbeddingProvider(model_name)
+    return prov
+
+def warm_up(model_name=DEFAULT_MODEL):
+    """Load `model_name` (and run one tiny batch) in a background thread."""
+    def _run():
+        get_provider(model_name).encode(["warm up"])
+    t = threading.Thread(target=_run, name=f"warmup-{model_name}", daemon=True)
+    t.start()
+    return t
+
+def loaded_providers():
+    return dict(_providers)
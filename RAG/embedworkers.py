@@ -0,0 +1,120 @@
+import os, time, atexit, weakref, threading
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from RAG.embeddings import EmbeddingProvider, DEFAULT_MODEL
+
+# Multi-process embedding for indexing. Texts are sorted by length and cut
+# into batches of similar length (so little of each batch is padding), the
+# batches are spread over a pool of worker processes that each hold their
+# own model copy with a fixed number of torch threads, and the vectors are
+# put back in input order.
+
+CHAR_BUDGET = 64 * 1200   # max (batch size x longest text) per batch
+MAX_BATCH = 128
+
+_worker = None  # EmbeddingProvider of this worker process
+
+def _init_worker(model_name, threads):
+    global _worker
+    # pin BLAS/torch threads before the model (and torch) is imported
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+    _worker = EmbeddingProvider(model_name)
+
+def _worker_info():
+    return _worker.model_name, _worker.dim
+
+def _encode_batch(texts):
+    return _worker.encode(texts)
+
+def length_buckets(texts, char_budget=CHAR_BUDGET, max_batch=MAX_BATCH):
+    """Indices of `texts` grouped into batches of similar length, shortest first."""
+    order = np.argsort([len(t) for t in texts], kind="stable")
+    batches = []
+    batch = []
+    for i in order:
+        longest = max(len(texts[i]), 1)  # sorted: the newcomer is the longest
+        if batch and ((len(batch) + 1) * longest > char_budget or len(batch) >= max_batch):
+            batches.append(batch)
+            batch = []
+        batch.append(int(i))
+    if batch:
+        batches.append(batch)
+    return batches
+
+class EmbeddingEngine(EmbeddingProvider):
+    """Drop-in EmbeddingProvider whose encode() fans out over worker processes."""
+
+    def __init__(self, model_name=DEFAULT_MODEL, workers=None, threads_per_worker=None):
+        cpus = os.cpu_count() or 1
+        self.workers = workers or cpus
+        self.threads = threads_per_worker or max(1, cpus // self.workers)
+        self.lock = threading.Lock()
+        self.encode_times = deque(maxlen=100)
+        t0 = time.perf_counter()
+        # spawn: forking a process that runs Streamlit/torch threads is not safe
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"),
+                                        initializer=_init_worker, initargs=(model_name, self.threads))
+        infos = [self.pool.submit(_worker_info) for _ in range(self.workers)]
+        self.model_name, self.dim = infos[0].result()
+        for f in infos[1:]:
+            f.result()
+        self.model = None
+        self.load_seconds = time.perf_counter() - t0
+        # the pool also goes when the last job using a replaced engine drops it
+        self._shutdown = weakref.finalize(self, self.pool.shutdown, wait=False, cancel_futures=True)
+        # a pipeline batch big enough to keep every worker busy
+        self.preferred_batch = self.workers * MAX_BATCH
+
+    def encode(self, texts):
+        t0 = time.perf_counter()
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        batches = length_buckets(texts)
+        # longest batches first so no worker is left with a slow one at the end
+        futures = [(idx, self.pool.submit(_encode_batch, [texts[i] for i in idx])) for idx in reversed(batches)]
+        for idx, fut in futures:
+            out[idx] = fut.result()
+        self.encode_times.append((len(texts), time.perf_counter() - t0))
+        return out
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(workers=self.workers, threads_per_worker=self.threads)
+        return stats
+
+    def close(self):
+        self._shutdown.detach()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+# ---------- Process-wide registry ----------
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine(model_name=DEFAULT_MODEL, workers=None) -> EmbeddingEngine:
+    """Shared engine for `model_name`, started on first use.
+
+    `workers` is clamped to [1, cpu count]. There is one engine (one pool of
+    model copies) per model: asking for another worker count replaces it, and
+    the old pool shuts down once the jobs still using it are done.
+    """
+    cpus = os.cpu_count() or 1
+    workers = min(max(1, int(workers or cpus)), cpus)
+    with _engines_lock:
+        engine = _engines.get(model_name)
+        if engine is None or engine.workers != workers:
+            engine = _engines[model_name] = EmbeddingEngine(model_name, workers)
+        return engine
+
+@atexit.register
+def _shutdown():
+    for engine in _engines.values():
+        engine.close()
@@ -0,0 +1,220 @@
+import os, time, heapq, threading, contextvars
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+
+from RAG.lexical import rrf
+from RAG.store import OpenIndex, index_paths
+
+# Federated search: every built index under INDEX_DIR is one shard. A query is
+# embedded once, fanned out to all shards on a thread pool (FAISS and NumPy
+# release the GIL while searching) and the per-shard top-k lists are merged
+# with a heap (cosine for semantic, BM25 for lexical; BM25 statistics are per
+# repo, so that ranking is approximate). Per-shard RRF scores don't compare
+# across shards, so hybrid results are re-fused: RRF over the union of the
+# shards' candidates ranked by cosine and by BM25.
+#
+# Shards that keep contributing results are "hot" and have their vectors read
+# into memory, as many as fit in the memory budget (FAISS index / .npy size);
+# the others are memory-mapped and paged in by the OS. Heat decays with every
+# query, and shards are promoted/demoted in the background after a query.
+# An open shard always holds its BM25 postings in memory, and they count
+# against the same budget: at most MAX_SHARDS shards are open, and least
+# recently used ones are closed while the total is over budget. A shard that
+# is replaced or evicted is closed once the searches still using it are done.
+
+SHARD_WORKERS = int(os.environ.get("REPOMIND_SHARD_WORKERS", "8") or 8)
+SHARD_MEMORY_MB = int(os.environ.get("REPOMIND_SHARD_MEMORY_MB", "1024") or 0)
+MAX_SHARDS = int(os.environ.get("REPOMIND_MAX_SHARDS", "128") or 128)   # open at once
+HEAT_DECAY = 0.9        # per query
+LATENCY_WINDOW = 500    # recent searches kept per shard for p50/p99
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(p / 100 * len(xs)))], 3) if xs else None
+
+def _fuse(per_shard, k):
+    pool = [r for results in per_shard for r in results]
+    ranked = [sorted(((i, r[key]) for i, r in enumerate(pool) if r.get(key) is not None), key=lambda x: -x[1])
+              for key in ("cosine", "bm25")]
+    return [{**pool[i], "score": s} for i, s in rrf(*ranked)[:k]]
+
+def _lexical_bytes(idx):
+    return idx.lexical.nbytes() if idx.lexical is not None else 0
+
+def _footprint(idx):
+    """Memory an open shard holds: its BM25 postings, plus its vectors when resident."""
+    return _lexical_bytes(idx) + (idx.nbytes if idx.resident else 0)
+
+class ShardSet:
+    def __init__(self, index_dir: Path, memory_mb=SHARD_MEMORY_MB, workers=SHARD_WORKERS, max_open=MAX_SHARDS):
+        self.index_dir = Path(index_dir)
+        self.budget = memory_mb * 2 ** 20
+        self.max_open = max_open
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="shard")
+        self.shards = OrderedDict() # name -> OpenIndex, least recently used first
+        self.users = {}             # OpenIndex -> searches using it
+        self.retired = set()        # replaced/evicted shards, closed when their last search is done
+        self.heat = {}              # name -> decayed count of results contributed
+        self.hot = OrderedDict()    # names wanted resident, hottest first
+        self.latency = {}           # name -> deque of search ms
+        self.errors = {}            # name -> last error
+        self.queries = 0
+        self.lock = threading.Lock()
+        self.rebalancing = False
+
+    def names(self):
+        """Repos with a complete index in index_dir."""
+        return sorted(p.name[:-len("_index_meta.json")] for p in self.index_dir.glob("*_index_meta.json")
+                      if index_paths(self.index_dir, p.name[:-len("_index_meta.json")])["meta"].exists())
+
+    def _acquire(self, name):
+        """The open shard, reopened when its index was rebuilt or its residency is due to change.
+
+        The caller must _release() it when done.
+        """
+        version = index_paths(self.index_dir, name)["status"].stat().st_mtime_ns
+        with self.lock:
+            idx = self.shards.get(name)
+            want = name in self.hot
+            if idx is not None and idx.version == version and idx.resident == want:
+                self.shards.move_to_end(name)
+                self.users[idx] = self.users.get(idx, 0) + 1
+                return idx
+        idx = OpenIndex(self.index_dir, name, resident=want)
+        with self.lock:
+            old = self.shards.pop(name, None)
+            if old is not None:
+                self._retire(old)
+            self.shards[name] = idx
+            self.users[idx] = 1
+            self._evict(keep=name)
+        return idx
+
+    def _release(self, idx):
+        with self.lock:
+            self.users[idx] -= 1
+            if not self.users[idx]:
+                del self.users[idx]
+                if idx in self.retired:
+                    self.retired.discard(idx)
+                    idx.close()
+
+    def _retire(self, idx):
+        """Close a shard that left self.shards, now or after its last search (self.lock held)."""
+        if self.users.get(idx):
+            self.retired.add(idx)
+        else:
+            idx.close()
+
+    def _evict(self, keep):
+        """Close least recently used shards while too many are open or they are over budget (self.lock held)."""
+        used = sum(_footprint(idx) for idx in self.shards.values())
+        for name in list(self.shards):
+            if len(self.shards) <= self.max_open and (not self.budget or used <= self.budget):
+                break
+            if name == keep:
+                continue
+            idx = self.shards.pop(name)
+            used -= _footprint(idx)
+            self.hot.pop(name, None)
+            self._retire(idx)
+
+    def _search_one(self, name, qvec, k, query, mode):
+        t0 = time.perf_counter()
+        idx = self._acquire(name)
+        try:
+            if mode != "lexical" and idx.dim and len(qvec) != idx.dim:
+                raise ValueError(f"index dim {idx.dim} != query dim {len(qvec)} (built with another model)")
+            results = idx.search(qvec, k, query=query, mode=mode)
+        finally:
+            self._release(idx)
+        ms = (time.perf_counter() - t0) * 1000
+        with self.lock:
+            self.latency.setdefault(name, deque(maxlen=LATENCY_WINDOW)).append(ms)
+        for r in results:
+            r["repo"] = name
+        return results, ms
+
+    def search(self, qvec, k=5, query=None, mode="hybrid", repos=None, timeout=None):
+        """Top-k over every shard (or `repos`); returns (results, info).
+
+        Each result carries its "repo". info has per-shard "ms", the shards
+        that "failed" and those that missed the `timeout` (seconds) as "late".
+        """
+        repos = self.names() if repos is None else list(repos)
+        t0 = time.perf_counter()
+        futures = {self.pool.submit(contextvars.copy_context().run, self._search_one, name, qvec, k, query, mode): name
+                   for name in repos}
+        done, late = wait(futures, timeout=timeout)
+        per_shard, ms, failed = [], {}, {}
+        for f in done:
+            name = futures[f]
+            try:
+                results, ms[name] = f.result()
+                per_shard.append(results)
+            except Exception as e:
+                failed[name] = str(e)
+        if mode == "hybrid":
+            merged = _fuse(per_shard, k)
+        else:
+            merged = list(islice(heapq.merge(*per_shard, key=lambda r: -r["score"]), k))
+        with self.lock:
+            self.errors.update(failed)
+            self.queries += 1
+            for name in self.heat:
+                self.heat[name] *= HEAT_DECAY
+            for r in merged:
+                self.heat[r["repo"]] = self.heat.get(r["repo"], 0.0) + 1.0
+        self._rebalance()
+        info = {"shards": len(repos), "ms": {n: round(v, 3) for n, v in ms.items()}, "failed": failed,
+                "late": sorted(futures[f] for f in late), "seconds": round(time.perf_counter() - t0, 4)}
+        return merged, info
+
+    def _rebalance(self):
+        """Pick the hottest shards that fit the budget; reopen the ones whose residency changed (in the background)."""
+        with self.lock:
+            # what the open shards' BM25 postings take is not available for vectors
+            hot, used = OrderedDict(), sum(_lexical_bytes(idx) for idx in self.shards.values())
+            for name in sorted(self.heat, key=self.heat.get, reverse=True):
+                idx = self.shards.get(name)
+                if idx is None or self.heat[name] < 0.5:
+                    continue
+                if used + idx.nbytes <= self.budget:
+                    hot[name] = idx.nbytes
+                    used += idx.nbytes
+            changed = [n for n in set(hot) ^ set(self.hot) if n in self.shards]
+            self.hot = hot
+            if not changed or self.rebalancing:
+                return
+            self.rebalancing = True
+
+        def reopen():
+            try:
+                for name in changed:
+                    try:
+                        self._release(self._acquire(name))
+                    except Exception as e:
+                        with self.lock:
+                            self.errors[name] = str(e)
+            finally:
+                self.rebalancing = False
+        threading.Thread(target=reopen, name="shard-rebalance", daemon=True).start()
+
+    def stats(self):
+        """Per-shard residency, size, heat and search latency p50/p99 (ms)."""
+        with self.lock:
+            rows = []
+            for name in sorted(set(self.shards) | set(self.latency)):
+                idx = self.shards.get(name)
+                lat = list(self.latency.get(name, ()))
+                rows.append({"repo": name, "resident": bool(idx and idx.resident),
+                             "mb": round(idx.nbytes / 2 ** 20, 1) if idx else None,
+                             "lexical_mb": round(_lexical_bytes(idx) / 2 ** 20, 1) if idx else None,
+                             "heat": round(self.heat.get(name, 0.0), 2), "searches": len(lat),
+                             "p50_ms": _pct(lat, 50), "p99_ms": _pct(lat, 99), "error": self.errors.get(name)})
+            resident = sum(_footprint(idx) for idx in self.shards.values())
+            return {"queries": self.queries, "resident_mb": round(resident / 2 ** 20, 1),
+                    "budget_mb": round(self.budget / 2 ** 20), "open": len(self.shards), "max_open": self.max_open,
+                    "shards": rows}
@@ -1,35 +1,181 @@
-import os, fitz, docx, pandas as pd
-from pptx import Presentation
+import os, json, hashlib, tempfile
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+# Optional imports (used if available, imported on first use)
+from RAG.optional import lazy, HAS_FITZ, HAS_DOCX, HAS_PPTX, HAS_PANDAS, HAS_PYARROW, HAS_OPENPYXL
+fitz = lazy("fitz")
+docx = lazy("docx")
+pptx = lazy("pptx")
+pd = lazy("pandas")
+pa = lazy("pyarrow")
+pa_csv = lazy("pyarrow.csv")
+openpyxl = lazy("openpyxl")
+
+# Documents are read one unit at a time (PDF page, slide, group of table
+# rows, block of paragraphs) so a large file never has to sit in memory as one
+# string. extract_many() runs the extraction in a process pool and caches the
+# units on disk as JSON lines keyed by (path, mtime, size).
+
+EXTRACT_VERSION = 2      # bump when the output of a handler changes
+EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+PART_CHARS = 20000       # text/docx units are cut at about this size
+TABLE_CHARS = 1200       # table row groups: about one chunk (chunker.CHUNK_CHARS) each
+TABLE_ROWS = 10000       # rows parsed per batch (pandas fallback)
+CELL_CHARS = 200         # longer cell values are cut
+
 # ---------- File-type handlers ----------
+# each yields (label, text) per unit
+
+def iter_txt(path):
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        buf, size, start = [], 0, 1
+        for n, line in enumerate(f, 1):
+            buf.append(line)
+            size += len(line)
+            if size >= PART_CHARS:
+                yield f"lines {start}-{n}", "".join(buf)
+                buf, size, start = [], 0, n + 1
+        if buf:
+            yield f"lines {start}-{start + len(buf) - 1}", "".join(buf)
+
+def iter_pdf(path):
+    doc = fitz.open(path)
+    try:
+        for i, page in enumerate(doc, 1):
+            yield f"page {i}", page.get_text("text")
+    finally:
+        doc.close()
+
+def iter_docx(path):
+    """Paragraphs grouped by heading (a new unit at each Heading style), capped at PART_CHARS."""
+    d = docx.Document(path)
+    label, buf, size = "", [], 0
+    for p in d.paragraphs:
+        if not p.text.strip():
+            continue
+        heading = (p.style.name or "").startswith("Heading")
+        if buf and (heading or size >= PART_CHARS):
+            yield label or "start", "\n".join(buf)
+            buf, size = [], 0
+        if heading:
+            label = p.text.strip()
+        buf.append(p.text)
+        size += len(p.text)
+    if buf:
+        yield label or "start", "\n".join(buf)
+
+def iter_pptx(path):
+    prs = pptx.Presentation(path)
+    for i, slide in enumerate(prs.slides, 1):
+        texts = [s.text for s in slide.shapes if hasattr(s, "text") and s.text.strip()]
+        yield f"slide {i}", "\n".join(texts)
+
+# ---------- Tables ----------
+# Rows are parsed in batches and emitted as small row groups, each starting
+# with the column header, so every chunk can be read on its own and memory
+# stays flat whatever the size of the file.
+
+def _cell(v):
+    if v is None or v != v:  # None / NaN
+        return ""
+    v = str(v).replace("\n", " ")
+    return v[:CELL_CHARS]
+
+def row_groups(rows, header, context="", max_chars=TABLE_CHARS, first_row=1):
+    """Yield (label, text) groups of `rows` (iterables of cells), each headed by `context` and the header."""
+    head = (f"{context}\n" if context else "") + "columns: " + " | ".join(_cell(h) for h in header) + "\n"
+    buf, size, start, n = [], len(head), first_row, first_row - 1
+    for row in rows:
+        line = " | ".join(_cell(v) for v in row)
+        if not line.strip(" |"):
+            continue
+        n += 1
+        if buf and size + len(line) + 1 > max_chars:
+            yield f"{context + ' ' if context else ''}rows {start}-{n - 1}", head + "\n".join(buf)
+            buf, size, start = [], len(head), n
+        buf.append(line)
+        size += len(line) + 1
+    if buf:
+        yield f"{context + ' ' if context else ''}rows {start}-{n}", head + "\n".join(buf)
+
+def _csv_batches(path):
+    """(header, iterator of row batches) with every value read as a string."""
+    if HAS_PYARROW:
+        import csv
+        with open(path, newline="", encoding="utf-8", errors="ignore") as f:
+            header = next(csv.reader(f), [])
+        reader = pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=1 << 18, use_threads=False),
+                                 convert_options=pa_csv.ConvertOptions(column_types={h: pa.string() for h in header}))
+        def batches():
+            for batch in reader:
+                cols = [c.to_pylist() for c in batch.columns]
+                yield zip(*cols)
+        return header, batches()
+    chunks = pd.read_csv(path, chunksize=TABLE_ROWS, dtype=str, keep_default_na=False)
+    first = next(chunks, None)
+    if first is None:
+        return [], iter(())
+    def batches():
+        yield first.itertuples(index=False, name=None)
+        for df in chunks:
+            yield df.itertuples(index=False, name=None)
+    return list(first.columns), batches()
+
+def iter_csv(path):
+    header, batches = _csv_batches(path)
+    start = 1
+    for rows in batches:
+        rows = list(rows)  # one parsed batch (256 KB of CSV) at a time
+        yield from row_groups(rows, header, first_row=start)
+        start += len(rows)
 
+def iter_xlsx(path):
+    """Sheets streamed with openpyxl read-only mode; the first non-empty row is the header."""
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            rows = ws.iter_rows(values_only=True)
+            header = next((r for r in rows if any(v is not None for v in r)), None)
+            if header is not None:
+                yield from row_groups(rows, header, context=f"sheet {ws.title}")
+    finally:
+        wb.close()
+
+def iter_csv_xlsx(path):
+    return iter_csv(path) if str(path).lower().endswith(".csv") else iter_xlsx(path)
+
+HANDLERS = {".txt": (iter_txt, True), ".pdf": (iter_pdf, HAS_FITZ), ".docx": (iter_docx, HAS_DOCX),
+            ".pptx": (iter_pptx, HAS_PPTX), ".csv": (iter_csv, HAS_PYARROW or HAS_PANDAS), ".xlsx": (iter_xlsx, HAS_OPENPYXL)}
+# document types the indexer can take (plain text goes through its own reader)
+DOC_EXTS = [ext for ext, (_, ok) in HANDLERS.items() if ok and ext != ".txt"]
+
+def iter_pages(file_path):
+    """Yield (label, text) for every page/slide/sheet of a supported file."""
+    handler, ok = HANDLERS.get(Path(file_path).suffix.lower(), (None, False))
+    if not ok:
+        raise ValueError(f"unsupported file type: {file_path}")
+    yield from handler(str(file_path))
+
+# kept for callers that want one string
 def read_txt(path):
     with open(path, encoding="utf-8", errors="ignore") as f:
         return f.read()
 
 def read_pdf(path):
-    doc = fitz.open(path)
-    pages = [page.get_text("text") for page in doc]
-    doc.close()
-    return "\n".join(pages)
+    return "\n".join(text for _, text in iter_pdf(path))
 
 def read_docx(path):
     d = docx.Document(path)
     return "\n".join(p.text for p in d.paragraphs if p.text.strip())
 
 def read_pptx(path):
-    prs = Presentation(path)
-    slides=[]
-    for i,slide in enumerate(prs.slides,1):
-        texts=[s.text for s in slide.shapes if hasattr(s,"text") and s.text.strip()]
-        slides.append(f"--- Slide {i} ---\n"+"\n".join(texts))
-    return "\n".join(slides)
+    return "\n".join(f"--- Slide {label.split()[-1]} ---\n{text}" for label, text in iter_pptx(path))
 
 def read_csv_xlsx(path):
     try:
-        df = pd.read_csv(path) if path.endswith(".csv") else pd.read_excel(path)
-        return df.to_string(index=False)
+        return "\n".join(text for _, text in iter_csv_xlsx(path))
     except Exception as e:
         return f"⚠️ Could not read table: {e}"
 
@@ -44,6 +190,91 @@ def extract_text(file_path:str)->str:
     if ext == ".txt":   return read_txt(file_path)
     return "⚠️ Unsupported file type."
 
+# ---------- Batch extraction with disk cache ----------
+
+def cache_path(cache_dir: Path, file_path):
+    st = os.stat(file_path)
+    key = f"{EXTRACT_VERSION}|{os.path.abspath(file_path)}|{st.st_mtime_ns}|{st.st_size}"
+    h = hashlib.sha1(key.encode("utf-8", errors="surrogateescape")).hexdigest()
+    return Path(cache_dir) / h[:2] / f"{h}.jsonl"
+
+def _extract_to(file_path, out):
+    """Write the units of `file_path` to `out` (one JSON [label, text] per line); returns the unit count."""
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+    n = 0
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for label, text in iter_pages(file_path):
+                fh.write(json.dumps([label, text]) + "\n")
+                n += 1
+        os.replace(tmp, out)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return n
+
+def read_cached(out):
+    """Stream (label, text) units back from a cache file."""
+    with open(out, encoding="utf-8") as fh:
+        for line in fh:
+            label, text = json.loads(line)
+            yield label, text
+
+def extract_many(paths, cache_dir=None, workers=EXTRACT_WORKERS, errors=None):
+    """Yield (path, units) per document, cached ones first, the rest as the pool finishes them.
+
+    `units` streams (label, text) from disk and must be consumed before advancing.
+    Files that fail to extract are skipped (and appended to `errors` if given).
+    Without `cache_dir` the units go to a temporary directory removed at the end.
+    """
+    tmpdir = None
+    if cache_dir is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="repomind-extract-")
+        cache_dir = tmpdir.name
+    try:
+        todo = []
+        for p in paths:
+            try:
+                out = cache_path(cache_dir, p)
+            except OSError as e:
+                if errors is not None:
+                    errors.append((p, str(e)))
+                continue
+            if out.exists():
+                yield p, read_cached(out)
+            else:
+                todo.append((p, out))
+        if len(todo) <= 1 or workers <= 1:
+            done = ((p, out, lambda p=p, out=out: _extract_to(p, out)) for p, out in todo)
+        else:
+            # spawn: see embedworkers; a small pool, extraction is CPU-bound
+            pool = ProcessPoolExecutor(min(workers, len(todo)), mp_context=mp.get_context("spawn"))
+            futures = {pool.submit(_extract_to, p, out): (p, out) for p, out in todo}
+            done = ((*futures[f], f.result) for f in as_completed(futures))
+        try:
+            for p, out, result in done:
+                try:
+                    result()
+                except Exception as e:
+                    if errors is not None:
+                        errors.append((p, str(e)))
+                    continue
+                yield p, read_cached(out)
+        finally:
+            if len(todo) > 1 and workers > 1:
+                pool.shutdown(wait=True, cancel_futures=True)
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+def extract_dir(root, exts=None, **kwargs):
+    """extract_many() over every supported document under `root`."""
+    exts = set(exts or DOC_EXTS)
+    paths = sorted(str(p) for p in Path(root).rglob("*") if p.suffix.lower() in exts and p.is_file())
+    return extract_many(paths, **kwargs)
+
 if __name__ == "__main__":
     path = input("Enter file path: ").strip().strip('"')
     if not os.path.exists(path):
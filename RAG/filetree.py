@@ -0,0 +1,140 @@
+import os, threading
+from collections import OrderedDict
+from pathlib import Path
+
+from RAG.manifest import head_commit, is_git_repo
+
+# Repository file listing for the explorer. The tree is walked once with
+# os.scandir (pruning VCS/dependency dirs and binary files), then kept per
+# (repo, HEAD commit) so reruns and filter keystrokes never touch the disk.
+# Filtering goes through a trigram index over the lowercased paths.
+
+PRUNE_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+              ".tox", ".mypy_cache", ".pytest_cache", ".idea", ".ipynb_checkpoints"}
+BINARY_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tif", ".tiff", ".psd",
+               ".pdf", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".tar", ".jar", ".whl", ".egg",
+               ".so", ".dll", ".dylib", ".exe", ".bin", ".o", ".a", ".lib", ".pyc", ".pyo", ".class",
+               ".woff", ".woff2", ".ttf", ".otf", ".eot", ".mp3", ".mp4", ".wav", ".avi", ".mov", ".mkv",
+               ".npy", ".npz", ".pkl", ".pt", ".onnx", ".h5", ".parquet", ".sqlite", ".db", ".index"}
+MAX_ITEMS = 200_000
+
+def _trigrams(s):
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+class FileTree:
+    """Files and directories of one checkout; directories are listed on demand via children()."""
+
+    def __init__(self, root: Path, max_items=MAX_ITEMS):
+        self.root = Path(root)
+        self.dirs = {"": []}      # dir -> sorted [(name, is_dir)]
+        self.files = []           # relative posix paths, sorted
+        self.skipped = 0          # binary files left out
+        self.truncated = False
+        stack = [""]
+        while stack and not self.truncated:
+            rel = stack.pop()
+            entries = []
+            try:
+                with os.scandir(self.root / rel if rel else self.root) as it:
+                    for e in it:
+                        try:
+                            is_dir = e.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if is_dir:
+                            if e.name not in PRUNE_DIRS:
+                                entries.append((e.name, True))
+                        elif os.path.splitext(e.name)[1].lower() in BINARY_EXTS:
+                            self.skipped += 1
+                        else:
+                            entries.append((e.name, False))
+            except OSError:
+                pass
+            # directories first, then files, each by name
+            entries.sort(key=lambda x: (not x[1], x[0].lower()))
+            self.dirs[rel] = entries
+            for name, is_dir in entries:
+                path = f"{rel}/{name}" if rel else name
+                if is_dir:
+                    stack.append(path)
+                else:
+                    self.files.append(path)
+                    if len(self.files) >= max_items:
+                        self.truncated = True
+                        break
+        self.files.sort()
+        self.folders = sorted(self.dirs)  # "" (root) first
+        self.lower = [f.lower() for f in self.files]
+        self.grams = {}           # trigram -> [file index], ascending
+        for i, f in enumerate(self.lower):
+            for g in _trigrams(f):
+                self.grams.setdefault(g, []).append(i)
+
+    def __len__(self):
+        return len(self.files)
+
+    def children(self, rel=""):
+        """[(name, is_dir)] directly under `rel` ("" = repo root)."""
+        return self.dirs.get(rel.strip("/"), [])
+
+    def filter(self, query, limit=None):
+        """Paths containing `query` (case-insensitive), in path order."""
+        q = query.lower()
+        if not q:
+            hits = range(len(self.files))
+        elif len(q) < 3:
+            hits = (i for i, f in enumerate(self.lower) if q in f)
+        else:
+            # candidates must contain every trigram of the query; verify the substring
+            lists = sorted((self.grams.get(g, []) for g in _trigrams(q)), key=len)
+            cand = set(lists[0])
+            for lst in lists[1:]:
+                cand.intersection_update(lst)
+                if not cand:
+                    break
+            hits = (i for i in sorted(cand) if q in self.lower[i])
+        out = []
+        for i in hits:
+            out.append(self.files[i])
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+# ---------- Per-commit cache ----------
+
+class TreeCache:
+    """LRU of FileTrees keyed by (repo path, HEAD sha); non-git dirs key on the root mtime."""
+
+    def __init__(self, max_trees=8):
+        self.max_trees = max_trees
+        self.trees = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, root: Path) -> FileTree:
+        root = Path(root).resolve()
+        version = (is_git_repo(root) and head_commit(root)) or root.stat().st_mtime_ns
+        key = (str(root), version)
+        with self.lock:
+            tree = self.trees.get(key)
+            if tree is not None:
+                self.trees.move_to_end(key)
+                return tree
+        tree = FileTree(root)
+        with self.lock:
+            for k in [k for k in self.trees if k[0] == key[0]]:
+                del self.trees[k]  # older commit of the same repo
+            self.trees[key] = tree
+            while len(self.trees) > self.max_trees:
+                self.trees.popitem(last=False)
+        return tree
+
+    def forget(self, root: Path):
+        root = str(Path(root).resolve())
+        with self.lock:
+            for k in [k for k in self.trees if k[0] == root]:
+                del self.trees[k]
+
+tree_cache = TreeCache()
+
+def get_tree(root: Path) -> FileTree:
+    return tree_cache.get(root)
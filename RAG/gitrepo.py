@@ -0,0 +1,90 @@
+import os, time, subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from RAG.tracing import span
+
+# Cloning and refreshing repos for indexing. Indexing only needs the files of
+# HEAD, so clones can be shallow (--depth), partial (--filter=blob:none: blobs
+# are fetched on checkout, not for the whole history) and sparse (only the
+# file types that get indexed are checked out). Existing clones are refreshed
+# with fetch + fast-forward instead of being deleted and cloned again.
+
+CLONE_WORKERS = 4
+GIT_TIMEOUT = 600  # seconds per git command
+
+def _run(args, cwd=None):
+    return subprocess.check_output(["git", *args], cwd=cwd, stderr=subprocess.STDOUT, timeout=GIT_TIMEOUT,
+                                   env={**os.environ, "GIT_TERMINAL_PROMPT": "0"})
+
+def _error(e):
+    out = getattr(e, "output", None)
+    return out.decode("utf-8", errors="ignore") if out else str(e)
+
+def sparse_patterns(exts):
+    """Non-cone sparse-checkout patterns for files ending in any of `exts` (".py" -> "*.py")."""
+    return [f"*{e}" for e in exts]
+
+# ---------- Cloning ----------
+
+def clone_repo(repo_url: str, dest: Path, depth=None, partial=False, sparse=None, branch=None):
+    """Clone `repo_url` into `dest`.
+
+    depth: shallow clone of the last `depth` commits; partial: --filter=blob:none;
+    sparse: list of extensions to check out (everything else stays out of the worktree).
+    """
+    dest = Path(dest)
+    dest_str = str(dest)
+    if dest.exists():
+        return {"status":"exists", "path": dest_str}
+    args = ["clone", "--quiet"]
+    if depth:
+        args += ["--depth", str(depth)]
+    if partial:
+        args += ["--filter=blob:none"]
+    if branch:
+        args += ["--branch", branch]
+    if sparse:
+        args += ["--no-checkout"]
+    t0 = time.perf_counter()
+    try:
+        with span("clone"):
+            _run([*args, repo_url, dest_str])
+            if sparse:
+                _run(["sparse-checkout", "set", "--no-cone", *sparse_patterns(sparse)], cwd=dest_str)
+                _run(["checkout", "--quiet"], cwd=dest_str)
+        return {"status":"cloned", "path": dest_str, "seconds": round(time.perf_counter() - t0, 3)}
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        return {"status":"error", "output": _error(e)}
+
+def update_repo(dest: Path):
+    """Fetch the upstream branch and fast-forward to it (no merge commits, local edits kept).
+
+    A shallow clone fetches just the new commits down to its shallow boundary.
+    """
+    dest_str = str(dest)
+    if not (Path(dest) / ".git").exists():
+        return {"status": "error", "output": f"{dest_str} is not a git clone"}
+    try:
+        with span("update"):
+            old = _run(["rev-parse", "HEAD"], cwd=dest_str).decode().strip()
+            _run(["fetch", "--quiet", "origin"], cwd=dest_str)
+            _run(["merge", "--ff-only", "--quiet", "@{upstream}"], cwd=dest_str)
+            new = _run(["rev-parse", "HEAD"], cwd=dest_str).decode().strip()
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        return {"status": "error", "output": _error(e)}
+    return {"status": "updated" if new != old else "up-to-date", "path": dest_str, "old": old, "new": new}
+
+def clone_or_update(repo_url: str, dest: Path, **options):
+    if Path(dest).exists():
+        return update_repo(dest)
+    return clone_repo(repo_url, dest, **options)
+
+def clone_many(jobs, workers=CLONE_WORKERS, **options):
+    """Clone (or update) [(repo_url, dest)] with at most `workers` git processes; results in input order."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(lambda j: clone_or_update(j[0], j[1], **options), jobs))
+
+def repo_name_from_url(repo_url: str):
+    name = repo_url.rstrip("/").split("/")[-1] if repo_url else ""
+    return name[:-4] if name.endswith(".git") else name
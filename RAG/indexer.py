@@ -0,0 +1,317 @@
+import os, json, struct, time, contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+
+# Optional imports (used if available, imported on first use)
+from RAG.optional import lazy, HAS_FAISS
+faiss = lazy("faiss")
+
+from RAG.store import index_paths, index_cache, MetaStore
+from RAG.textreader import read_text_file, ReadReport
+from RAG.tracing import span, count
+from RAG.chunker import chunk_file, CHUNKER_VERSION
+from RAG.filereader import DOC_EXTS, extract_many
+from RAG.lexical import LexicalIndex, LexicalIndexBuilder
+from RAG.vectorindex import normalize, resolve_config, build_faiss_index, update_faiss_index, DEFAULT_CONFIG
+from RAG.manifest import (list_blobs, load_manifest, save_manifest, empty_manifest,
+                          diff_manifest, stale_ids, allocate_ids, head_commit)
+
+# Streaming indexer: files are read by a small thread pool, chunked, embedded
+# in fixed-size batches and every batch (L2-normalised) goes straight to the
+# on-disk vector file; the FAISS index is then built from that file in slices.
+# The BM25 postings (RAG/lexical.py) are collected in the same pass. Only
+# `batch_size` chunk texts (plus a few files read ahead) are ever held in
+# memory, whatever the size of the repo.
+# Text files go through RAG/textreader.py: binary, minified, generated, excluded
+# and oversized files are skipped, and at most a prefix of each file is read.
+# Documents (PDF, DOCX, PPTX, tables) are extracted in a process pool by
+# RAG/filereader.py and chunked page by page.
+# Every stage runs in a RAG/tracing.py span ("scan", "read", "chunk", "embed",
+# "faiss_build", "store"), with counters for bytes, files, chunks and batches.
+
+PATTERNS = [".py", ".md", ".txt", ".json", ".js", ".html"] + DOC_EXTS
+BATCH_SIZE = 256
+READ_WORKERS = 8
+COPY_ROWS = 65536     # rows copied per slice when carrying over old vectors
+NPY_HEADER = 128      # bytes reserved for the .npy header, written once the row count is known
+
+# ---------- Stored index ----------
+
+def load_stored_index(index_dir: Path, name: str):
+    """Open what the previous build kept: vectors (memory-mapped), chunk ids and metadata store."""
+    paths = index_paths(index_dir, name)
+    if not all(paths[p].exists() for p in ("embs", "ids", "meta", "lexical", "status")):
+        return None, None, None
+    status = json.loads(paths["status"].read_text(encoding="utf-8"))
+    if not status.get("normalized") or status.get("chunker") != CHUNKER_VERSION:
+        return None, None, None  # built by an older pipeline: start over
+    emba = np.load(str(paths["embs"]), mmap_mode="r")
+    ids = np.load(str(paths["ids"]))
+    metas = MetaStore(paths["meta"])
+    if len(emba) != len(ids) or len(ids) != len(metas):
+        metas.close()
+        return None, None, None
+    return emba, ids, metas
+
+def _write_npy_header(fh, shape):
+    header = "{'descr': '<f4', 'fortran_order': False, 'shape': %r, }" % (tuple(shape),)
+    header = header.ljust(NPY_HEADER - 10 - 1) + "\n"
+    fh.seek(0)
+    fh.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
+
+# ---------- Pipeline stages ----------
+
+def bounded_map(fn, items, workers, window=None):
+    """Like ThreadPoolExecutor.map, but with at most `window` results in flight.
+
+    Each call runs in a copy of the caller's context, so spans recorded by the
+    workers land in the caller's trace run.
+    """
+    window = window or workers * 2
+    with ThreadPoolExecutor(workers) as ex:
+        pending = deque()
+        for item in items:
+            pending.append(ex.submit(contextvars.copy_context().run, fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _doc_chunks(rel, units):
+    for label, text in units:
+        with span("chunk"):
+            chunks = chunk_file(rel, text)
+        for c in chunks:
+            c["page"] = label
+            yield c
+
+def iter_file_chunks(repo_path: Path, rels, workers=READ_WORKERS, progress=None, extract_cache=None, errors=None,
+                     report=None):
+    """Yield (rel, chunks) per file, reading ahead on a thread pool.
+
+    Text files come first with a list of chunks; documents follow as they are
+    extracted, with a generator of chunks that must be consumed before the next file.
+    """
+    docs = {str(repo_path / rel): rel for rel in rels if Path(rel).suffix.lower() in DOC_EXTS}
+    texts = [rel for rel in rels if str(repo_path / rel) not in docs]
+    read = lambda rel: (rel, read_text_file(repo_path / rel, report=report))
+    n = 0
+    for rel, txt in bounded_map(read, texts, workers):
+        if not txt.strip():
+            count("files_empty")
+            yield rel, []
+        else:
+            with span("chunk"):
+                chunks = chunk_file(rel, txt)
+            count("chunks", len(chunks))
+            yield rel, chunks
+        n += 1
+        if progress:
+            progress("read", n, len(rels))
+    for path, units in extract_many(list(docs), cache_dir=extract_cache, errors=errors):
+        yield docs[path], _doc_chunks(docs[path], units)
+        n += 1
+        if progress:
+            progress("read", n, len(rels))
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# ---------- Build ----------
+
+def _updated_faiss_index(paths, status, cfg, keep, new_vectors):
+    """The previous FAISS index with stale rows dropped and `new_vectors` added, or None to rebuild."""
+    if not paths["faiss"].exists() or status.get("faiss_params") != cfg:
+        return None  # another config, or one resized for the new corpus (IVF nlist)
+    index = faiss.read_index(str(paths["faiss"]))
+    if index.ntotal != len(keep) or not update_faiss_index(index, cfg, keep, new_vectors):
+        return None
+    return index
+
+def _manifest_matches(manifest, ids):
+    """True if `manifest` lists exactly the chunk ids stored (a missing or corrupt one lists none)."""
+    known = np.fromiter((i for f in manifest["files"].values() for i in f["ids"]), dtype=np.int64)
+    return len(known) == len(ids) and bool(np.isin(ids, known).all()) and manifest["next_id"] > ids.max(initial=-1)
+
+def build_index(repo_path, name, index_dir, provider, cache=None, full_rebuild=False,
+                patterns=PATTERNS, batch_size=BATCH_SIZE, read_workers=READ_WORKERS,
+                use_faiss=HAS_FAISS, index_config=DEFAULT_CONFIG, progress=None, extract_cache=None, exclude=()):
+    """(Re)build the index of `repo_path`, embedding only files changed since the last build.
+
+    `progress(stage, done, total)` is called for the "scan", "read", "embed",
+    "index" and "store" stages (`total` is None when it is not known up front).
+    `index_config` names one of vectorindex.INDEX_CONFIGS for the FAISS index.
+    `extract_cache` is the directory for cached document extractions (None: not kept).
+    `exclude` adds gitignore-style patterns to textreader.EXCLUDE. The summary's
+    "read" has the files and bytes read and skipped (by reason).
+
+    The previous FAISS index is updated instead of rebuilt when its config
+    still applies and it allows it (see vectorindex.update_faiss_index): flat
+    and SQ indexes always, HNSW and IVF only when no rows were dropped (files
+    were only added). Otherwise, and on a full rebuild, every vector is
+    re-inserted into a new index. summary["faiss_incremental"] says which.
+    Returns a summary dict.
+    """
+    progress = progress or (lambda stage, done, total: None)
+    repo_path = Path(repo_path)
+    paths = index_paths(index_dir, name)
+    dim = provider.dim
+
+    # a full rebuild must not carry over any stored vector: the manifest and
+    # the vector file are only ever reused together
+    old = old_ids = old_metas = None
+    if not full_rebuild:
+        manifest = load_manifest(paths["manifest"])
+        with span("load_previous"):
+            old, old_ids, old_metas = load_stored_index(index_dir, name)
+    if old is not None and (old.shape[1] != dim or not _manifest_matches(manifest, old_ids)):
+        old_metas.close()
+        old = old_metas = None
+    if old is None:
+        # nothing reusable on disk (or a different model, no manifest matching the vectors, or asked to): start over
+        manifest = empty_manifest()
+        old_ids = np.zeros(0, dtype=np.int64)
+    report = ReadReport()
+    with span("scan"):
+        blobs = list_blobs(repo_path, patterns, exclude, report)
+    count("files_scanned", len(blobs))
+    added, changed, removed = diff_manifest(manifest, blobs)
+    progress("scan", len(blobs), len(blobs))
+    summary = {"repo": name, "added": len(added), "changed": len(changed), "removed": len(removed),
+               "unchanged": len(blobs) - len(added) - len(changed), "embedded": 0}
+    status = json.loads(paths["status"].read_text(encoding="utf-8")) if paths["status"].exists() else {}
+    faiss_current = paths["faiss"].exists() and status.get("index_config") == index_config
+    if not (added or changed or removed) and (faiss_current or not use_faiss):
+        if old_metas is not None:
+            old_metas.close()
+        summary.update(status="up-to-date", chunks=len(old_ids), read=report.to_dict())
+        return summary
+
+    # scratch files, swapped in at the end: a cancelled or failed build leaves none behind
+    tmp_meta = Path(str(paths["meta"]) + ".tmp")
+    tmp_embs = Path(str(paths["embs"]) + ".tmp")
+    tmp_lexical = Path(str(paths["lexical"]) + ".tmp")
+    metas = None
+    try:
+        # drop vectors of changed/removed files, keep the rest
+        keep = ~np.isin(old_ids, stale_ids(manifest, changed + removed))
+        kept_rows = int(keep.sum())
+        ids = [old_ids[keep]]
+        metas = MetaStore(tmp_meta, create=True)
+        lexical = LexicalIndexBuilder()
+        if old_metas is not None:
+            kept = (m for m, k in zip(old_metas.iter_metas(), keep) if k)
+            for n, part in enumerate(batched(kept, COPY_ROWS)):
+                metas.add(n * COPY_ROWS, part)
+            old_metas.close()
+            lexical.add_kept(LexicalIndex.load(paths["lexical"]), keep)
+        for path in removed:
+            manifest["files"].pop(path, None)
+
+        errors = []  # documents that could not be extracted
+        rows = 0
+        embed_seconds = 0.0
+        with open(tmp_embs, "wb") as fh:
+            fh.seek(NPY_HEADER)
+            # kept rows first, copied in slices so the old matrix is never loaded whole
+            if old is not None:
+                for s in range(0, len(old), COPY_ROWS):
+                    part = np.ascontiguousarray(old[s:s + COPY_ROWS][keep[s:s + COPY_ROWS]], dtype=np.float32)
+                    fh.write(part.tobytes())
+                    rows += len(part)
+            del old
+
+            def chunk_items():
+                for rel, chunks in iter_file_chunks(repo_path, added + changed, read_workers, progress,
+                                                    extract_cache, errors, report):
+                    entry = manifest["files"][rel] = {"sha": blobs[rel], "ids": []}
+                    for i, c in enumerate(chunks):
+                        cid = allocate_ids(manifest, 1)[0]
+                        entry["ids"].append(cid)
+                        meta = {"id": cid, "file": rel, "chunk_index": i, "repo": name,
+                                "start_line": c["start_line"], "end_line": c["end_line"]}
+                        for k in ("section", "page"):
+                            if k in c:
+                                meta[k] = c[k]
+                        yield c["text"], meta
+
+            for batch in batched(chunk_items(), batch_size):
+                hits = cache.hits if cache is not None else 0
+                t0 = time.perf_counter()
+                with span("embed"):
+                    vecs = np.ascontiguousarray(normalize(provider.embed([c for c, _ in batch], cache=cache)))
+                embed_seconds += time.perf_counter() - t0
+                count("embed_batches")
+                count("embed_texts", len(batch))
+                if cache is not None:
+                    count("embed_cache_hits", cache.hits - hits)
+                fh.write(vecs.tobytes())
+                metas.add(rows, [m for _, m in batch])
+                with span("lexical"):
+                    for j, (c, _) in enumerate(batch):
+                        lexical.add(rows + j, c)
+                ids.append(np.array([m["id"] for _, m in batch], dtype=np.int64))
+                rows += len(batch)
+                summary["embedded"] += len(batch)
+                progress("embed", summary["embedded"], None)
+            _write_npy_header(fh, (rows, dim))
+
+        # vectors, ids and metadata are always kept so later builds can be incremental
+        # the FAISS index is built from the finished vector file: IVF/PQ/SQ configs
+        # need the whole corpus (or a sample of it) for training before any add
+        index = cfg = None
+        incremental = False
+        if use_faiss:
+            progress("index", 0, 1)
+            vectors = np.load(str(tmp_embs), mmap_mode="r")
+            cfg = resolve_config(index_config, rows, dim)
+            with span("faiss_build"):
+                if len(keep):
+                    index = _updated_faiss_index(paths, status, cfg, keep, vectors[kept_rows:])
+                    incremental = index is not None
+                if index is None:
+                    index = build_faiss_index(cfg, vectors)
+            del vectors
+            progress("index", 1, 1)
+
+        progress("store", 0, 1)
+        with span("store"):
+            metas.commit()
+            metas.close()
+            index_cache.forget(index_dir, name)
+            os.replace(tmp_embs, paths["embs"])
+            os.replace(tmp_meta, paths["meta"])
+            lexical.save(tmp_lexical)
+            os.replace(tmp_lexical, paths["lexical"])
+            np.save(str(paths["ids"]), np.concatenate(ids))
+            if index is not None:
+                faiss.write_index(index, str(paths["faiss"]))
+            manifest["commit"] = head_commit(repo_path)
+            save_manifest(paths["manifest"], manifest)
+            with open(paths["status"], "w", encoding="utf-8") as fh:
+                json.dump({"repo": name, "chunks": rows, "dim": dim, "normalized": True, "chunker": CHUNKER_VERSION,
+                           "index_config": index_config if use_faiss else None, "faiss_params": cfg,
+                           "vector_bytes": paths["embs"].stat().st_size,
+                           "lexical_bytes": paths["lexical"].stat().st_size,
+                           "commit": manifest["commit"], "files": len(manifest["files"])}, fh)
+        progress("store", 1, 1)
+    finally:
+        for store in (metas, old_metas):
+            if store is not None:
+                store.close()
+        for tmp in (tmp_meta, tmp_embs, tmp_lexical):
+            tmp.unlink(missing_ok=True)
+    summary.update(status="built", chunks=rows, extract_errors=len(errors), faiss=index is not None,
+                   faiss_incremental=incremental, read=report.to_dict(),
+                   embed_seconds=round(embed_seconds, 3),
+                   chunks_per_sec=round(summary["embedded"] / embed_seconds, 1) if embed_seconds else None)
+    return summary
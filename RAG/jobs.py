@@ -0,0 +1,184 @@
+import os, json, time, uuid, socket, sqlite3, threading, traceback
+from contextlib import contextmanager
+from pathlib import Path
+
+# Persistent background job queue backed by SQLite.
+#
+# Jobs survive page reloads and restarts: a job left "running" by a process
+# that no longer exists is put back in the queue when the next queue starts.
+# Several processes (the Streamlit app and a headless service) may share one
+# queue file; claiming a job is a single atomic UPDATE. At most one job per
+# repo runs at a time, and each process runs at most `workers` jobs.
+
+POLL_SECONDS = 1.0
+PROGRESS_EVERY = 0.5   # seconds between progress writes / cancel checks
+
+STATUSES = ("queued", "running", "cancelling", "done", "failed", "cancelled")
+
+class JobCancelled(Exception):
+    pass
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, kind TEXT, repo TEXT, params TEXT, status TEXT,
+    progress TEXT, result TEXT, error TEXT, owner TEXT,
+    created REAL, started REAL, finished REAL)
+"""
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _alive(owner):
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname():
+        return True  # can't tell for another machine: leave it alone
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+
+def _row(r):
+    job = dict(r)
+    for k in ("params", "progress", "result"):
+        job[k] = json.loads(job[k]) if job[k] else None
+    return job
+
+class JobQueue:
+    def __init__(self, db_path: Path, runners, workers=2):
+        """`runners` maps a job kind to fn(params, progress) -> result dict.
+
+        `progress(stage, done, total)` raises JobCancelled once the job is cancelled.
+        """
+        self.db_path = Path(db_path)
+        self.runners = runners
+        self.workers = workers
+        self.owner = _owner()
+        self.threads = []
+        self.stopping = threading.Event()
+        self.wakeup = threading.Event()
+        with self._conn() as c:
+            c.execute(_SCHEMA)
+        self._requeue_orphans()
+
+    @contextmanager
+    def _conn(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _update(self, job_id, **fields):
+        for k in ("progress", "result"):
+            if k in fields:
+                fields[k] = json.dumps(fields[k])
+        sets = ", ".join(f"{k} = ?" for k in fields)
+        with self._conn() as c:
+            c.execute(f"UPDATE jobs SET {sets} WHERE id = ?", [*fields.values(), job_id])
+
+    def _requeue_orphans(self):
+        with self._conn() as c:
+            rows = c.execute("SELECT id, owner, status FROM jobs WHERE status IN ('running', 'cancelling')").fetchall()
+            for r in rows:
+                if not _alive(r["owner"]):
+                    new = "queued" if r["status"] == "running" else "cancelled"
+                    c.execute("UPDATE jobs SET status = ?, owner = NULL WHERE id = ?", (new, r["id"]))
+
+    # ---------- API ----------
+
+    def submit(self, kind, repo, params=None):
+        if kind not in self.runners:
+            raise ValueError(f"unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex[:12]
+        with self._conn() as c:
+            c.execute("INSERT INTO jobs (id, kind, repo, params, status, created) VALUES (?,?,?,?,?,?)",
+                      (job_id, kind, repo, json.dumps(params or {}), "queued", time.time()))
+        self.wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        with self._conn() as c:
+            r = c.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row(r) if r else None
+
+    def list(self, repo=None, limit=50):
+        q, args = "SELECT * FROM jobs", []
+        if repo:
+            q, args = q + " WHERE repo = ?", [repo]
+        with self._conn() as c:
+            rows = c.execute(q + " ORDER BY created DESC LIMIT ?", [*args, limit]).fetchall()
+        return [_row(r) for r in rows]
+
+    def cancel(self, job_id):
+        """Cancel a queued job now, or ask a running one to stop. False if already finished."""
+        with self._conn() as c:
+            cur = c.execute("UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status = 'queued'",
+                            (time.time(), job_id))
+            if cur.rowcount:
+                return True
+            cur = c.execute("UPDATE jobs SET status = 'cancelling' WHERE id = ? AND status = 'running'", (job_id,))
+            return cur.rowcount > 0
+
+    # ---------- Workers ----------
+
+    def start(self):
+        if self.threads:
+            return self
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self.threads.append(t)
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+
+    def _claim(self):
+        with self._conn() as c:
+            c.execute("BEGIN IMMEDIATE")
+            r = c.execute("""SELECT * FROM jobs WHERE status = 'queued' AND repo NOT IN
+                             (SELECT repo FROM jobs WHERE status IN ('running', 'cancelling'))
+                             ORDER BY created LIMIT 1""").fetchone()
+            if r is not None:
+                c.execute("UPDATE jobs SET status = 'running', owner = ?, started = ? WHERE id = ?",
+                          (self.owner, time.time(), r["id"]))
+            c.execute("COMMIT")
+        return _row(r) if r else None
+
+    def _work(self):
+        while not self.stopping.is_set():
+            job = self._claim()
+            if job is None:
+                self.wakeup.wait(POLL_SECONDS)
+                self.wakeup.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        job_id = job["id"]
+        last = [0.0]
+
+        def progress(stage, done, total):
+            now = time.monotonic()
+            if now - last[0] < PROGRESS_EVERY and (total is None or done < total):
+                return
+            last[0] = now
+            with self._conn() as c:
+                status = c.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            if status == "cancelling":
+                raise JobCancelled()
+            self._update(job_id, progress={"stage": stage, "done": done, "total": total})
+
+        try:
+            result = self.runners[job["kind"]](job["params"], progress)
+            self._update(job_id, status="done", result=result, finished=time.time())
+        except JobCancelled:
+            self._update(job_id, status="cancelled", finished=time.time())
+        except Exception as e:
+            self._update(job_id, status="failed", error=f"{e}\n{traceback.format_exc(limit=5)}",
+                         finished=time.time())
@@ -0,0 +1,179 @@
+import re
+from array import array
+from collections import Counter
+from pathlib import Path
+import numpy as np
+
+# BM25 inverted index over code identifiers, built in the same pass as the
+# embeddings and addressed by the same chunk rows.
+#
+# Stored as {name}_bm25.npz:
+#   vocab     "\n"-joined sorted terms (utf-8 bytes)
+#   df        uint32, documents per term
+#   post_off  int64, byte offset of each term's postings (len = terms + 1)
+#   postings  uint8, row gaps (delta-encoded) as LEB128 varints
+#   tfs       uint16, term frequency per posting, in posting order
+#   doclen    uint32, tokens per row
+
+K1 = 1.2
+B = 0.75
+RRF_K = 60
+
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+def tokenize(text: str):
+    """Identifiers lowercased, plus their snake_case / camelCase parts.
+
+    `clone_repo` -> clone_repo, clone, repo; `buildFileTree` -> buildfiletree, build, file, tree
+    """
+    out = []
+    for ident in _IDENT.findall(text):
+        low = ident.lower()
+        if len(low) > 1:
+            out.append(low)
+        parts = [p.lower() for piece in ident.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            out.extend(p for p in parts if len(p) > 1)
+    return out
+
+# ---------- Varints ----------
+
+def varint_encode(values):
+    """LEB128-encode non-negative ints: (bytes as uint8 array, bytes used per value)."""
+    v = np.asarray(values, dtype=np.uint64)
+    nbytes = 1 + sum((v >= (1 << (7 * i))).astype(np.int64) for i in range(1, 5))
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    starts = np.cumsum(nbytes) - nbytes
+    for b in range(5):
+        mask = nbytes > b
+        byte = ((v[mask] >> np.uint64(7 * b)) & np.uint64(0x7F)).astype(np.uint8)
+        more = (nbytes[mask] > b + 1).astype(np.uint8) << 7
+        out[starts[mask] + b] = byte | more
+    return out, nbytes
+
+def varint_decode(buf):
+    b = np.asarray(buf, dtype=np.uint8)
+    if len(b) == 0:
+        return np.zeros(0, dtype=np.int64)
+    last = (b & 0x80) == 0
+    value_of = np.concatenate(([0], np.cumsum(last)[:-1]))      # which value each byte belongs to
+    first = np.flatnonzero(np.concatenate(([True], last[:-1])))   # first byte of each value
+    shift = np.arange(len(b)) - first[value_of]
+    parts = (b & 0x7F).astype(np.float64) * np.exp2(7 * shift)
+    return np.bincount(value_of, weights=parts).astype(np.int64)
+
+# ---------- Index ----------
+
+class LexicalIndex:
+    def __init__(self, vocab, df, post_off, postings, tfs, doclen):
+        self.terms = vocab
+        self.term_ids = {t: i for i, t in enumerate(vocab)}
+        self.df = df
+        self.post_off = post_off
+        self.postings = postings
+        self.tfs = tfs
+        self.tf_off = np.concatenate(([0], np.cumsum(df, dtype=np.int64)))
+        self.doclen = doclen
+        self.avgdl = float(doclen.mean()) if len(doclen) else 0.0
+
+    @classmethod
+    def load(cls, path: Path):
+        z = np.load(str(path))
+        vocab = bytes(z["vocab"]).decode("utf-8").split("\n") if len(z["vocab"]) else []
+        return cls(vocab, z["df"], z["post_off"], z["postings"], z["tfs"], z["doclen"])
+
+    def __len__(self):
+        return len(self.doclen)
+
+    def postings_of(self, term_id):
+        """(rows, tfs) of one term."""
+        rows = np.cumsum(varint_decode(self.postings[self.post_off[term_id]:self.post_off[term_id + 1]]))
+        return rows, self.tfs[self.tf_off[term_id]:self.tf_off[term_id + 1]]
+
+    def search(self, query: str, k=5):
+        """BM25 top-k for `query`: list of (row, score)."""
+        n = len(self.doclen)
+        rows_all, scores_all = [], []
+        for term in set(tokenize(query)):
+            tid = self.term_ids.get(term)
+            if tid is None:
+                continue
+            rows, tfs = self.postings_of(tid)
+            df = len(rows)
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            tf = tfs.astype(np.float32)
+            norm = K1 * (1 - B + B * self.doclen[rows] / self.avgdl)
+            rows_all.append(rows)
+            scores_all.append(idf * tf * (K1 + 1) / (tf + norm))
+        if not rows_all:
+            return []
+        rows, inv = np.unique(np.concatenate(rows_all), return_inverse=True)
+        scores = np.bincount(inv, weights=np.concatenate(scores_all))
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.df, self.post_off, self.postings, self.tfs, self.doclen))
+
+class LexicalIndexBuilder:
+    """Accumulates postings row by row (rows must be added in increasing order)."""
+
+    def __init__(self):
+        self.postings = {}   # term -> (array of rows, array of tfs)
+        self.doclen = array("I")
+
+    def _post(self, term, row, tf):
+        entry = self.postings.get(term)
+        if entry is None:
+            entry = self.postings[term] = (array("I"), array("H"))
+        entry[0].append(row)
+        entry[1].append(min(tf, 65535))
+
+    def add_kept(self, old: LexicalIndex, keep):
+        """Carry over the rows of `old` where `keep` is True, renumbered from 0."""
+        new_row = np.cumsum(keep) - 1
+        for tid, term in enumerate(old.terms):
+            rows, tfs = old.postings_of(tid)
+            mask = keep[rows]
+            if mask.any():
+                entry = self.postings.setdefault(term, (array("I"), array("H")))
+                entry[0].extend(new_row[rows[mask]].astype(np.uint32))
+                entry[1].extend(tfs[mask])
+        self.doclen.extend(old.doclen[keep])
+
+    def add(self, row, text):
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self._post(term, row, tf)
+        self.doclen.append(len(tokens))
+
+    def save(self, path: Path):
+        terms = sorted(self.postings)
+        df = np.array([len(self.postings[t][0]) for t in terms], dtype=np.uint32)
+        rows = np.concatenate([np.frombuffer(self.postings[t][0], dtype=np.uint32) for t in terms]).astype(np.int64) \
+            if terms else np.zeros(0, dtype=np.int64)
+        tfs = np.concatenate([np.frombuffer(self.postings[t][1], dtype=np.uint16) for t in terms]) \
+            if terms else np.zeros(0, dtype=np.uint16)
+        # gaps within each term's list; the first posting of a term keeps its row
+        term_start = np.concatenate(([0], np.cumsum(df, dtype=np.int64)[:-1])) if terms else np.zeros(0, np.int64)
+        gaps = np.diff(rows, prepend=0)
+        gaps[term_start] = rows[term_start]
+        postings, nbytes = varint_encode(gaps)
+        byte_end = np.cumsum(nbytes)
+        post_off = np.concatenate(([0], byte_end[np.cumsum(df, dtype=np.int64) - 1] if terms else []))
+        with open(path, "wb") as fh:
+            np.savez(fh, vocab=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+                     df=df, post_off=post_off.astype(np.int64), postings=postings, tfs=tfs,
+                     doclen=np.frombuffer(self.doclen, dtype=np.uint32))
+
+# ---------- Fusion ----------
+
+def rrf(*ranked, k=RRF_K):
+    """Reciprocal rank fusion of ranked [(row, score), ...] lists: [(row, fused score), ...]."""
+    fused = {}
+    for hits in ranked:
+        for rank, (row, _) in enumerate(hits):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda x: -x[1])
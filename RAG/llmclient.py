@@ -0,0 +1,216 @@
+import os, json, time, hashlib, threading
+from collections import Counter
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared client for an Ollama-compatible server. One client per endpoint is
+# used by every Streamlit session and service thread, so:
+#  * requests go over a keep-alive connection pool instead of a new TCP
+#    connection per prompt;
+#  * the model list (/api/tags) is cached for MODELS_TTL seconds, and so is
+#    a failure to get it (no connect timeout on every Streamlit rerun);
+#  * identical concurrent prompts are coalesced: one request streams from the
+#    server on a producer thread and every caller with the same body replays
+#    its pieces as they arrive (late joiners get the earlier pieces at once).
+#    The producer stops early if every caller stops reading;
+#  * a request that cannot connect (server restarting, stale pooled
+#    connection) is retried RETRIES times with backoff, as long as no piece
+#    has been streamed yet.
+# Streamlit runs each session's script on its own thread, so this is plain
+# threads + requests rather than asyncio.
+
+OLLAMA_URL = os.environ.get("REPOMIND_OLLAMA_URL", "http://localhost:11434")
+DEFAULT_LLM = os.environ.get("REPOMIND_LLM", "llama3")
+REQUEST_TIMEOUT = (5, 300)
+TAGS_TIMEOUT = (2, 5)
+POOL_SIZE = 16       # keep-alive connections per endpoint
+MODELS_TTL = 30.0    # seconds the model list is reused
+UI_INTERVAL = 0.1    # seconds between UI redraws while streaming (see throttle)
+RETRIES = 2          # reconnects before the first piece
+RETRY_BACKOFF = 0.25 # seconds before the first retry, doubled after each
+
+class _Flight:
+    """One in-progress generation and the pieces it has produced so far."""
+
+    def __init__(self):
+        self.pieces = []
+        self.stats = {}
+        self.done = False
+        self.error = None
+        self.readers = 0
+        self.cond = threading.Condition()
+
+    def push(self, piece):
+        with self.cond:
+            self.pieces.append(piece)
+            self.cond.notify_all()
+
+    def finish(self, error=None):
+        with self.cond:
+            self.done, self.error = True, error
+            self.cond.notify_all()
+
+    def read(self, stats, t0):
+        """Yield every piece (from the first), blocking until the flight is done; times are from t0."""
+        i = 0
+        try:
+            while True:
+                with self.cond:
+                    while i == len(self.pieces) and not self.done:
+                        self.cond.wait()
+                    new, done, error = self.pieces[i:], self.done, self.error
+                if new and "ttft" not in stats:
+                    stats["ttft"] = round(time.perf_counter() - t0, 3)
+                for p in new:
+                    stats["pieces"] = stats.get("pieces", 0) + 1
+                    yield p
+                i += len(new)
+                if done and i == len(self.pieces):
+                    if error is not None:
+                        raise error
+                    break
+            stats.update((k, v) for k, v in self.stats.items() if k in ("prompt_tokens", "completion_tokens"))
+            stats["seconds"] = round(time.perf_counter() - t0, 3)
+        finally:
+            with self.cond:
+                self.readers -= 1
+
+class LLMClient:
+    def __init__(self, url=OLLAMA_URL, pool_size=POOL_SIZE, models_ttl=MODELS_TTL, coalesce=True, retries=RETRIES):
+        self.url = url.rstrip("/")
+        self.models_ttl = models_ttl
+        self.coalesce = coalesce
+        self.retries = retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.counts = Counter()   # requests, coalesced, retries, model_list_hits, model_list_fetches
+        self._models = (0.0, None)
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    # ---------- Models ----------
+
+    def models(self, refresh=False):
+        """Names of the server's models, cached for models_ttl seconds; [] if unreachable (cached as long)."""
+        fetched, names = self._models
+        if names is not None and not refresh and time.monotonic() - fetched < self.models_ttl:
+            self.counts["model_list_hits"] += 1
+            return list(names)
+        self.counts["model_list_fetches"] += 1
+        try:
+            resp = self.session.get(f"{self.url}/api/tags", timeout=TAGS_TIMEOUT)
+            resp.raise_for_status()
+            names = [m.get("name") or m.get("model") for m in resp.json().get("models", [])]
+        except (requests.RequestException, ValueError):
+            names = []
+        self._models = (time.monotonic(), names)
+        return list(names)
+
+    # ---------- Streaming ----------
+
+    def chat(self, messages, model=DEFAULT_LLM, stats=None, options=None):
+        """Yield reply text from /api/chat. `stats` gets ttft, seconds, pieces, token counts and coalesced."""
+        body = {"model": model, "messages": messages, "stream": True}
+        if options:
+            body["options"] = options
+        return self._stream("/api/chat", body, stats, lambda d: d.get("message", {}).get("content", ""))
+
+    def generate(self, prompt, model=DEFAULT_LLM, stats=None, options=None):
+        """Yield completion text from /api/generate (same stats as chat)."""
+        body = {"model": model, "prompt": prompt, "stream": True}
+        if options:
+            body["options"] = options
+        return self._stream("/api/generate", body, stats, lambda d: d.get("response", ""))
+
+    def _stream(self, path, body, stats, piece_of):
+        # a generator: nothing is sent until the caller starts reading
+        stats = {} if stats is None else stats
+        t0 = time.perf_counter()
+        key = hashlib.sha1((path + json.dumps(body, sort_keys=True)).encode()).hexdigest()
+        with self._lock:
+            flight = self._flights.get(key) if self.coalesce else None
+            stats["coalesced"] = flight is not None
+            if flight is None:
+                flight = _Flight()
+                if self.coalesce:
+                    self._flights[key] = flight
+                self.counts["requests"] += 1
+                start = True
+            else:
+                self.counts["coalesced"] += 1
+                start = False
+            with flight.cond:
+                flight.readers += 1
+        if start:
+            threading.Thread(target=self._produce, args=(key, flight, path, body, piece_of), daemon=True).start()
+        yield from flight.read(stats, t0)
+
+    def _produce(self, key, flight, path, body, piece_of):
+        error = None
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    return self._post(flight, path, body, piece_of)
+                except requests.ConnectionError:
+                    # the pieces already replayed to readers can't be taken back
+                    if flight.pieces or attempt == self.retries or not flight.readers:
+                        raise
+                    self.counts["retries"] += 1
+                    time.sleep(RETRY_BACKOFF * 2 ** attempt)
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.finish(error)
+
+    def _post(self, flight, path, body, piece_of):
+        with self.session.post(f"{self.url}{path}", json=body, stream=True, timeout=REQUEST_TIMEOUT) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(data["error"])
+                piece = piece_of(data)
+                if piece:
+                    flight.push(piece)
+                if data.get("done"):
+                    # read on to the end of the body so the connection goes back to the pool
+                    flight.stats.update(prompt_tokens=data.get("prompt_eval_count"),
+                                        completion_tokens=data.get("eval_count"))
+                elif not flight.readers:
+                    break  # everyone stopped reading: drop the connection
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(url=OLLAMA_URL) -> LLMClient:
+    """The shared client for `url` (one connection pool and model cache per endpoint)."""
+    url = url.rstrip("/")
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = LLMClient(url)
+        return client
+
+def throttle(pieces, interval=UI_INTERVAL):
+    """Re-chunk a stream so a UI redraws at most every `interval` seconds.
+
+    st.write_stream / placeholder.markdown re-send the whole reply on each
+    chunk, so redrawing per token is quadratic in the reply length.
+    """
+    buf, last = [], 0.0
+    for p in pieces:
+        buf.append(p)
+        now = time.monotonic()
+        if now - last >= interval:
+            yield "".join(buf)
+            buf.clear()
+            last = now
+    if buf:
+        yield "".join(buf)
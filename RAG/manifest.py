@@ -0,0 +1,149 @@
+import os, json, hashlib, subprocess
+from pathlib import Path
+
+from RAG.textreader import exclude_rules, MAX_FILE_BYTES
+
+# Per-repo manifest used for incremental re-indexing:
+#   {"version": 1, "commit": "<HEAD sha>", "next_id": 123,
+#    "files": {"src/app.py": {"sha": "<git blob sha>", "ids": [0, 1, 2]}}}
+# Files matched by the exclude rules (RAG/textreader.py) never get in; outside
+# git, the tree walk also honours the repo's .gitignore files.
+
+MANIFEST_VERSION = 1
+
+# ---------- Blob hashes ----------
+
+def blob_sha(data: bytes) -> str:
+    """Same hash git uses for a blob, so manifests match `git ls-tree` output."""
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+def _git(repo_path, *args):
+    return subprocess.check_output(["git", "-C", str(repo_path), *args], stderr=subprocess.DEVNULL)
+
+def is_git_repo(repo_path) -> bool:
+    return (Path(repo_path) / ".git").exists()
+
+def head_commit(repo_path):
+    try:
+        return _git(repo_path, "rev-parse", "HEAD").decode().strip()
+    except Exception:
+        return None
+
+def _wanted(name, patterns):
+    return any(name.endswith(ext) for ext in patterns)
+
+def file_sha(path: Path):
+    """blob_sha of the file; files too big to be indexed get a size/mtime stamp instead of being read."""
+    st = path.stat()
+    if st.st_size > MAX_FILE_BYTES:
+        return f"stat:{st.st_size}:{st.st_mtime_ns}"
+    return blob_sha(path.read_bytes())
+
+def _walk_blobs(repo_path: Path, patterns, rules, report=None):
+    blobs = {}
+    for root, dirs, files in os.walk(repo_path):
+        rel_root = Path(root).relative_to(repo_path).as_posix()
+        rel_root = "" if rel_root == "." else rel_root
+        if ".gitignore" in files:
+            rules.add_gitignore(Path(root) / ".gitignore", rel_root)
+        dirs[:] = [d for d in dirs if d != ".git" and not rules.ignored(f"{rel_root}/{d}" if rel_root else d, True)]
+        for name in files:
+            if not _wanted(name, patterns):
+                continue
+            rel = f"{rel_root}/{name}" if rel_root else name
+            p = Path(root) / name
+            try:
+                if not rules.ignored(rel):
+                    blobs[rel] = file_sha(p)
+                elif report:
+                    report.skip("excluded")
+            except OSError:
+                pass
+    return blobs
+
+def list_blobs(repo_path, patterns, exclude=(), report=None):
+    """Map relative path -> blob sha for every indexable file in the working tree.
+
+    Uses `git ls-tree` for HEAD and hashes only the files that `git diff` reports
+    as modified locally and the untracked files that are not gitignored. Falls
+    back to walking and hashing every file outside a git repo. `exclude` adds
+    gitignore-style patterns to textreader.EXCLUDE; excluded files are counted
+    (not sized, nor read) in `report` (a textreader.ReadReport).
+    """
+    repo_path = Path(repo_path)
+    rules = exclude_rules(exclude)
+    if not is_git_repo(repo_path):
+        return _walk_blobs(repo_path, patterns, rules, report)
+    try:
+        # no -l: sizing every entry makes partial/sparse clones fetch all blobs
+        out = _git(repo_path, "ls-tree", "-r", "-z", "HEAD")
+    except Exception:
+        return _walk_blobs(repo_path, patterns, rules, report)
+    blobs = {}
+    for entry in out.decode("utf-8", errors="surrogateescape").split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        mode, kind, sha = info.split()
+        if kind == "blob" and mode != "120000" and _wanted(path.rsplit("/", 1)[-1], patterns):
+            if rules.excludes(path):
+                if report:
+                    report.skip("excluded")
+                continue
+            blobs[path] = sha
+    # working-tree edits on top of HEAD, and new files not committed yet
+    dirty = []
+    for args in (("diff", "--name-only", "-z", "HEAD"), ("ls-files", "--others", "--exclude-standard", "-z")):
+        try:
+            dirty += _git(repo_path, *args).decode("utf-8", errors="surrogateescape").split("\0")
+        except Exception:
+            pass
+    for path in filter(None, dirty):
+        if path not in blobs and (not _wanted(path.rsplit("/", 1)[-1], patterns) or rules.excludes(path)):
+            continue
+        full = repo_path / path
+        if full.is_file():
+            blobs[path] = file_sha(full)
+        else:
+            blobs.pop(path, None)
+    return blobs
+
+# ---------- Manifest ----------
+
+def empty_manifest():
+    return {"version": MANIFEST_VERSION, "commit": None, "next_id": 0, "files": {}}
+
+def load_manifest(path: Path):
+    try:
+        manifest = json.loads(Path(path).read_text(encoding="utf-8"))
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except Exception:
+        pass
+    return empty_manifest()
+
+def save_manifest(path: Path, manifest):
+    tmp = Path(str(path) + ".tmp")
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, path)
+
+def diff_manifest(manifest, blobs):
+    """Return (added, changed, removed) relative paths."""
+    old = manifest["files"]
+    added = sorted(p for p in blobs if p not in old)
+    changed = sorted(p for p in blobs if p in old and old[p]["sha"] != blobs[p])
+    removed = sorted(p for p in old if p not in blobs)
+    return added, changed, removed
+
+def stale_ids(manifest, paths):
+    ids = []
+    for p in paths:
+        ids.extend(manifest["files"].get(p, {}).get("ids", []))
+    return ids
+
+def allocate_ids(manifest, n):
+    start = manifest["next_id"]
+    manifest["next_id"] = start + n
+    return list(range(start, start + n))
@@ -1,5 +1,41 @@
-import os 
-import re 
-from langchain.text_splitter import MarkdownTextSplitter
+import re
 
+# Markdown sections: a new section starts at every ATX heading ("# ...",
+# "## ...") outside fenced code blocks.
 
+_HEADING = re.compile(r"^ {0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^ {0,3}(```|~~~)")
+
+def heading_lines(lines):
+    """[(line number (1-based), level, title)] of every heading."""
+    out = []
+    fence = None
+    for i, line in enumerate(lines, 1):
+        m = _FENCE.match(line)
+        if m:
+            fence = None if fence == m.group(1) else (fence or m.group(1))
+            continue
+        if fence:
+            continue
+        h = _HEADING.match(line)
+        if h:
+            out.append((i, len(h.group(1)), h.group(2)))
+    return out
+
+def split_markdown(text: str):
+    """Split into sections: [(start_line, end_line, heading path)], lines 1-based inclusive."""
+    lines = text.split("\n")
+    if lines and not lines[-1]:
+        lines.pop()
+    if not lines:
+        return []
+    sections = []
+    path = []
+    start, title = 1, ""
+    for lineno, level, heading in heading_lines(lines):
+        if lineno > start:
+            sections.append((start, lineno - 1, title))
+        path = [p for p in path if p[0] < level] + [(level, heading)]
+        start, title = lineno, " > ".join(h for _, h in path)
+    sections.append((start, len(lines), title))
+    return sections
@@ -0,0 +1,59 @@
+import importlib, importlib.util, threading
+
+# Optional heavy dependencies (FAISS, sentence-transformers/torch, the
+# document parsers, tiktoken). Availability is decided with find_spec, which
+# only looks the package up on sys.path, and the modules themselves are
+# imported on first use through lazy(), so importing the app or the service
+# costs nothing for features the session never touches:
+#
+#   faiss = lazy("faiss")        # nothing imported yet
+#   if HAS_FAISS:
+#       faiss.IndexFlatIP(dim)   # imported here, once per process
+#
+# A package that is installed but broken fails at first use instead of
+# silently turning the feature off.
+
+def available(name):
+    """True if `name` can be imported (without importing it)."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+_lock = threading.Lock()
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}{'' if self._module else ' (not imported)'}>"
+
+def lazy(name):
+    return LazyModule(name)
+
+HAS_FAISS = available("faiss")
+HAS_SBER = available("sentence_transformers")
+HAS_TIKTOKEN = available("tiktoken")
+HAS_FITZ = available("fitz")
+HAS_DOCX = available("docx")
+HAS_PPTX = available("pptx")
+HAS_PANDAS = available("pandas")
+HAS_PYARROW = available("pyarrow")
+HAS_OPENPYXL = available("openpyxl")
@@ -0,0 +1,433 @@
+"""Headless RepoMind service: the clone -> chunk -> embed -> store pipeline
+behind a persistent job queue, with a small HTTP API and a CLI.
+
+    python -m RAG.service serve --port 8000
+    curl -X POST localhost:8000/analyze_repo -d '{"repo_url": "https://github.com/psf/requests"}'
+    curl localhost:8000/jobs/<job_id>
+    curl -X POST localhost:8000/jobs/<job_id>/cancel
+    curl -X POST localhost:8000/query -d '{"repo": "requests", "question": "how are sessions pooled?"}'
+    curl -X POST localhost:8000/query -d '{"repo": "*", "question": "where do we retry HTTP calls?"}'
+    curl localhost:8000/shards
+    curl -N -X POST localhost:8000/answer -d '{"repo": "requests", "question": "how are sessions pooled?"}'
+    curl localhost:8000/answer_cache
+    curl localhost:8000/metrics            # Prometheus text format
+    curl localhost:8000/traces?n=20        # last traced runs (JSON)
+
+    python -m RAG.service index https://github.com/psf/requests --wait
+    python -m RAG.service index requests --wait --full-rebuild --profile --trace-memory
+    python -m RAG.service index requests --wait --exclude 'tests/fixtures/' --exclude '*.snap'
+    python -m RAG.service clone https://github.com/psf/requests https://github.com/pallets/flask
+    python -m RAG.service query requests "how are sessions pooled?"
+    python -m RAG.service query '*' "where do we retry HTTP calls?"
+
+The Streamlit app uses the same queue (same jobs.sqlite), so jobs submitted
+from either side are visible to both.
+"""
+import os, sys, json, time, argparse, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+from RAG.answer import answer, read_span, DEFAULT_LLM, OLLAMA_URL
+from RAG.answercache import AnswerCache
+from RAG.embcache import EmbeddingCache, CacheBusy
+from RAG.embeddings import get_provider
+from RAG.embedworkers import get_engine
+from RAG.federated import ShardSet
+from RAG.gitrepo import clone_repo, update_repo, clone_many, repo_name_from_url, CLONE_WORKERS
+from RAG.indexer import build_index, BATCH_SIZE, PATTERNS
+from RAG.jobs import JobQueue
+from RAG.store import open_index
+from RAG.tracing import tracer, run, span, read_runs
+
+# ---------- Config ----------
+WORKSPACE = Path(os.environ.get("REPOMIND_WORKSPACE") or Path.cwd() / "repo_workspace")
+INDEX_DIR = WORKSPACE / "indexes"
+REPOS_DIR = WORKSPACE / "repos"
+EMBCACHE_DIR = WORKSPACE / "embcache"
+EXTRACT_DIR = WORKSPACE / "extract"   # cached PDF/DOCX/PPTX/table text
+JOBS_DB = WORKSPACE / "jobs.sqlite"
+TRACE_LOG = WORKSPACE / "traces.jsonl"   # one JSON line per traced index/query run
+# indexing jobs run at once in this process
+JOB_WORKERS = int(os.environ.get("REPOMIND_JOB_WORKERS", "2") or 2)
+# embed with N worker processes while indexing (0/1 = in this process)
+EMBED_WORKERS = int(os.environ.get("REPOMIND_EMBED_WORKERS", "0") or 0)
+# clones made for indexing: history depth (0 = full) and blob-less partial clone
+CLONE_DEPTH = int(os.environ.get("REPOMIND_CLONE_DEPTH", "1") or 0)
+CLONE_PARTIAL = os.environ.get("REPOMIND_CLONE_PARTIAL", "1") not in ("", "0")
+
+_workspace_ready = False
+
+def ensure_workspace():
+    """Create the workspace directories, once per process (on first clone, index or job)."""
+    global _workspace_ready
+    if not _workspace_ready:
+        for d in (WORKSPACE, INDEX_DIR, REPOS_DIR):
+            d.mkdir(parents=True, exist_ok=True)
+        _workspace_ready = True
+
+tracer.log_path = TRACE_LOG
+
+# ---------- Pipeline ----------
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(provider):
+    """One embedding cache per model for the whole process (jobs run concurrently).
+
+    None while another process (the app next to `serve`) has the cache open:
+    that build embeds everything, and the next one tries again.
+    """
+    with _caches_lock:
+        cache = _caches.get(provider.model_name)
+        if cache is None:
+            try:
+                cache = _caches[provider.model_name] = EmbeddingCache(EMBCACHE_DIR, provider.model_name,
+                                                                      provider.dim)
+            except CacheBusy:
+                return None
+        return cache
+
+def repo_dir(repo):
+    """REPOS_DIR / repo for a repo name from a request; ValueError unless it names a directory right in REPOS_DIR."""
+    if not repo or "/" in repo or "\\" in repo or os.sep in repo or ".." in repo:
+        raise ValueError(f"invalid repo name: {repo!r}")
+    dest = REPOS_DIR / repo
+    if dest.resolve().parent != REPOS_DIR.resolve():
+        raise ValueError(f"invalid repo name: {repo!r}")
+    return dest
+
+def clone_options(params):
+    """git clone options from job params: depth, partial, sparse (bool: only indexed file types)."""
+    depth = params.get("depth", CLONE_DEPTH)
+    return {"depth": depth or None, "partial": params.get("partial", CLONE_PARTIAL),
+            "sparse": PATTERNS if params.get("sparse") else None}
+
+def index_repo(params, progress=None):
+    """Clone (when a repo_url is given and no local copy exists) or update, then build the index.
+
+    params: repo, repo_url, update, depth, partial, sparse, full_rebuild, index_config,
+    embed_workers, exclude (gitignore-style patterns, see RAG/textreader.py), profile
+    (cProfile the job), trace_memory (tracemalloc peak and top allocations).
+    Returns the build summary; its "trace" is the run id in TRACE_LOG.
+    """
+    repo = params.get("repo") or repo_name_from_url(params.get("repo_url"))
+    if not repo:
+        raise ValueError("repo or repo_url is required")
+    repo_dir(repo)
+    with run("index", profile=bool(params.get("profile")), memory=bool(params.get("trace_memory")), repo=repo) as r:
+        summary = _index_repo(repo, params, progress)
+    summary["trace"] = r.id if r else None
+    return summary
+
+def _index_repo(repo, params, progress):
+    progress = progress or (lambda stage, done, total: None)
+    ensure_workspace()
+    dest = repo_dir(repo)
+    if params.get("repo_url") and not dest.exists():
+        progress("clone", 0, 1)
+        res = clone_repo(params["repo_url"], dest, **clone_options(params))
+        if res["status"] == "error":
+            raise RuntimeError("clone failed: " + res.get("output", ""))
+        progress("clone", 1, 1)
+    elif params.get("update") and dest.is_dir():
+        progress("update", 0, 1)
+        res = update_repo(dest)
+        if res["status"] == "error":
+            raise RuntimeError("update failed: " + res.get("output", ""))
+        progress("update", 1, 1)
+    if not dest.is_dir():
+        raise FileNotFoundError(f"no local copy of {repo}")
+    workers = min(int(params.get("embed_workers") or EMBED_WORKERS), os.cpu_count() or 1)
+    provider = get_engine(workers=workers) if workers > 1 else get_provider()
+    cache = get_cache(provider)
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    kwargs = {k: params[k] for k in ("full_rebuild", "index_config", "exclude") if params.get(k) is not None}
+    summary = build_index(dest, repo, INDEX_DIR, provider, cache=cache,
+                          batch_size=getattr(provider, "preferred_batch", BATCH_SIZE),
+                          progress=progress, extract_cache=EXTRACT_DIR, **kwargs)
+    if cache is not None:
+        cache.save()
+        summary["cache"] = {"hits": cache.hits - hits, "misses": cache.misses - misses}
+    else:
+        summary["cache"] = None   # in use by another process
+    return summary
+
+def query_embed(question):
+    with span("query_embed"):
+        return get_provider().embed([question])[0]
+
+def query_repo(repo, question, k=5, mode="hybrid", qemb=None):
+    repo_dir(repo)
+    with run("query", repo=repo, mode=mode, k=k):
+        idx = open_index(INDEX_DIR, repo)
+        if idx is None:
+            raise FileNotFoundError(f"no index for {repo}; build it first")
+        if qemb is None and mode != "lexical":
+            qemb = query_embed(question)
+        return idx.search(None if mode == "lexical" else qemb, k, query=question, mode=mode)
+
+# answers to first questions (no chat history), per repo and index version
+answer_cache = AnswerCache()
+
+def answer_repo(repo, question, history=(), k=8, mode="hybrid", model=DEFAULT_LLM, stats=None, use_cache=True):
+    """Stream an LLM answer to `question` from the top-k chunks of `repo` (see RAG/answer.py).
+
+    The search runs before this returns (FileNotFoundError without an index);
+    stats["results"] gets the hits. Without history, a question close enough
+    to one already answered on the same index is served from answer_cache
+    (stats["cached"]); fresh answers are cached once fully streamed. The
+    search is traced as an "answer" run; the LLM stream reports its own
+    timings in stats.
+    """
+    stats = {} if stats is None else stats
+    dest = repo_dir(repo)
+    t0 = time.perf_counter()
+    with run("answer", repo=repo, mode=mode, k=k):
+        idx = open_index(INDEX_DIR, repo)
+        if idx is None:
+            raise FileNotFoundError(f"no index for {repo}; build it first")
+        cacheable = use_cache and not history
+        qemb = query_embed(question) if cacheable or mode != "lexical" else None
+        params = (k, mode, model)
+        if cacheable:
+            with span("answer_cache"):
+                hit = answer_cache.get(repo, idx.version, qemb, params)
+            if hit:
+                secs = round(time.perf_counter() - t0, 3)
+                stats.update(hit["stats"], results=hit["results"], cached=True, cached_question=hit["question"],
+                             similarity=hit["similarity"], ttft=secs, seconds=secs)
+                return iter([hit["answer"]])
+        results = query_repo(repo, question, k, mode, qemb)
+        stats.update(results=results, cached=False)
+        read = lambda hit: read_span(dest, hit, EXTRACT_DIR)
+        pieces = answer(question, results, read, history, model, OLLAMA_URL, stats)
+    if not cacheable:
+        return pieces
+    return _cache_answer(pieces, repo, idx.version, qemb, question, params, results, stats, t0)
+
+def _cache_answer(pieces, repo, version, qemb, question, params, results, stats, t0):
+    text = []
+    for p in pieces:
+        text.append(p)
+        yield p
+    keep = {k: stats[k] for k in ("sources", "context_tokens") if k in stats}
+    answer_cache.put(repo, version, qemb, question, "".join(text), params, results, keep, time.perf_counter() - t0)
+
+# every indexed repo as one shard of a federated search
+shards = ShardSet(INDEX_DIR)
+
+def search_all(question, k=5, mode="hybrid", repos=None, timeout=None):
+    """Top-k over every indexed repo (or `repos`): (results, info), see RAG/federated.py."""
+    with run("federated", mode=mode, k=k):
+        qemb = None if mode == "lexical" else query_embed(question)
+        return shards.search(qemb, k, query=question, mode=mode, repos=repos, timeout=timeout)
+
+# ---------- Jobs ----------
+
+RUNNERS = {"index": index_repo}
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_queue(start=True) -> JobQueue:
+    """The process-wide job queue (workers started on first use)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            ensure_workspace()
+            _queue = JobQueue(JOBS_DB, RUNNERS, workers=JOB_WORKERS)
+        if start:
+            _queue.start()
+        return _queue
+
+def submit_index(repo_url=None, repo=None, start=True, **options):
+    repo = repo or repo_name_from_url(repo_url)
+    if not repo:
+        raise ValueError("repo or repo_url is required")
+    repo_dir(repo)
+    if options.get("embed_workers") is not None:
+        options["embed_workers"] = int(options["embed_workers"])   # ValueError: 400 from the API
+    return get_queue(start).submit("index", repo, {"repo": repo, "repo_url": repo_url, **options})
+
+# ---------- HTTP ----------
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, code, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_text(self, code, text, content_type="text/plain; version=0.0.4"):
+        data = text.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(n) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("request body must be a JSON object")
+        return body
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["jobs"]:
+            repo = parse_qs(url.query).get("repo", [None])[0]
+            return self._send(200, {"jobs": get_queue().list(repo=repo)})
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = get_queue().get(parts[1])
+            return self._send(200, job) if job else self._send(404, {"error": "no such job"})
+        if parts == ["health"]:
+            return self._send(200, {"status": "ok"})
+        if parts == ["answer_cache"]:
+            return self._send(200, answer_cache.stats())
+        if parts == ["shards"]:
+            return self._send(200, shards.stats())
+        if parts == ["metrics"]:
+            return self._send_text(200, tracer.prometheus())
+        if parts == ["traces"]:
+            q = parse_qs(url.query)
+            n = q.get("n", ["20"])[0]
+            if not n.isdigit():
+                return self._send(400, {"error": f"n must be a non-negative integer, got {n!r}"})
+            return self._send(200, {"runs": read_runs(TRACE_LOG, int(n), q.get("kind", [None])[0])})
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        try:
+            body = self._body()
+            if parts == ["analyze_repo"]:
+                opts = {k: body[k] for k in ("full_rebuild", "index_config", "embed_workers", "update", "depth",
+                                             "partial", "sparse", "exclude", "profile", "trace_memory") if k in body}
+                job_id = submit_index(body.get("repo_url"), body.get("repo"), **opts)
+                return self._send(202, {"job_id": job_id, "status": "queued"})
+            if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+                ok = get_queue().cancel(parts[1])
+                return self._send(200 if ok else 409, {"cancelled": ok})
+            if parts == ["answer"]:
+                return self._stream_answer(body)
+            if parts == ["query"] and (body.get("repo") == "*" or "repos" in body):
+                results, info = search_all(body["question"], int(body.get("k", 5)), body.get("mode", "hybrid"),
+                                           body.get("repos"), body.get("timeout"))
+                return self._send(200, {"results": results, "shards": info})
+            if parts == ["query"]:
+                results = query_repo(body["repo"], body["question"], int(body.get("k", 5)), body.get("mode", "hybrid"))
+                return self._send(200, {"results": results})
+        except (KeyError, ValueError) as e:
+            return self._send(400, {"error": str(e)})
+        except FileNotFoundError as e:
+            return self._send(404, {"error": str(e)})
+        self._send(404, {"error": "not found"})
+
+    def _stream_answer(self, body):
+        """NDJSON: {"token": ...} per piece, then {"done": true, "stats": ...}."""
+        stats = {}
+        pieces = answer_repo(body["repo"], body["question"], body.get("history", ()), int(body.get("k", 8)),
+                             body.get("mode", "hybrid"), body.get("model", DEFAULT_LLM), stats,
+                             body.get("use_cache", True))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            for piece in pieces:
+                self.wfile.write((json.dumps({"token": piece}) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write((json.dumps({"done": True, "stats": stats}) + "\n").encode("utf-8"))
+        except Exception as e:
+            self.wfile.write((json.dumps({"error": str(e)}) + "\n").encode("utf-8"))
+
+    def log_message(self, fmt, *args):
+        sys.stderr.write("[repomind] " + fmt % args + "\n")
+
+def serve(host="127.0.0.1", port=8000):
+    get_queue()
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"RepoMind service on http://{host}:{port} (workspace {WORKSPACE})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# ---------- CLI ----------
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m RAG.service")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="run the HTTP API and job workers")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p = sub.add_parser("index", help="queue an indexing job")
+    p.add_argument("repo", help="repo URL or local repo name")
+    p.add_argument("--full-rebuild", action="store_true")
+    p.add_argument("--index-config")
+    p.add_argument("--wait", action="store_true", help="run the job here and wait for it")
+    p.add_argument("--update", action="store_true", help="fetch + fast-forward an existing clone first")
+    p.add_argument("--sparse", action="store_true", help="check out only the indexed file types")
+    p.add_argument("--exclude", action="append", help="gitignore-style pattern to leave out (repeatable)")
+    p.add_argument("--profile", action="store_true", help="cProfile the job (kept with its trace)")
+    p.add_argument("--trace-memory", action="store_true", help="record tracemalloc peak and top allocations")
+    p = sub.add_parser("clone", help="clone (or update) several repos in parallel")
+    p.add_argument("urls", nargs="+")
+    p.add_argument("--workers", type=int, default=CLONE_WORKERS)
+    p.add_argument("--depth", type=int, default=CLONE_DEPTH, help="0 = full history")
+    p.add_argument("--sparse", action="store_true")
+    p = sub.add_parser("query")
+    p.add_argument("repo", help="local repo name, or '*' for every indexed repo")
+    p.add_argument("question")
+    p.add_argument("-k", type=int, default=5)
+    p.add_argument("--mode", default="hybrid", choices=["hybrid", "semantic", "lexical"])
+    p = sub.add_parser("jobs", help="list recent jobs")
+    p.add_argument("--repo")
+    p = sub.add_parser("cancel")
+    p.add_argument("job_id")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "serve":
+        serve(args.host, args.port)
+    elif args.cmd == "index":
+        url = args.repo if "://" in args.repo or args.repo.endswith(".git") else None
+        opts = {"full_rebuild": args.full_rebuild or None, "index_config": args.index_config,
+                "update": args.update, "sparse": args.sparse, "exclude": args.exclude, "profile": args.profile,
+                "trace_memory": args.trace_memory}
+        job_id = submit_index(url, None if url else args.repo, start=args.wait, **opts)
+        print(job_id)
+        while args.wait:
+            job = get_queue(start=False).get(job_id)
+            if job["status"] in ("done", "failed", "cancelled"):
+                print(json.dumps(job["result"] or job["error"], indent=2) if job["status"] != "cancelled" else "cancelled")
+                return 0 if job["status"] == "done" else 1
+            if job["progress"]:
+                print(f"  {job['progress']['stage']}: {job['progress']['done']}/{job['progress']['total'] or '?'}")
+            time.sleep(1)
+    elif args.cmd == "clone":
+        ensure_workspace()
+        jobs = [(u, repo_dir(repo_name_from_url(u))) for u in args.urls]
+        opts = clone_options({"depth": args.depth, "sparse": args.sparse})
+        for (url, _), res in zip(jobs, clone_many(jobs, workers=args.workers, **opts)):
+            print(f"{res['status']:<10} {url}" + (f"\n{res['output']}" if res["status"] == "error" else ""))
+    elif args.cmd == "query" and args.repo == "*":
+        results, info = search_all(args.question, args.k, args.mode)
+        print(json.dumps({"results": results, "shards": info}, indent=2))
+    elif args.cmd == "query":
+        print(json.dumps(query_repo(args.repo, args.question, args.k, args.mode), indent=2))
+    elif args.cmd == "jobs":
+        for job in get_queue(start=False).list(repo=args.repo):
+            print(f"{job['id']}  {job['status']:<10} {job['repo']:<30} {job['progress'] or ''}")
+    elif args.cmd == "cancel":
+        print("cancelled" if get_queue(start=False).cancel(args.job_id) else "not running or queued")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
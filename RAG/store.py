@@ -0,0 +1,197 @@
+import json, sqlite3, threading
+from collections import OrderedDict
+from pathlib import Path
+
+from RAG.vectorindex import FlatIndex, normalize, set_search_params
+from RAG.lexical import LexicalIndex, rrf
+from RAG.tracing import span
+
+# Optional imports (used if available, imported on first use)
+from RAG.optional import lazy, HAS_FAISS
+faiss = lazy("faiss")
+
+# On-disk layout of one repo's index (all under INDEX_DIR):
+#   {name}_embs.npy        float32 vectors, row i <-> chunk row i
+#   {name}_ids.npy         int64 chunk ids (see RAG/manifest.py)
+#   {name}_meta.sqlite     chunk metadata, addressed by row
+#   {name}.index           FAISS index over the same rows (if FAISS is installed)
+#   {name}_bm25.npz        BM25 inverted index over the same rows (see RAG/lexical.py)
+#   {name}_manifest.json   per-file blob shas for incremental builds
+#   {name}_index_meta.json build summary; its mtime versions the whole index
+
+def index_paths(index_dir: Path, name: str):
+    index_dir = Path(index_dir)
+    return {"embs": index_dir / f"{name}_embs.npy",
+            "ids": index_dir / f"{name}_ids.npy",
+            "meta": index_dir / f"{name}_meta.sqlite",
+            "faiss": index_dir / f"{name}.index",
+            "lexical": index_dir / f"{name}_bm25.npz",
+            "manifest": index_dir / f"{name}_manifest.json",
+            "status": index_dir / f"{name}_index_meta.json"}
+
+HYBRID_CANDIDATES = 4  # per-retriever candidates (x k) fused in hybrid mode
+
+# ---------- Chunk metadata ----------
+
+class MetaStore:
+    """Chunk metadata in SQLite, one row per vector so lookups by row are O(log n)."""
+
+    def __init__(self, path: Path, create=False):
+        self.path = Path(path)
+        if create and self.path.exists():
+            self.path.unlink()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.lock = threading.Lock()
+        if create:
+            # scratch file that is swapped in atomically: no journal needed
+            self.conn.execute("PRAGMA journal_mode=OFF")
+            self.conn.execute("PRAGMA synchronous=OFF")
+            self.conn.execute("CREATE TABLE chunks (row INTEGER PRIMARY KEY, id INTEGER, file TEXT, meta TEXT)")
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def add(self, start_row, metas):
+        rows = [(start_row + i, m["id"], m["file"], json.dumps(m)) for i, m in enumerate(metas)]
+        with self.lock:
+            self.conn.executemany("INSERT INTO chunks VALUES (?,?,?,?)", rows)
+
+    def iter_metas(self):
+        """All metadata in row order (streamed, not loaded at once)."""
+        with self.lock:
+            cur = self.conn.execute("SELECT meta FROM chunks ORDER BY row")
+            for (meta,) in cur:
+                yield json.loads(meta)
+
+    def get(self, rows):
+        """Metadata for `rows`, in the same order (None for unknown rows)."""
+        rows = [int(r) for r in rows]
+        if not rows:
+            return []
+        with self.lock:
+            found = dict(self.conn.execute(
+                f"SELECT row, meta FROM chunks WHERE row IN ({','.join('?' * len(rows))})", rows))
+        return [json.loads(found[r]) if r in found else None for r in rows]
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ---------- Opened indexes ----------
+
+def faiss_mmap_flags():
+    """read_index flags that mmap FAISS codes (flat, HNSW and SQ storage; IVF lists are still read in)."""
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+
+class OpenIndex:
+    """One repo's vectors + metadata, loaded once and kept for repeated queries.
+
+    resident=True reads the vectors into memory, False memory-maps them where
+    possible; None (default) loads FAISS indexes and maps the .npy vectors.
+    """
+
+    def __init__(self, index_dir: Path, name: str, resident=None):
+        with span("index_load"):
+            self._load(index_dir, name, resident)
+
+    def _load(self, index_dir, name, resident):
+        paths = index_paths(index_dir, name)
+        self.name = name
+        self.version = paths["status"].stat().st_mtime_ns
+        self.resident = resident
+        self.faiss = None
+        self.flat = None
+        status = json.loads(paths["status"].read_text(encoding="utf-8"))
+        self.dim = status.get("dim")
+        if HAS_FAISS and paths["faiss"].exists() and status.get("faiss_params"):
+            self.faiss = faiss.read_index(str(paths["faiss"]), faiss_mmap_flags() if resident is False else 0)
+            set_search_params(self.faiss, status["faiss_params"])
+            self.nbytes = paths["faiss"].stat().st_size
+        else:
+            self.flat = FlatIndex.load(paths["embs"], normalized=status.get("normalized", False), mmap=not resident)
+            self.nbytes = paths["embs"].stat().st_size
+        self.lexical = LexicalIndex.load(paths["lexical"]) if paths["lexical"].exists() else None
+        self.meta = MetaStore(paths["meta"])
+
+    def dense_search(self, qvec, k=5):
+        q = normalize(qvec).reshape(1, -1)
+        if self.faiss is not None:
+            D, I = self.faiss.search(q, k)
+            return [(int(i), float(d)) for i, d in zip(I[0], D[0]) if i >= 0]
+        return self.flat.search(q, k)
+
+    def search(self, qvec, k=5, query=None, mode="hybrid"):
+        """Top-k chunks for a query.
+
+        mode "semantic" ranks by cosine of `qvec`, "lexical" by BM25 of `query`,
+        "hybrid" fuses both candidate lists with reciprocal rank fusion.
+        """
+        use_lexical = mode != "semantic" and query and self.lexical is not None
+        n = k * HYBRID_CANDIDATES if use_lexical and mode == "hybrid" else k
+        with span("search.dense"):
+            dense = self.dense_search(qvec, n) if mode != "lexical" and qvec is not None else []
+        with span("search.lexical"):
+            lexical = self.lexical.search(query, n) if use_lexical else []
+        if dense and lexical:
+            hits = rrf(dense, lexical)[:k]
+        else:
+            hits = (dense or lexical)[:k]
+        dense, lexical = dict(dense), dict(lexical)
+        with span("search.meta"):
+            metas = self.meta.get([i for i, _ in hits])
+        results = []
+        for (i, s), m in zip(hits, metas):
+            r = {"score": s, "meta": m if m is not None else {"file": "unknown", "row": i}}
+            if mode == "hybrid":
+                r.update(cosine=dense.get(i), bm25=lexical.get(i))
+            results.append(r)
+        return results
+
+    def close(self):
+        self.meta.close()
+
+class IndexCache:
+    """LRU of opened indexes; an entry is reopened when its build summary changes."""
+
+    def __init__(self, max_open=8):
+        self.max_open = max_open
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, index_dir: Path, name: str):
+        """Return the OpenIndex for `name`, or None if it has not been built."""
+        paths = index_paths(index_dir, name)
+        if not (paths["status"].exists() and paths["meta"].exists()):
+            return None
+        key = (str(index_dir), name)
+        version = paths["status"].stat().st_mtime_ns
+        with self.lock:
+            idx = self.entries.get(key)
+            if idx is not None and idx.version == version:
+                self.entries.move_to_end(key)
+                return idx
+            # entries dropped here may still be serving a query in another
+            # session; they are closed when the last reference goes away
+            idx = self.entries[key] = OpenIndex(index_dir, name)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_open:
+                self.entries.popitem(last=False)
+            return idx
+
+    def forget(self, index_dir: Path, name: str):
+        """Drop the entry for `name` (after a rebuild) so the next get() reopens it."""
+        # not closed: like the entries dropped in get(), it may still be
+        # serving a query in another session
+        with self.lock:
+            self.entries.pop((str(index_dir), name), None)
+
+# process-wide cache, shared by every Streamlit session
+index_cache = IndexCache()
+
+def open_index(index_dir: Path, name: str):
+    return index_cache.get(index_dir, name)
@@ -0,0 +1,188 @@
+import io, os, re, threading
+from collections import Counter
+from pathlib import Path
+
+from RAG.tracing import span, count
+
+# Reader for the text files the indexer embeds. A file is stat'ed first (too
+# big: skipped unread), then its first SNIFF_BYTES are checked for binary,
+# minified and generated content, and only a prefix of MAX_CHARS characters is
+# decoded; the rest of the file is never read. Which files are looked at at
+# all is decided by gitignore-style rules: the repo's .gitignore files (when
+# the tree is walked outside git), EXCLUDE (lockfiles, bundles), the
+# REPOMIND_EXCLUDE environment variable and per-build patterns.
+# Everything left out is counted in a ReadReport, by reason.
+
+MAX_CHARS = 200000                  # characters kept per file
+# bigger files are data dumps or build output: skipped without being read (or hashed, see manifest.file_sha)
+MAX_FILE_BYTES = int(float(os.environ.get("REPOMIND_MAX_FILE_MB", "10") or 10) * 2 ** 20)
+SNIFF_BYTES = 8192
+MINIFIED_MIN_BYTES = 4096           # shorter samples are never called minified
+MINIFIED_LINE = 1000                # average line length (bytes) of minified/generated data
+GENERATED_HEAD = 512                # generated-code markers are looked for in this prefix
+GENERATED_MARKERS = (b"@generated", b"do not edit", b"code generated by", b"this file is autogenerated",
+                     b"this file was automatically generated")
+EXCLUDE = ["package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock",
+           "Pipfile.lock", "Cargo.lock", "composer.lock", "Gemfile.lock", "go.sum",
+           "*.min.js", "*.min.css", "*.bundle.js", "*.map", "node_modules/", "bower_components/"]
+EXCLUDE_ENV = [p.strip() for p in os.environ.get("REPOMIND_EXCLUDE", "").split(",") if p.strip()]
+
+# bytes that occur in text (as in file(1)): anything else in the sample means binary
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+# ---------- Ignore rules ----------
+
+def _translate(pattern):
+    """gitignore glob -> regex (`*`, `?`, `[...]`, `**`)."""
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[" and "]" in pattern[i + 2:]:
+            j = pattern.index("]", i + 2)
+            body = pattern[i + 1:j]
+            out.append("[" + ("^" + body[1:] if body[:1] == "!" else body).replace("\\", "\\\\") + "]")
+            i = j + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+class IgnoreRules:
+    """gitignore-style patterns over repo-relative posix paths.
+
+    Patterns with a slash (other than a trailing one) are anchored to the
+    directory they come from, others match at any depth; a trailing slash
+    matches directories only and `!` re-includes. The last matching pattern wins.
+    """
+
+    def __init__(self, patterns=()):
+        self.rules = []   # (regex, negate, dir_only)
+        self.add(patterns)
+
+    def add(self, patterns, base=""):
+        for line in patterns:
+            line = line.rstrip("\r\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate or line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            rx = _translate(line.lstrip("/"))
+            prefix = re.escape(base + "/") if base else ""
+            self.rules.append((re.compile(prefix + ("" if anchored else "(?:.*/)?") + rx + "$"), negate, dir_only))
+
+    def add_gitignore(self, path: Path, base=""):
+        try:
+            self.add(path.read_text(encoding="utf-8", errors="ignore").splitlines(), base)
+        except OSError:
+            pass
+
+    def ignored(self, rel, is_dir=False):
+        hit = False
+        for rx, negate, dir_only in self.rules:
+            if (is_dir or not dir_only) and rx.match(rel):
+                hit = not negate
+        return hit
+
+    def excludes(self, rel):
+        """True if the file `rel` or any directory above it is ignored."""
+        parts = rel.split("/")
+        for i in range(1, len(parts)):
+            if self.ignored("/".join(parts[:i]), is_dir=True):
+                return True
+        return self.ignored(rel)
+
+def exclude_rules(exclude=()):
+    """EXCLUDE + REPOMIND_EXCLUDE + `exclude` (a list or a comma-separated string)."""
+    if isinstance(exclude, str):
+        exclude = [p.strip() for p in exclude.split(",")]
+    return IgnoreRules([*EXCLUDE, *EXCLUDE_ENV, *(exclude or ())])
+
+# ---------- Reading ----------
+
+class ReadReport:
+    """Files and bytes read or left out while indexing one repo, by reason (shared by reader threads)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files_read = 0
+        self.bytes_read = 0
+        self.truncated = 0
+        self.skipped = Counter()      # reason -> files
+        self.bytes_skipped = 0        # skipped files (excluded ones are not sized), plus the unread tail of truncated ones
+
+    def read(self, nbytes, size):
+        with self.lock:
+            self.files_read += 1
+            self.bytes_read += nbytes
+            if nbytes < size:
+                self.truncated += 1
+                self.bytes_skipped += size - nbytes
+        count("files_read")
+        count("bytes_read", nbytes)
+
+    def skip(self, reason, size=0):
+        with self.lock:
+            self.skipped[reason] += 1
+            self.bytes_skipped += size
+        count("files_skipped")
+        count("bytes_skipped", size)
+
+    def to_dict(self):
+        with self.lock:
+            return {"files_read": self.files_read, "bytes_read": self.bytes_read, "truncated": self.truncated,
+                    "skipped": dict(self.skipped), "files_skipped": sum(self.skipped.values()),
+                    "bytes_skipped": self.bytes_skipped}
+
+def sniff(head: bytes):
+    """Why a file starting with `head` should not be indexed ("binary", "minified", "generated"), or None."""
+    if b"\0" in head or len(head.translate(None, _TEXT_BYTES)) > len(head) * 0.1:
+        return "binary"
+    if len(head) >= MINIFIED_MIN_BYTES and len(head) / (head.count(b"\n") + 1) > MINIFIED_LINE:
+        return "minified"
+    if any(m in head[:GENERATED_HEAD].lower() for m in GENERATED_MARKERS):
+        return "generated"
+    return None
+
+def read_text_file(path: Path, max_chars=MAX_CHARS, max_bytes=MAX_FILE_BYTES, report=None):
+    """The first `max_chars` characters of a text file, or "" when it is skipped (see sniff)."""
+    report = report or ReadReport()
+    try:
+        size = os.stat(path).st_size
+        if size > max_bytes:
+            report.skip("large", size)
+            return ""
+        with span("read"), open(path, "rb") as f:
+            reason = sniff(f.read(SNIFF_BYTES))
+            if reason:
+                report.skip(reason, size)
+                return ""
+            f.seek(0)
+            # text mode for the same newline handling as Path.read_text, reading
+            # only as many buffered blocks as the prefix needs
+            wrapper = io.TextIOWrapper(f, encoding="utf-8", errors="ignore")
+            text = wrapper.read(max_chars)
+            nbytes = min(f.tell(), size)
+            wrapper.detach()
+        report.read(nbytes if len(text) == max_chars else size, size)
+        return text
+    except OSError:
+        report.skip("error")
+        return ""
@@ -0,0 +1,203 @@
+import os, io, json, time, uuid, pstats, cProfile, threading, tracemalloc, contextvars
+from collections import Counter, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+# Lightweight tracing for the indexing and query paths.
+#
+#   with run("index", repo="requests"):      # one traced unit of work
+#       with span("read"):                   # timed stage (nested spans are separate stages)
+#           count("bytes_read", len(text))   # counter
+#
+# Spans and counters go to the run active in the current context (worker
+# threads get it through contextvars, see indexer.bounded_map) and to the
+# process totals exported in Prometheus text format. Finished runs are kept in
+# memory (last MAX_RUNS) and appended to a JSON-lines log when one is set.
+# A run can also capture a cProfile of its own thread and the top tracemalloc
+# allocation sites. Set REPOMIND_TRACE=0 to turn spans and counters into no-ops.
+
+ENABLED = os.environ.get("REPOMIND_TRACE", "1") not in ("", "0")
+MAX_RUNS = 50
+LOG_MAX_BYTES = 5 * 2 ** 20   # the JSONL log is rotated to <name>.1 past this size
+PROFILE_LINES = 30
+MEMORY_LINES = 15
+
+_current = contextvars.ContextVar("repomind_run", default=None)
+
+class Run:
+    def __init__(self, kind, attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.attrs = attrs
+        self.started = time.time()
+        self.seconds = None
+        self.spans = {}          # stage -> [calls, seconds, max seconds]
+        self.counters = Counter()
+        self.error = None
+        self.profile = None      # cProfile text
+        self.memory = None       # {"peak_mb", "top": [...]}
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        with self.lock:
+            return {"id": self.id, "kind": self.kind, "attrs": self.attrs, "started": self.started,
+                    "seconds": self.seconds, "error": self.error,
+                    "spans": {k: {"calls": c, "seconds": round(s, 6), "max": round(m, 6)}
+                              for k, (c, s, m) in self.spans.items()},
+                    "counters": dict(self.counters), "profile": self.profile, "memory": self.memory}
+
+class Tracer:
+    def __init__(self, log_path=None, max_runs=MAX_RUNS):
+        self.log_path = Path(log_path) if log_path else None
+        self.runs = deque(maxlen=max_runs)
+        self.span_totals = {}    # stage -> [calls, seconds]
+        self.counter_totals = Counter()
+        self.run_totals = Counter()
+        self.lock = threading.Lock()
+
+    # ---------- Recording ----------
+
+    def record(self, stage, seconds):
+        r = _current.get()
+        if r is not None:
+            with r.lock:
+                s = r.spans.get(stage)
+                if s is None:
+                    r.spans[stage] = [1, seconds, seconds]
+                else:
+                    s[0] += 1
+                    s[1] += seconds
+                    s[2] = max(s[2], seconds)
+        with self.lock:
+            t = self.span_totals.setdefault(stage, [0, 0.0])
+            t[0] += 1
+            t[1] += seconds
+
+    def count(self, name, n=1):
+        r = _current.get()
+        if r is not None:
+            with r.lock:
+                r.counters[name] += n
+        with self.lock:
+            self.counter_totals[name] += n
+
+    @contextmanager
+    def span(self, stage):
+        if not ENABLED:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0)
+
+    @contextmanager
+    def run(self, kind, profile=False, memory=False, **attrs):
+        """Trace one unit of work; nested runs fold into the outer one."""
+        outer = _current.get()
+        if outer is not None or not ENABLED:
+            yield outer
+            return
+        r = Run(kind, attrs)
+        token = _current.set(r)
+        prof = cProfile.Profile() if profile else None
+        own_tracemalloc = memory and not tracemalloc.is_tracing()
+        if own_tracemalloc:
+            tracemalloc.start()
+        if memory:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        if prof:
+            prof.enable()
+        try:
+            yield r
+        except BaseException as e:
+            r.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            if prof:
+                prof.disable()
+                out = io.StringIO()
+                pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+                r.profile = out.getvalue()
+            r.seconds = round(time.perf_counter() - t0, 6)
+            if memory:
+                snap = tracemalloc.take_snapshot()
+                r.memory = {"peak_mb": round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2),
+                            "top": [str(s) for s in snap.statistics("lineno")[:MEMORY_LINES]]}
+                if own_tracemalloc:
+                    tracemalloc.stop()
+            _current.reset(token)
+            self._finish(r)
+
+    def _finish(self, r):
+        d = r.to_dict()
+        with self.lock:
+            self.runs.append(d)
+            self.run_totals[r.kind] += 1
+            if self.log_path is None:
+                return
+            try:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                if self.log_path.exists() and self.log_path.stat().st_size > LOG_MAX_BYTES:
+                    os.replace(self.log_path, str(self.log_path) + ".1")
+                with open(self.log_path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(d) + "\n")
+            except OSError:
+                pass  # tracing must never break the traced work
+
+    # ---------- Export ----------
+
+    def recent(self, n=MAX_RUNS, kind=None):
+        """Last n finished runs of this process, newest first."""
+        with self.lock:
+            runs = [r for r in self.runs if kind is None or r["kind"] == kind]
+        return runs[::-1][:n]
+
+    def prometheus(self):
+        """Process totals in the Prometheus text exposition format."""
+        with self.lock:
+            spans = dict(self.span_totals)
+            counters = dict(self.counter_totals)
+            runs = dict(self.run_totals)
+        lines = ["# HELP repomind_stage_seconds_total Time spent in each traced stage.",
+                 "# TYPE repomind_stage_seconds_total counter"]
+        lines += [f'repomind_stage_seconds_total{{stage="{k}"}} {v[1]:.6f}' for k, v in sorted(spans.items())]
+        lines += ["# HELP repomind_stage_calls_total Calls of each traced stage.",
+                  "# TYPE repomind_stage_calls_total counter"]
+        lines += [f'repomind_stage_calls_total{{stage="{k}"}} {v[0]}' for k, v in sorted(spans.items())]
+        lines += ["# HELP repomind_events_total Counters recorded by the pipeline.",
+                  "# TYPE repomind_events_total counter"]
+        lines += [f'repomind_events_total{{name="{k}"}} {v}' for k, v in sorted(counters.items())]
+        lines += ["# HELP repomind_runs_total Finished traced runs.", "# TYPE repomind_runs_total counter"]
+        lines += [f'repomind_runs_total{{kind="{k}"}} {v}' for k, v in sorted(runs.items())]
+        return "\n".join(lines) + "\n"
+
+def read_runs(path, n=MAX_RUNS, kind=None):
+    """Last n runs from a JSON-lines log (any process), newest first."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, "rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        fh.seek(max(0, fh.tell() - LOG_MAX_BYTES))
+        lines = fh.read().decode("utf-8", errors="ignore").splitlines()
+    runs = []
+    for line in reversed(lines):
+        try:
+            r = json.loads(line)
+        except ValueError:
+            continue  # first line cut by the seek, or a partial write
+        if kind is None or r["kind"] == kind:
+            runs.append(r)
+            if len(runs) == n:
+                break
+    return runs
+
+# process-wide tracer (service.py points its log at the workspace)
+tracer = Tracer()
+span, count, run = tracer.span, tracer.count, tracer.run
+
+def current_run():
+    return _current.get()
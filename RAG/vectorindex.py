@@ -0,0 +1,173 @@
+from pathlib import Path
+import numpy as np
+
+# Optional imports (used if available, imported on first use)
+from RAG.optional import lazy
+faiss = lazy("faiss")
+
+# Exact (brute-force) cosine index used when FAISS is not installed, and as
+# the ground truth when evaluating approximate indexes.
+#
+# Rows are L2-normalised once, when added (the indexer already writes
+# normalised vectors to {name}_embs.npy), so a query is one matrix multiply
+# plus an argpartition instead of renormalising and fully sorting N scores.
+
+BLOCK_ROWS = 1 << 20   # rows scored per matmul; bounds the (queries x rows) score matrix
+
+def normalize(vecs):
+    vecs = np.asarray(vecs, dtype=np.float32)
+    norms = np.linalg.norm(vecs, axis=-1, keepdims=True)
+    return vecs / np.maximum(norms, 1e-9)
+
+def topk(scores, k):
+    """Top `k` of each row of `scores` (m, n), best first: (scores, indices)."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((len(scores), 0), np.float32), np.zeros((len(scores), 0), np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-top, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+class FlatIndex:
+    def __init__(self, dim):
+        self.dim = dim
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: Path, normalized=True, mmap=True):
+        """Open a (N, dim) .npy file; memory-mapped unless it still needs normalising."""
+        vecs = np.load(str(path), mmap_mode="r" if mmap and normalized else None)
+        index = cls(vecs.shape[1])
+        index.vectors = vecs if normalized else normalize(vecs)
+        return index
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def add(self, vecs):
+        vecs = normalize(vecs).reshape(-1, self.dim)
+        self.vectors = np.concatenate([self.vectors, vecs]) if len(self.vectors) else vecs
+
+    def search_batch(self, queries, k=5):
+        """Cosine top-k for every row of `queries`: (scores, indices), each (m, k)."""
+        q = normalize(queries).reshape(-1, self.dim)
+        best_s = np.zeros((len(q), 0), dtype=np.float32)
+        best_i = np.zeros((len(q), 0), dtype=np.int64)
+        for start in range(0, len(self.vectors), BLOCK_ROWS):
+            block = self.vectors[start:start + BLOCK_ROWS]
+            s, i = topk(q @ block.T, k)
+            # merge this block's candidates with the best so far
+            s = np.concatenate([best_s, s], axis=1)
+            i = np.concatenate([best_i, i + start], axis=1)
+            s, order = topk(s, k)
+            best_s, best_i = s, np.take_along_axis(i, order, axis=1)
+        return best_s, best_i
+
+    def search(self, qvec, k=5):
+        """Cosine top-k for a single query: list of (row, score)."""
+        s, i = self.search_batch(np.asarray(qvec).reshape(1, -1), k)
+        return [(int(r), float(v)) for r, v in zip(i[0], s[0])]
+
+# ---------- FAISS index factory ----------
+# Every config searches by inner product over normalised vectors (= cosine),
+# same as FlatIndex. Pick one per build; IVF/PQ/SQ indexes are trained on a
+# sample of the stored vectors.
+
+INDEX_CONFIGS = {
+    "flat":     {"kind": "flat"},
+    "hnsw":     {"kind": "hnsw", "M": 32, "ef_construction": 200, "ef_search": 64},
+    "hnsw-sq8": {"kind": "hnsw", "M": 32, "ef_construction": 200, "ef_search": 64, "sq": "int8"},
+    "ivf-flat": {"kind": "ivf-flat", "nlist": 1024, "nprobe": 16},
+    "ivf-pq":   {"kind": "ivf-pq", "nlist": 1024, "nprobe": 16, "m": 48, "nbits": 8},
+    "sq8":      {"kind": "sq", "sq": "int8"},
+    "sq-fp16":  {"kind": "sq", "sq": "fp16"},
+}
+DEFAULT_CONFIG = "hnsw"
+TRAIN_SAMPLE = 100_000  # vectors used to train IVF/PQ/SQ indexes
+MIN_POINTS_PER_CENTROID = 39   # below this faiss warns and k-means quality drops
+
+def _sq_type(name):
+    return {"int8": faiss.ScalarQuantizer.QT_8bit, "fp16": faiss.ScalarQuantizer.QT_fp16}[name]
+
+def resolve_config(config, n, dim):
+    """Fit a config to a corpus of `n` vectors: cap nlist, pick a PQ `m` dividing dim.
+
+    IVF-PQ needs MIN_POINTS_PER_CENTROID training points for each of the
+    2**nbits codes of every sub-quantizer (and each coarse centroid); a
+    smaller corpus gets an SQ8 index instead, which needs no k-means.
+    """
+    cfg = dict(INDEX_CONFIGS[config] if isinstance(config, str) else config)
+    if n == 0 and cfg["kind"] in ("ivf-flat", "ivf-pq", "sq"):
+        return {"kind": "flat"}  # nothing to train on
+    if cfg["kind"] in ("ivf-flat", "ivf-pq"):
+        cfg["nlist"] = max(1, min(cfg["nlist"], int(4 * n ** 0.5), n // MIN_POINTS_PER_CENTROID))
+        cfg["nprobe"] = min(cfg["nprobe"], cfg["nlist"])
+    if cfg["kind"] == "ivf-pq":
+        train = min(n, TRAIN_SAMPLE)
+        if train < MIN_POINTS_PER_CENTROID * max(2 ** cfg["nbits"], cfg["nlist"]):
+            return {"kind": "sq", "sq": "int8"}  # too few points to train PQ
+        cfg["m"] = max(m for m in range(1, min(cfg["m"], dim) + 1) if dim % m == 0)
+    return cfg
+
+def make_faiss_index(cfg, dim):
+    ip = faiss.METRIC_INNER_PRODUCT
+    kind = cfg["kind"]
+    if kind == "flat":
+        return faiss.IndexFlatIP(dim)
+    if kind == "hnsw":
+        if cfg.get("sq"):
+            index = faiss.IndexHNSWSQ(dim, _sq_type(cfg["sq"]), cfg["M"], ip)
+        else:
+            index = faiss.IndexHNSWFlat(dim, cfg["M"], ip)
+        index.hnsw.efConstruction = cfg["ef_construction"]
+    elif kind == "ivf-flat":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, cfg["nlist"], ip)
+    elif kind == "ivf-pq":
+        index = faiss.IndexIVFPQ(faiss.IndexFlatIP(dim), dim, cfg["nlist"], cfg["m"], cfg["nbits"], ip)
+    elif kind == "sq":
+        index = faiss.IndexScalarQuantizer(dim, _sq_type(cfg["sq"]), ip)
+    else:
+        raise ValueError(f"unknown index kind: {kind}")
+    set_search_params(index, cfg)
+    return index
+
+def set_search_params(index, cfg):
+    if cfg["kind"] == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = cfg["ef_search"]
+    elif cfg["kind"] in ("ivf-flat", "ivf-pq"):
+        faiss.extract_index_ivf(index).nprobe = cfg["nprobe"]
+
+def build_faiss_index(cfg, vectors, rows_per_add=65536, seed=0):
+    """Train (if needed) and fill a FAISS index from a (possibly memory-mapped) matrix."""
+    n, dim = vectors.shape
+    index = make_faiss_index(cfg, dim)
+    if not index.is_trained:
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(n, size=min(n, TRAIN_SAMPLE), replace=False))
+        index.train(np.ascontiguousarray(vectors[sample], dtype=np.float32))
+    for s in range(0, n, rows_per_add):
+        index.add(np.ascontiguousarray(vectors[s:s + rows_per_add], dtype=np.float32))
+    return index
+
+def update_faiss_index(index, cfg, keep, vectors, rows_per_add=65536):
+    """Update an index over the previous rows in place: drop the rows where `keep` is False, append `vectors`.
+
+    Flat and SQ indexes drop rows and keep the rest in order, as the vector
+    file does. HNSW graphs and IVF lists can only be appended to, so False
+    (rebuild it) is returned when rows have to go. Trained indexes keep their
+    old training (IVF centroids, SQ ranges) until the next full build.
+    """
+    drop = np.flatnonzero(~keep)
+    if len(drop):
+        if cfg["kind"] not in ("flat", "sq"):
+            return False
+        index.remove_ids(drop.astype(np.int64))
+    for s in range(0, len(vectors), rows_per_add):
+        index.add(np.ascontiguousarray(vectors[s:s + rows_per_add], dtype=np.float32))
+    return True
+
+def recall_at_k(found, truth):
+    """Mean fraction of the exact top-k (rows of `truth`) present in `found`."""
+    k = truth.shape[1]
+    return float(np.mean([len(set(f[:k]) & set(t)) / k for f, t in zip(found, truth)]))
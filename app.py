@@ -2,159 +2,124 @@
 import streamlit as st
 import os
 import shutil
-import subprocess
-from pathlib import Path
-import json
-import hashlib
 import time
 
-# Optional imports (used if available)
-try:
-    import faiss
-    HAS_FAISS = True
-except Exception:
-    HAS_FAISS = False
-
-try:
-    from sentence_transformers import SentenceTransformer
-    HAS_SBER = True
-except Exception:
-    HAS_SBER = False
-
-import numpy as np
+from RAG.answer import answer, read_span, DEFAULT_LLM, OLLAMA_URL
+from RAG.llmclient import get_client, throttle
+from RAG.embeddings import warm_up, loaded_providers
+from RAG.filetree import get_tree, tree_cache
+from RAG.gitrepo import clone_repo, update_repo, repo_name_from_url
+from RAG.service import (REPOS_DIR, EXTRACT_DIR, CLONE_DEPTH, CLONE_PARTIAL, ensure_workspace, get_queue, submit_index,
+                         answer_repo, answer_cache, search_all, shards, clone_options, repo_dir, TRACE_LOG)
+from RAG.optional import HAS_FAISS
+from RAG.tracing import read_runs
+from RAG.vectorindex import INDEX_CONFIGS, DEFAULT_CONFIG
 
 # --------------------- Config ---------------------
-WORKSPACE = Path.cwd() / "repo_workspace"
-INDEX_DIR = WORKSPACE / "indexes"
-REPOS_DIR = WORKSPACE / "repos"
-WORKSPACE.mkdir(exist_ok=True)
-INDEX_DIR.mkdir(exist_ok=True)
-REPOS_DIR.mkdir(exist_ok=True)
+# the workspace is created on first clone/index, not on every rerun
+# set REPOMIND_WARMUP=1 to load the embedding model in the background at startup
+WARMUP = os.environ.get("REPOMIND_WARMUP", "") not in ("", "0")
 
 # --------------------- Helpers ---------------------
-def clone_repo(repo_url: str, dest: Path):
-    dest_str = str(dest)
-    if dest.exists():
-        return {"status":"exists", "path": dest_str}
-    try:
-        subprocess.check_output(["git", "clone", repo_url, dest_str], stderr=subprocess.STDOUT)
-        return {"status":"cloned", "path": dest_str}
-    except subprocess.CalledProcessError as e:
-        return {"status":"error", "output": e.output.decode("utf-8", errors="ignore")}
-
-def build_file_tree(root: Path, max_items=5000):
-    tree = []
-    count = 0
-    for p in sorted(root.rglob('*')):
-        if count > max_items:
-            break
-        rel = p.relative_to(root)
-        tree.append(str(rel))
-        count += 1
-    return tree
-
-def read_text_file(path: Path, max_chars=200000):
-    try:
-        text = path.read_text(encoding="utf-8", errors="ignore")
-        return text[:max_chars]
-    except Exception as e:
-        return ""
-
-def chunk_text(text: str, chunk_size=1000, overlap=200):
-    # naive chunker by characters approximating tokens
-    chunks = []
-    start = 0
-    L = len(text)
-    while start < L:
-        end = min(start + chunk_size, L)
-        chunks.append(text[start:end])
-        start = end - overlap if end < L else end
-    return chunks
-
-def get_id(s: str):
-    return hashlib.sha1(s.encode()).hexdigest()
-
-# Simple in-memory vector index (fallback if FAISS not present)
-class SimpleVectorIndex:
-    def __init__(self, dim):
-        self.dim = dim
-        self.vectors = []  # list of numpy arrays
-        self.metadatas = []
-
-    def add(self, vecs, metas):
-        for v,m in zip(vecs, metas):
-            self.vectors.append(np.array(v, dtype=np.float32))
-            self.metadatas.append(m)
-
-    def search(self, qvec, k=5):
-        if len(self.vectors) == 0:
-            return []
-        mats = np.stack(self.vectors, axis=0)  # (N,d)
-        # cosine similarity
-        q = np.array(qvec, dtype=np.float32)
-        mats_norm = mats / (np.linalg.norm(mats, axis=1, keepdims=True) + 1e-9)
-        q_norm = q / (np.linalg.norm(q) + 1e-9)
-        sims = mats_norm.dot(q_norm)
-        idx = np.argsort(-sims)[:k]
-        return [{"score": float(sims[i]), "meta": self.metadatas[i]} for i in idx]
-
-# Embedding provider wrapper
-class EmbeddingProvider:
-    def __init__(self):
-        self.model = None
-        self.dim = None
-        if HAS_SBER:
-            try:
-                self.model = SentenceTransformer("all-MiniLM-L6-v2")
-                self.dim = self.model.get_sentence_embedding_dimension()
-            except Exception:
-                self.model = None
-                self.dim = 384
+def show_job(job):
+    prog = job["progress"] or {}
+    line = f"`{job['id']}` **{job['status']}**"
+    if job["status"] in ("running", "cancelling") and prog:
+        line += f" — {prog['stage']}: {prog['done']}/{prog['total']}" if prog.get("total") else f" — {prog['stage']}: {prog['done']}"
+    st.write(line)
+    if job["status"] in ("queued", "running") and st.button("Cancel", key=f"cancel-{job['id']}"):
+        get_queue().cancel(job["id"])
+    res = job["result"]
+    if job["status"] == "done" and res:
+        st.write(f"Files: {res['added']} added, {res['changed']} changed, "
+                 f"{res['removed']} removed, {res['unchanged']} unchanged.")
+        st.write(f"Embedded {res['embedded']} chunks"
+                 + (f" ({res['chunks_per_sec']} chunks/s)" if res.get("chunks_per_sec") else "")
+                 + (f"; cache: {res['cache']['hits']} hits, {res['cache']['misses']} misses." if res.get("cache")
+                    else "; embedding cache in use by another process."))
+        read = res.get("read")
+        if read and read["files_skipped"] + read["truncated"]:
+            st.write(f"Read {read['files_read']} files ({read['bytes_read'] / 2 ** 20:.1f} MB); skipped "
+                     + (", ".join(f"{n} {why}" for why, n in sorted(read["skipped"].items())) or "none")
+                     + f", {read['truncated']} truncated: {read['bytes_skipped'] / 2 ** 20:.1f} MB not read.")
+        if res["status"] == "up-to-date":
+            st.success("Index is up to date.")
         else:
-            # fallback dimension
-            self.dim = 384
+            st.success("FAISS index built and saved." if res["faiss"] else "Embeddings saved (FAISS not available).")
+    elif job["status"] == "failed":
+        st.error("Index build error: " + (job["error"] or "").splitlines()[0])
 
-    def embed(self, texts):
-        if self.model is not None:
-            embs = self.model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
-            return [list(e.astype(np.float32)) for e in embs]
-        else:
-            # fallback: random vectors (placeholder) — replace with a real embedding service
-            embs = []
-            for t in texts:
-                rng = np.random.RandomState(int(get_id(t)[:8], 16))
-                embs.append(rng.rand(self.dim).astype(np.float32))
-            return embs
+def _jobs_panel(repo):
+    jobs = get_queue().list(repo=repo, limit=5)
+    if jobs:
+        st.write("Index jobs:")
+        for job in jobs:
+            show_job(job)
+
+# poll the job table every 2s without rerunning the whole page (older Streamlit: manual refresh)
+if hasattr(st, "fragment"):
+    render_jobs = st.fragment(run_every=2)(_jobs_panel)
+else:
+    def render_jobs(repo):
+        _jobs_panel(repo)
+        st.button("Refresh jobs")
 
 # --------------------- Streamlit UI ---------------------
 st.set_page_config(page_title="RepoMind", layout="wide")
 st.title("RepoMind — AI-Powered Repository Analyzer (Streamlit Prototype)")
 st.markdown("Prototype UI to clone, inspect, index and query GitHub repositories.")
 
+if WARMUP and "warmup_started" not in st.session_state:
+    st.session_state.warmup_started = True
+    if not loaded_providers():
+        warm_up()
+
 # Sidebar - repo input and actions
 st.sidebar.header("Repository")
 repo_url = st.sidebar.text_input("GitHub repo URL", value="https://github.com/psf/requests")
 repo_name = st.sidebar.text_input("Local name (optional)")
 
 if not repo_name:
-    repo_name = repo_url.rstrip("/").split("/")[-1] if repo_url else ""
+    repo_name = repo_name_from_url(repo_url)
+try:
+    dest = repo_dir(repo_name)
+except ValueError as e:
+    dest = None
+    if repo_name:
+        st.sidebar.error(str(e))
+
+with st.sidebar.expander("Clone options"):
+    shallow = st.checkbox("Shallow (latest commit only)", value=bool(CLONE_DEPTH))
+    partial = st.checkbox("Partial (fetch file contents on checkout only)", value=CLONE_PARTIAL)
+    sparse = st.checkbox("Sparse (check out indexed file types only)", value=False)
 
-clone_col1, clone_col2 = st.sidebar.columns(2)
+clone_col1, clone_col2, clone_col3 = st.sidebar.columns(3)
 if clone_col1.button("Clone Repo"):
     if not repo_url:
         st.sidebar.error("Provide a repo URL")
-    else:
-        dest = REPOS_DIR / repo_name
-        res = clone_repo(repo_url, dest)
+    elif dest is not None:
+        opts = clone_options({"depth": (CLONE_DEPTH or 1) if shallow else 0, "partial": partial, "sparse": sparse})
+        ensure_workspace()
+        with st.spinner("Cloning..."):
+            res = clone_repo(repo_url, dest, **opts)
         if res["status"] == "cloned":
             st.sidebar.success(f"Cloned to {res['path']}")
         elif res["status"] == "exists":
-            st.sidebar.info("Repo already exists locally.")
+            st.sidebar.info("Repo already exists locally. Use Update to fetch new commits.")
         else:
             st.sidebar.error("Error cloning repo: " + res.get("output","unknown error"))
 
-if clone_col2.button("Delete Local Copy"):
-    dest = REPOS_DIR / repo_name
+if clone_col2.button("Update") and dest is not None:
+    with st.spinner("Fetching..."):
+        res = update_repo(dest)
+    if res["status"] == "updated":
+        st.sidebar.success(f"Fast-forwarded {res['old'][:8]} -> {res['new'][:8]}")
+    elif res["status"] == "up-to-date":
+        st.sidebar.info("Already up to date.")
+    else:
+        st.sidebar.error("Error updating repo: " + res.get("output","unknown error"))
+
+if clone_col3.button("Delete") and dest is not None:
     if dest.exists():
         shutil.rmtree(dest)
         st.sidebar.success("Deleted local copy.")
@@ -163,13 +128,30 @@ if clone_col2.button("Delete Local Copy"):
 
 # Select repo from local list
 st.sidebar.header("Local Repos")
-local_repos = sorted([p.name for p in REPOS_DIR.iterdir() if p.is_dir()])
+local_repos = sorted([p.name for p in REPOS_DIR.iterdir() if p.is_dir()]) if REPOS_DIR.is_dir() else []
 selected = st.sidebar.selectbox("Choose repo", [""] + local_repos)
 
 if selected:
     repo_path = REPOS_DIR / selected
     st.sidebar.write(f"Path: {repo_path}")
 
+st.sidebar.header("Answering")
+llm_models = get_client().models()  # cached for a few seconds (failures too), not fetched on every rerun
+if llm_models:
+    llm_model = st.sidebar.selectbox("LLM model (Ollama)", llm_models,
+                                     index=llm_models.index(DEFAULT_LLM) if DEFAULT_LLM in llm_models else 0)
+else:
+    llm_model = st.sidebar.text_input("LLM model (Ollama)", value=DEFAULT_LLM)
+cache_slot = st.sidebar.empty()  # answer cache metrics, filled in at the end of the run
+
+with st.sidebar.expander("Embedding model"):
+    provs = loaded_providers()
+    if provs:
+        for prov in provs.values():
+            st.json(prov.stats())
+    else:
+        st.write("Not loaded yet (loads on first index/search).")
+
 # Main area - show files / index / query
 col1, col2 = st.columns([2,1])
 
@@ -177,13 +159,21 @@ with col1:
     st.subheader("Repository Explorer")
     if selected:
         repo_path = REPOS_DIR / selected
-        tree = build_file_tree(repo_path)
-        # display first N files and a search box
+        # listed once per commit; keystrokes in the filter only hit the in-memory index
+        tree = get_tree(repo_path)
         qfile = st.text_input("Filter files (substring)", value="")
         N = st.slider("Max files to show", 10, 200, 80)
-        filtered = [f for f in tree if qfile.lower() in f.lower()][:N]
-        for f in filtered:
-            st.code(f)
+        if qfile:
+            shown = tree.filter(qfile, limit=N)
+        else:
+            folder = st.selectbox("Folder", tree.folders, format_func=lambda d: d or "/ (repo root)")
+            shown = [f"{name}/" if is_dir else name for name, is_dir in tree.children(folder)[:N]]
+        st.code("\n".join(shown) or "(no matching files)", language=None)
+        st.caption(f"{len(tree)} files" + (" (listing truncated)" if tree.truncated else "")
+                   + f", {tree.skipped} binary files hidden.")
+        if st.button("Refresh file list"):
+            tree_cache.forget(repo_path)
+            st.rerun()
     else:
         st.info("Clone a repo or pick one from the Local Repos list in the sidebar.")
 
@@ -192,121 +182,134 @@ with col2:
     st.markdown("Index the selected repository into an embedding index (FAISS if available, otherwise an in-memory index).")
     if selected:
         repo_path = REPOS_DIR / selected
-        index_status_path = INDEX_DIR / f"{selected}_index_meta.json"
+        full_rebuild = st.checkbox("Full rebuild (ignore manifest)", value=False)
+        index_config = DEFAULT_CONFIG
+        if HAS_FAISS:
+            configs = list(INDEX_CONFIGS)
+            index_config = st.selectbox("ANN index", configs, index=configs.index(DEFAULT_CONFIG),
+                                        help="See benchmarks/eval_ann.py for recall/latency of each config.")
+        exclude = st.text_input("Exclude (gitignore patterns, comma-separated)", value="",
+                                help="Added to the default exclude list: lockfiles, *.min.js, *.map, node_modules/ ...")
+        prof_col1, prof_col2 = st.columns(2)
+        profile = prof_col1.checkbox("Profile the build (cProfile)", value=False)
+        trace_memory = prof_col2.checkbox("Trace memory (tracemalloc)", value=False)
         if st.button("Build Index (chunk -> embed -> store)"):
-            # gather files
-            patterns = [".py", ".md", ".txt", ".json", ".js", ".html"]
-            docs = []
-            metadatas = []
-            for p in repo_path.rglob("*"):
-                if p.is_file() and any(p.name.endswith(ext) for ext in patterns):
-                    txt = read_text_file(p)
-                    if not txt.strip():
-                        continue
-                    chunks = chunk_text(txt, chunk_size=1200, overlap=200)
-                    for i,c in enumerate(chunks):
-                        meta = {"file": str(p.relative_to(repo_path)), "chunk_index": i, "repo": selected}
-                        docs.append(c)
-                        metadatas.append(meta)
-            st.write(f"Prepared {len(docs)} chunks for embedding.")
-            # embed
-            with st.spinner("Loading embedding model..."):
-                embprov = EmbeddingProvider()
-                embs = embprov.embed(docs)
-            st.write(f"Generated {len(embs)} embeddings (dim={embprov.dim}).")
-            # store in FAISS if available, else in simple index
-            if HAS_FAISS:
-                try:
-                    import faiss
-                    dim = embprov.dim
-                    index = faiss.IndexHNSWFlat(dim, 32)
-                    import numpy as np
-                    emba = np.array(embs, dtype=np.float32)
-                    index.add(emba)
-                    faiss.write_index(index, str(INDEX_DIR / f"{selected}.index"))
-                    # save metadata
-                    with open(index_status_path, "w", encoding="utf-8") as fh:
-                        json.dump({"repo": selected, "chunks": len(embs), "dim": dim}, fh)
-                    st.success("FAISS index built and saved.")
-                except Exception as e:
-                    st.error("FAISS build error: " + str(e))
-            else:
-                # fallback: save using numpy arrays + metadata
-                try:
-                    import numpy as np
-                    emba = np.array(embs, dtype=np.float32)
-                    np.save(str(INDEX_DIR / f"{selected}_embs.npy"), emba)
-                    with open(INDEX_DIR / f"{selected}_meta.json", "w", encoding="utf-8") as fh:
-                        json.dump(metadatas, fh)
-                    with open(index_status_path, "w", encoding="utf-8") as fh:
-                        json.dump({"repo": selected, "chunks": len(embs), "dim": embprov.dim}, fh)
-                    st.success("Embeddings saved (FAISS not available).")
-                except Exception as e:
-                    st.error("Saving embeddings error: " + str(e))
+            # runs in the background job queue: survives reruns and page reloads
+            submit_index(repo=selected, full_rebuild=full_rebuild or None, index_config=index_config,
+                         exclude=[p.strip() for p in exclude.split(",") if p.strip()] or None,
+                         profile=profile or None, trace_memory=trace_memory or None)
+        render_jobs(selected)
         # search interface
         st.markdown("---")
-        st.write("Query the index (semantic search).")
+        st.write("Query the index (semantic + identifier search) and answer with the local LLM.")
         question = st.text_input("Enter a question to ask the repo:")
         top_k = st.slider("Top K", 1, 10, 5)
+        search_mode = st.radio("Retrieval", ["hybrid", "semantic", "lexical"], horizontal=True,
+                               help="hybrid fuses embedding and BM25 (identifier) results")
         if st.button("Search & Answer"):
             if not question.strip():
                 st.error("Enter a question.")
             else:
-                # embed question
-                embprov = EmbeddingProvider()
-                qemb = embprov.embed([question])[0]
-                results = []
-                if HAS_FAISS and (INDEX_DIR / f"{selected}.index").exists():
-                    try:
-                        import faiss, numpy as np
-                        idx = faiss.read_index(str(INDEX_DIR / f"{selected}.index"))
-                        qv = np.array(qemb, dtype=np.float32).reshape(1, -1)
-                        D, I = idx.search(qv, top_k)
-                        D = D[0].tolist(); I = I[0].tolist()
-                        # load docs metadata saved earlier? fallback stored in memory in this prototype
-                        mm_path = INDEX_DIR / f"{selected}_meta.json"
-                        if mm_path.exists():
-                            metas = json.loads(mm_path.read_text(encoding="utf-8"))
-                            for i,score in zip(I,D):
-                                if i < len(metas):
-                                    results.append({"score":float(score), "meta":metas[i]})
-                                else:
-                                    results.append({"score":float(score), "meta":{"file":"unknown"}})
-                        else:
-                            for i,score in zip(I,D):
-                                results.append({"score":float(score), "meta":{"idx":int(i)}})
-                    except Exception as e:
-                        st.error("FAISS search error: "+str(e))
-                else:
-                    # fallback brute-force load
+                stats, pieces = {}, None
+                try:
+                    # searches now; the answer streams (or comes from the answer cache) below
+                    pieces = answer_repo(selected, question, k=top_k, mode=search_mode, model=llm_model, stats=stats)
+                except FileNotFoundError:
+                    st.warning("No index found. Build the index first.")
+                except Exception as e:
+                    st.error("Search error: "+str(e))
+                if stats.get("results"):
+                    # stream the answer from the local LLM, grounded in the top chunks
+                    st.write("Answer:")
                     try:
-                        import numpy as np, math
-                        embs_path = INDEX_DIR / f"{selected}_embs.npy"
-                        meta_path = INDEX_DIR / f"{selected}_meta.json"
-                        if embs_path.exists() and meta_path.exists():
-                            emba = np.load(str(embs_path))
-                            metas = json.loads(meta_path.read_text(encoding="utf-8"))
-                            # cosine similarities
-                            q = np.array(qemb, dtype=np.float32)
-                            mats = emba / (np.linalg.norm(emba, axis=1, keepdims=True)+1e-9)
-                            qn = q / (np.linalg.norm(q)+1e-9)
-                            sims = mats.dot(qn)
-                            idx = np.argsort(-sims)[:top_k]
-                            for i in idx:
-                                results.append({"score":float(sims[i]), "meta":metas[i]})
+                        st.write_stream(throttle(pieces))
+                        if stats["cached"]:
+                            st.caption(f"From the answer cache in {stats['seconds']}s (similar to "
+                                       f"\"{stats['cached_question']}\", cosine {stats['similarity']}).")
                         else:
-                            st.warning("No index found. Build the index first.")
+                            st.caption(f"First token after {stats.get('ttft')}s, {stats.get('seconds')}s in total; "
+                                       f"{stats['context_tokens']} context tokens from {len(stats['sources'])} excerpts.")
                     except Exception as e:
-                        st.error("Fallback search error: "+str(e))
-                # display results
-                st.write("Top results:")
-                for r in results:
-                    st.write(r)
-                # OPTIONAL: send context + question to LLM (not implemented)
-                st.info("LLM answering is not configured in this prototype. Integrate OpenAI/HF Inference to get natural language answers.")
+                        st.warning(f"LLM not available at {OLLAMA_URL} ({e}). Showing the retrieved chunks only.")
+                    with st.expander("Top results"):
+                        for r in stats["results"]:
+                            st.write(r)
 
     else:
         st.info("Select a repo to index.")
 
+# --------------------- All repos ---------------------
+st.markdown("---")
+with st.expander("Search all indexed repos"):
+    st.write("Federated query: every built index is searched in parallel and the best chunks across repos are merged.")
+    fed_question = st.text_input("Question for all repos:", key="fed_question")
+    fed_col1, fed_col2 = st.columns(2)
+    fed_k = fed_col1.slider("Top K", 1, 20, 8, key="fed_k")
+    fed_mode = fed_col2.radio("Retrieval", ["hybrid", "semantic", "lexical"], horizontal=True, key="fed_mode")
+    fed_answer = st.checkbox("Answer with the LLM", value=True, key="fed_answer")
+    if st.button("Search all repos"):
+        results, info = [], None
+        if not fed_question.strip():
+            st.error("Enter a question.")
+        else:
+            try:
+                results, info = search_all(fed_question, fed_k, fed_mode)
+            except Exception as e:
+                st.error("Search error: "+str(e))
+        if info:
+            st.caption(f"{info['shards']} repos searched in {info['seconds']}s"
+                       + (f"; failed: {', '.join(info['failed'])}" if info["failed"] else "") + ".")
+        if results and fed_answer:
+            # cite files as repo/path, read back from the workspace
+            hits = [{**r, "meta": {**r["meta"], "file": f"{r['repo']}/{r['meta']['file']}"}} for r in results]
+            stats = {}
+            try:
+                st.write_stream(throttle(answer(fed_question, hits, lambda h: read_span(REPOS_DIR, h, EXTRACT_DIR),
+                                                model=llm_model, stats=stats)))
+                st.caption(f"First token after {stats.get('ttft')}s; {stats['context_tokens']} context tokens "
+                           f"from {len(stats['sources'])} excerpts.")
+            except Exception as e:
+                st.warning(f"LLM not available at {OLLAMA_URL} ({e}). Showing the retrieved chunks only.")
+        for r in results:
+            m = r["meta"]
+            st.write(f"**{r['repo']}** `{m['file']}:{m.get('start_line')}-{m.get('end_line')}` ({r['score']:.3f})")
+    shard_stats = shards.stats()
+    if shard_stats["shards"]:
+        st.caption(f"Shards: {shard_stats['resident_mb']} of {shard_stats['budget_mb']} MB resident "
+                   f"after {shard_stats['queries']} queries; search latency per repo (ms):")
+        st.dataframe(shard_stats["shards"], use_container_width=True)
+
+# --------------------- Traces ---------------------
+with st.expander("Pipeline traces"):
+    st.write("Where time goes, stage by stage, in the last index builds and queries (all processes sharing this workspace).")
+    tr_col1, tr_col2 = st.columns(2)
+    trace_kind = tr_col1.selectbox("Runs", ["index", "query", "answer", "federated"], key="trace_kind")
+    trace_n = tr_col2.slider("Last N runs", 1, 50, 10, key="trace_n")
+    runs = read_runs(TRACE_LOG, trace_n, trace_kind)[::-1]
+    if not runs:
+        st.info("No traced runs yet.")
+    else:
+        labels = [f"{time.strftime('%H:%M:%S', time.localtime(r['started']))} {r['attrs'].get('repo') or ''} {r['id'][:4]}"
+                  for r in runs]
+        stages = list(dict.fromkeys(s for r in runs for s in r["spans"]))
+        st.bar_chart({s: [round(r["spans"].get(s, {}).get("seconds", 0.0), 4) for r in runs] for s in stages}
+                     | {"run": labels}, x="run", y=stages)
+        st.dataframe([{"run": label, "total s": r["seconds"], **{s: r["spans"].get(s, {}).get("seconds") for s in stages},
+                       **r["counters"], "error": r["error"]} for label, r in zip(labels, runs)],
+                     use_container_width=True)
+        detailed = [i for i, r in enumerate(runs) if r["profile"] or r["memory"]]
+        if detailed:
+            pick = st.selectbox("Profile / memory of", detailed[::-1], format_func=lambda i: labels[i], key="trace_pick")
+            if runs[pick]["memory"]:
+                st.caption(f"Peak traced memory {runs[pick]['memory']['peak_mb']} MB; top allocation sites:")
+                st.code("\n".join(runs[pick]["memory"]["top"]), language=None)
+            if runs[pick]["profile"]:
+                st.code(runs[pick]["profile"], language=None)
+
+ac = answer_cache.stats()
+if ac["hits"] + ac["misses"]:
+    cache_slot.caption(f"Answer cache: {ac['hits']}/{ac['hits'] + ac['misses']} hits ({ac['hit_rate']:.0%}), "
+                       f"~{ac['saved_seconds']}s saved, {ac['entries']} answers kept.")
+
 st.markdown("---")
 st.caption("RepoMind Streamlit Prototype — meant for local development. See README for full deployment and integration steps.")
@@ -0,0 +1,72 @@
+"""Answer pipeline timings: context packing, time to first token and total
+streaming time, against the stub server (default) or a real Ollama endpoint.
+
+    python benchmarks/bench_answer.py --queries 20
+    python benchmarks/bench_answer.py --url http://localhost:11434 --model llama3
+
+Search hits are synthetic: random line windows over this repo's own source
+files, with overlaps, so merging and the token budget both have work to do.
+"""
+import argparse, json, random, statistics, sys, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from RAG.answer import answer, merge_hits, pack_context, read_span, count_tokens, CONTEXT_TOKENS
+from benchmarks.stub_llm import start_stub
+
+def fake_results(rng, files, k):
+    out = []
+    for _ in range(k):
+        f = rng.choice(files)
+        n = sum(1 for _ in open(ROOT / f, encoding="utf-8", errors="ignore"))
+        s = rng.randint(1, max(1, n - 40))
+        out.append({"score": rng.random(), "meta": {"file": f, "start_line": s, "end_line": min(n, s + 40)}})
+    return out
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", type=int, default=10)
+    ap.add_argument("--k", type=int, default=12)
+    ap.add_argument("--budget", type=int, default=CONTEXT_TOKENS)
+    ap.add_argument("--url", help="Ollama-compatible endpoint (default: start the stub)")
+    ap.add_argument("--model", default="llama3")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    stub = None
+    if not args.url:
+        stub = start_stub(ttft=0.15, token_delay=0.005, tokens=60)
+        args.url = stub.url
+    rng = random.Random(0)
+    files = sorted(p.relative_to(ROOT).as_posix() for p in (ROOT / "RAG").glob("*.py"))
+    read = lambda h: read_span(ROOT, h)
+    pack_ms, ttft, total, ctx = [], [], [], []
+    history = []
+    for q in range(args.queries):
+        results = fake_results(rng, files, args.k)
+        t0 = time.perf_counter()
+        context, sources = pack_context(merge_hits(results), read, args.budget)
+        pack_ms.append((time.perf_counter() - t0) * 1000)
+        ctx.append(count_tokens(context))
+        stats = {}
+        question = f"what does chunk {q} do?"
+        reply = "".join(answer(question, results, read, history, args.model, args.url, stats, args.budget))
+        history += [{"role": "user", "content": question}, {"role": "assistant", "content": reply}]
+        ttft.append(stats["ttft"])
+        total.append(stats["seconds"])
+    res = {"queries": args.queries, "context_tokens_mean": round(statistics.mean(ctx)),
+           "pack_ms_p50": round(pct(pack_ms, 50), 2), "ttft_p50": pct(ttft, 50), "ttft_p95": pct(ttft, 95),
+           "total_p50": pct(total, 50)}
+    print(json.dumps(res, indent=2))
+    if stub:
+        stub.shutdown()
+    if args.json:
+        Path(args.json).write_text(json.dumps(res, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Answer latency with and without the semantic answer cache, on an index of
+this repo's RAG/ sources and the stub LLM.
+
+    python benchmarks/bench_answer_cache.py --questions 200 --pool 20
+
+Questions are drawn from a pool with a Zipf-like skew (a few are asked over
+and over), most of them re-cased/re-punctuated so matching is not just
+string equality (without sentence-transformers the fallback vectors carry
+no meaning, so only exact repeats can hit). Halfway through the index
+version is bumped, which must empty the cache. Reports hit rate, p50/p95 latency and the seconds saved.
+"""
+import argparse, json, os, random, shutil, sys, tempfile, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from benchmarks.stub_llm import start_stub
+
+TOPICS = ["how is auth handled", "where is the entry point", "how are embeddings cached", "what does build_index do",
+          "how are jobs cancelled", "how is the context packed", "where are clones updated", "how does hybrid search work",
+          "what is stored in the manifest", "how are tables chunked"]
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+def variant(rng, q):
+    return rng.choice([q, q + "?", q.capitalize(), q.capitalize() + "?"])
+
+def run(service, repo, questions, use_cache, bump_at):
+    lat = []
+    for i, q in enumerate(questions):
+        if i == bump_at:
+            status = service.INDEX_DIR / f"{repo}_index_meta.json"
+            os.utime(status, ns=(time.time_ns(), time.time_ns()))  # a rebuild: new index version
+        stats = {}
+        t0 = time.perf_counter()
+        "".join(service.answer_repo(repo, q, k=6, stats=stats, use_cache=use_cache))
+        lat.append(time.perf_counter() - t0)
+    return lat
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--questions", type=int, default=100)
+    ap.add_argument("--pool", type=int, default=len(TOPICS), help="distinct questions")
+    ap.add_argument("--ttft", type=float, default=0.2)
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    os.environ["REPOMIND_WORKSPACE"] = str(tmp)
+    stub = start_stub(ttft=args.ttft, token_delay=0.002, tokens=60)
+    os.environ["REPOMIND_OLLAMA_URL"] = stub.url
+    from RAG import service
+    from RAG.embeddings import get_provider
+    from RAG.indexer import build_index
+    try:
+        service.ensure_workspace()
+        repo = "self"
+        shutil.copytree(ROOT / "RAG", service.REPOS_DIR / repo, ignore=shutil.ignore_patterns("__pycache__"))
+        build_index(service.REPOS_DIR / repo, repo, service.INDEX_DIR, get_provider())
+
+        rng = random.Random(0)
+        pool = [TOPICS[i % len(TOPICS)] + ("" if i < len(TOPICS) else f" in module {i}") for i in range(args.pool)]
+        weights = [1 / (i + 1) for i in range(len(pool))]
+        questions = [variant(rng, q) for q in rng.choices(pool, weights, k=args.questions)]
+
+        results = {}
+        for use_cache in (False, True):
+            lat = run(service, repo, questions, use_cache, args.questions // 2)
+            results["cache" if use_cache else "no_cache"] = {
+                "p50_ms": round(pct(lat, 50) * 1000, 1), "p95_ms": round(pct(lat, 95) * 1000, 1),
+                "total_s": round(sum(lat), 2)}
+        results["answer_cache"] = service.answer_cache.stats()
+        print(json.dumps(results, indent=2))
+        if args.json:
+            Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    finally:
+        stub.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Clone time and disk use of full vs. shallow/partial/sparse clones, fetch-based
+update, and the parallel clone pool, against local bare repos over file://.
+
+    python benchmarks/bench_clone.py --commits 50 --files 200 --repos 8 --workers 1,4
+
+Each synthetic repo has a history of `--commits` commits touching code files
+plus a few large binary assets, so depth, blob filtering and sparse checkout
+all have something to save. Everything runs in a temporary directory.
+"""
+import argparse, json, os, subprocess, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from RAG.gitrepo import clone_repo, update_repo, clone_many
+
+CODE_EXTS = [".py", ".md", ".js"]
+MODES = {
+    "full": {},
+    "shallow": {"depth": 1},
+    "partial": {"partial": True},
+    "shallow+partial+sparse": {"depth": 1, "partial": True, "sparse": CODE_EXTS},
+}
+
+def git(*args, cwd=None):
+    env = {**os.environ, "GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@localhost",
+           "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@localhost"}
+    subprocess.check_output(["git", *args], cwd=cwd, env=env, stderr=subprocess.STDOUT)
+
+def make_bare_repo(root: Path, name, commits, files):
+    """A bare repo at root/name.git with `commits` commits; returns its file:// URL."""
+    work = root / f"{name}-work"
+    work.mkdir(parents=True)
+    git("init", "--quiet", "-b", "main", cwd=work)
+    for c in range(commits):
+        for i in range(files):
+            if c == 0 or (i + c) % 7 == 0:
+                ext = CODE_EXTS[i % len(CODE_EXTS)]
+                p = work / f"pkg{i % 10}" / f"mod{i}{ext}"
+                p.parent.mkdir(exist_ok=True)
+                p.write_text("".join(f"def f{i}_{c}_{k}(x):\n    return x + {k}\n" for k in range(40)))
+        if c % 10 == 0:
+            (work / "assets").mkdir(exist_ok=True)
+            (work / "assets" / f"blob{c}.bin").write_bytes(os.urandom(512 * 1024))
+        git("add", "-A", cwd=work)
+        git("commit", "--quiet", "-m", f"commit {c}", cwd=work)
+    bare = root / f"{name}.git"
+    git("clone", "--quiet", "--bare", str(work), str(bare))
+    git("config", "uploadpack.allowFilter", "true", cwd=bare)
+    return work, bare.resolve().as_uri()
+
+def du(path: Path):
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file() and not f.is_symlink())
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--commits", type=int, default=30)
+    ap.add_argument("--files", type=int, default=150)
+    ap.add_argument("--repos", type=int, default=6, help="repos for the parallel clone pool")
+    ap.add_argument("--workers", default="1,4")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    results = {"modes": [], "pool": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        work, url = make_bare_repo(tmp / "src", "demo", args.commits, args.files)
+        print(f"source: {args.commits} commits, {args.files} files  ({url})")
+        for mode, opts in MODES.items():
+            dest = tmp / "clones" / mode
+            res = clone_repo(url, dest, **opts)
+            assert res["status"] == "cloned", res
+            git_bytes = du(dest / ".git")
+            tree_bytes = du(dest) - git_bytes
+            print(f"{mode:<24} {res['seconds']:7.3f}s  .git {git_bytes / 1e6:7.2f} MB  worktree {tree_bytes / 1e6:7.2f} MB")
+            results["modes"].append({"mode": mode, "seconds": res["seconds"],
+                                     "git_bytes": git_bytes, "worktree_bytes": tree_bytes})
+
+        # upstream moves on: update = fetch + fast-forward of an existing clone
+        (work / "pkg0" / "new.py").write_text("def added():\n    return 1\n")
+        git("add", "-A", cwd=work)
+        git("commit", "--quiet", "-m", "one more", cwd=work)
+        git("push", "--quiet", url, "main", cwd=work)
+        dest = tmp / "clones" / "shallow+partial+sparse"
+        t0 = time.perf_counter()
+        res = update_repo(dest)
+        secs = time.perf_counter() - t0
+        assert res["status"] == "updated" and (dest / "pkg0" / "new.py").exists(), res
+        print(f"update (fetch + ff-only)  {secs:7.3f}s  {res['old'][:8]} -> {res['new'][:8]}")
+        results["update_seconds"] = round(secs, 3)
+
+        urls = [make_bare_repo(tmp / "src", f"r{i}", max(2, args.commits // 5), args.files // 2)[1]
+                for i in range(args.repos)]
+        for w in sorted({int(x) for x in args.workers.split(",")}):
+            jobs = [(u, tmp / f"pool{w}" / f"r{i}") for i, u in enumerate(urls)]
+            t0 = time.perf_counter()
+            out = clone_many(jobs, workers=w, depth=1, partial=True)
+            secs = time.perf_counter() - t0
+            assert all(r["status"] == "cloned" for r in out), out
+            print(f"pool: {args.repos} repos, {w} workers  {secs:7.3f}s")
+            results["pool"].append({"repos": args.repos, "workers": w, "seconds": round(secs, 3)})
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
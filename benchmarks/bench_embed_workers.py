@@ -0,0 +1,53 @@
+"""Embedding throughput (chunks/sec) of EmbeddingEngine vs. worker count.
+
+    python benchmarks/bench_embed_workers.py --chunks 4000 --workers 1,2,4,8
+
+Chunk lengths are drawn from a skewed distribution like real code chunks, so
+length bucketing has padding to save. Without sentence-transformers the
+hash-seeded fallback is timed instead, which measures only the fan-out cost.
+"""
+import argparse, json, os, sys, time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from RAG.embeddings import EmbeddingProvider
+from RAG.embedworkers import EmbeddingEngine
+
+WORDS = "def return self import class for if else value data path index repo chunk model".split()
+
+def synthetic_chunks(n, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = np.clip(rng.lognormal(5, 1, n).astype(int), 5, 1200)
+    return [" ".join(rng.choice(WORDS, max(1, l // 6))) for l in lengths]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=2000)
+    ap.add_argument("--workers", default=",".join(str(w) for w in (1, 2, 4, os.cpu_count() or 1)))
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    texts = synthetic_chunks(args.chunks)
+    results = []
+    prov = EmbeddingProvider()
+    t0 = time.perf_counter()
+    prov.encode(texts)
+    base = args.chunks / (time.perf_counter() - t0)
+    print(f"model {prov.model_name}: in-process {base:.1f} chunks/s")
+    results.append({"workers": 0, "chunks_per_sec": round(base, 1)})
+    for w in sorted({int(x) for x in args.workers.split(",")}):
+        engine = EmbeddingEngine(workers=w)
+        engine.encode(texts[:w * 8])  # warm up every worker
+        t0 = time.perf_counter()
+        out = engine.encode(texts)
+        rate = args.chunks / (time.perf_counter() - t0)
+        assert out.shape == (len(texts), engine.dim)
+        print(f"{w:>3} workers x {engine.threads} threads: {rate:9.1f} chunks/s  ({rate / base:.2f}x)")
+        results.append({"workers": w, "threads": engine.threads, "chunks_per_sec": round(rate, 1)})
+        engine.close()
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
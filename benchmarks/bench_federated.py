@@ -0,0 +1,78 @@
+"""Federated search over many repo shards: query latency with 1 vs N fan-out
+threads, per-shard tail latency, and how many shards the memory budget keeps
+resident.
+
+    python benchmarks/bench_federated.py --shards 20 --files 100 --workers 1,8 --memory-mb 5
+
+Shards are generated repos (see bench_pipeline.py) indexed with the
+hash-seeded fallback embedder. Queries favour a few "hot" topics so the heat
+tracking has something to promote.
+"""
+import argparse, json, random, shutil, sys, tempfile, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import RAG.embeddings as embeddings
+from RAG.federated import ShardSet
+from RAG.indexer import build_index
+from benchmarks.bench_pipeline import make_repo, WORDS
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return round(xs[min(len(xs) - 1, int(p / 100 * len(xs)))], 3)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shards", type=int, default=12)
+    ap.add_argument("--files", type=int, default=60, help="files per shard")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=8)
+    ap.add_argument("--mode", default="hybrid", choices=["hybrid", "semantic", "lexical"])
+    ap.add_argument("--workers", default="1,8")
+    ap.add_argument("--memory-mb", type=int, default=4, help="resident budget for hot shards")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    embeddings.HAS_SBER = False
+    provider = embeddings.EmbeddingProvider()
+    work = Path(tempfile.mkdtemp(prefix="repomind-fed-"))
+    index_dir = work / "indexes"
+    index_dir.mkdir()
+    try:
+        t0 = time.perf_counter()
+        for s in range(args.shards):
+            repo = work / "repos" / f"repo{s:03d}"
+            make_repo(repo, args.files, file_kb=3, seed=s)
+            build_index(repo, repo.name, index_dir, provider)
+        print(f"built {args.shards} shards in {time.perf_counter() - t0:.1f}s")
+
+        rng = random.Random(0)
+        hot = [" ".join(rng.choices(WORDS, k=3)) for _ in range(5)]
+        questions = [rng.choice(hot) if rng.random() < 0.7 else " ".join(rng.choices(WORDS, k=4))
+                     for _ in range(args.queries)]
+        qembs = provider.encode(questions)
+        results = []
+        for w in [int(x) for x in args.workers.split(",")]:
+            shards = ShardSet(index_dir, memory_mb=args.memory_mb, workers=w)
+            shards.search(qembs[0], args.k, query=questions[0], mode=args.mode)  # open every shard once
+            lat = []
+            for q, e in zip(questions, qembs):
+                t0 = time.perf_counter()
+                shards.search(None if args.mode == "lexical" else e, args.k, query=q, mode=args.mode)
+                lat.append((time.perf_counter() - t0) * 1000)
+            st = shards.stats()
+            worst = sorted(st["shards"], key=lambda r: r["p99_ms"] or 0, reverse=True)[:3]
+            res = {"workers": w, "p50_ms": pct(lat, 50), "p99_ms": pct(lat, 99),
+                   "resident_shards": sum(r["resident"] for r in st["shards"]), "resident_mb": st["resident_mb"],
+                   "slowest_shards": [{k: r[k] for k in ("repo", "resident", "p50_ms", "p99_ms")} for r in worst]}
+            print(json.dumps(res))
+            results.append(res)
+            shards.pool.shutdown()
+        if args.json:
+            Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
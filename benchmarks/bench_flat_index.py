@@ -0,0 +1,74 @@
+"""Latency of FlatIndex (exact cosine search) as the corpus grows.
+
+    python benchmarks/bench_flat_index.py                    # 10k .. 1M chunks
+    python benchmarks/bench_flat_index.py --sizes 10000,100000,1000000,5000000 --mmap
+
+Large corpora are generated straight into a temporary .npy file and searched
+memory-mapped, the same way the app opens {name}_embs.npy.
+"""
+import argparse, json, sys, tempfile, time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from RAG.vectorindex import FlatIndex, normalize
+
+def make_corpus(n, dim, path=None, seed=0, block=100_000):
+    rng = np.random.default_rng(seed)
+    out = (np.lib.format.open_memmap(str(path), mode="w+", dtype=np.float32, shape=(n, dim))
+           if path else np.empty((n, dim), dtype=np.float32))
+    for s in range(0, n, block):
+        out[s:s + block] = normalize(rng.standard_normal((min(block, n - s), dim), dtype=np.float32))
+    if path:
+        out.flush()
+    return out
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--batch", type=int, default=32, help="queries per batched search")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--mmap", action="store_true", help="search a memory-mapped .npy instead of RAM")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(1)
+    queries = rng.standard_normal((args.batch, args.dim), dtype=np.float32)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(s) for s in args.sizes.split(",")]:
+            path = Path(tmp) / f"corpus_{n}.npy" if args.mmap else None
+            vecs = make_corpus(n, args.dim, path)
+            if path:
+                del vecs
+                index = FlatIndex.load(path)
+            else:
+                index = FlatIndex(args.dim)
+                index.vectors = vecs
+            index.search(queries[0], args.k)  # warm up (page in the mmap)
+            single = timed(lambda: index.search(queries[0], args.k), args.repeat)
+            batch = timed(lambda: index.search_batch(queries, args.k), max(3, args.repeat // 4))
+            row = {"chunks": n, "dim": args.dim, "k": args.k, "mmap": bool(path),
+                   "single_p50_ms": round(float(np.percentile(single, 50)) * 1000, 3),
+                   "single_p99_ms": round(float(np.percentile(single, 99)) * 1000, 3),
+                   "batch_queries": args.batch,
+                   "batch_per_query_ms": round(float(np.median(batch)) * 1000 / args.batch, 3)}
+            results.append(row)
+            print(f"{n:>9} chunks  single p50 {row['single_p50_ms']:>9.3f} ms  p99 {row['single_p99_ms']:>9.3f} ms"
+                  f"  batched {row['batch_per_query_ms']:>8.3f} ms/query")
+            del index
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
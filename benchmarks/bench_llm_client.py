@@ -0,0 +1,110 @@
+"""Load test of the LLM client against the stub server: many concurrent users
+sending prompts from a small pool (so identical prompts overlap), comparing a
+new connection per request (the old frontends), the pooled client, and the
+pooled client with coalescing.
+
+    python benchmarks/bench_llm_client.py --users 32 --rounds 3 --distinct 4
+
+Reported per mode: wall time, generations and TCP connections the server
+saw, time to first token, UI redraws with and without throttling, and
+/api/tags requests for `--reruns` script reruns.
+"""
+import argparse, json, random, statistics, sys, threading, time
+from pathlib import Path
+import requests
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from RAG.llmclient import LLMClient, throttle
+from benchmarks.stub_llm import start_stub
+
+MODES = ["naive", "pooled", "coalesce"]
+
+def naive_generate(url, prompt, model, stats):
+    """The old FrontEnd/ollamamodel.py path: a fresh connection per prompt."""
+    t0 = time.perf_counter()
+    resp = requests.post(f"{url}/api/generate", json={"model": model, "prompt": prompt}, stream=True)
+    for line in resp.iter_lines():
+        if line:
+            piece = json.loads(line).get("response", "")
+            if piece:
+                stats.setdefault("ttft", round(time.perf_counter() - t0, 3))
+                yield piece
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+
+def naive_models(url):
+    try:
+        return [m["name"] for m in requests.get(f"{url}/api/tags", timeout=5).json()["models"]]
+    except Exception:
+        return []
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p / 100 * len(xs)))]
+
+def run_mode(mode, args):
+    stub = start_stub(ttft=args.ttft, token_delay=args.token_delay, tokens=args.tokens)
+    client = None if mode == "naive" else LLMClient(stub.url, coalesce=mode == "coalesce")
+    prompts = [f"explain module number {i} of the repository" for i in range(args.distinct)]
+    ttft, pieces, redraws, errors = [], [], [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.users)
+
+    def user(u):
+        rng = random.Random(u)
+        for _ in range(args.rounds):
+            barrier.wait()  # every round starts together, so identical prompts overlap
+            prompt, stats = rng.choice(prompts), {}
+            stream = naive_generate(stub.url, prompt, "llama3", stats) if client is None \
+                else client.generate(prompt, "llama3", stats)
+            raw = []
+            try:
+                n = sum(1 for _ in throttle((raw.append(p) or p for p in stream), args.interval))
+            except Exception:
+                with lock:
+                    errors.append(1)
+                continue  # keep going: the other users wait for this one at the barrier
+            with lock:
+                ttft.append(stats["ttft"])
+                pieces.append(len(raw))
+                redraws.append(n)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(u,)) for u in range(args.users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    for _ in range(args.reruns):
+        naive_models(stub.url) if client is None else client.models()
+    counts = requests.get(f"{stub.url}/stats").json()
+    stub.shutdown()
+    return {"mode": mode, "requests": len(ttft), "errors": len(errors), "wall_s": round(wall, 2),
+            "generations": counts.get("/api/generate", 0), "connections": counts.get("connections", 0),
+            "ttft_p50": pct(ttft, 50), "ttft_p95": pct(ttft, 95),
+            "redraws_per_reply": round(statistics.mean(pieces), 1), "throttled_redraws": round(statistics.mean(redraws), 1),
+            "tags_requests": counts.get("/api/tags", 0)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=32)
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--distinct", type=int, default=4, help="distinct prompts the users pick from")
+    ap.add_argument("--ttft", type=float, default=0.3)
+    ap.add_argument("--token-delay", type=float, default=0.01)
+    ap.add_argument("--tokens", type=int, default=80)
+    ap.add_argument("--interval", type=float, default=0.1, help="UI throttle interval (s)")
+    ap.add_argument("--reruns", type=int, default=50, help="model-list lookups (one per script rerun)")
+    ap.add_argument("--modes", default=",".join(MODES))
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    results = [run_mode(m, args) for m in args.modes.split(",")]
+    for r in results:
+        print(json.dumps(r))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
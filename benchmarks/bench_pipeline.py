@@ -0,0 +1,263 @@
+"""End-to-end benchmark of the index and query pipeline, stage by stage, with
+a regression check against an earlier run.
+
+    python benchmarks/bench_pipeline.py --files 2000 --json base.json
+    python benchmarks/bench_pipeline.py --files 2000 --baseline base.json --max-regression 0.2
+    python benchmarks/bench_pipeline.py --repo repo_workspace/repos/requests --json requests.json
+
+The repo is either generated (seeded, so runs are comparable: Python, JS and
+markdown files in a nested tree) or an existing local checkout. Stages, each
+timed on its own (best of --repeat) and then once more under tracemalloc for
+its peak Python/NumPy allocation:
+
+    walk      list_blobs (git ls-tree, or hashing every file outside git)
+    read      read_text_file on the reader thread pool
+    chunk     chunk_file
+    embed     EmbeddingProvider.encode in BATCH_SIZE batches (the hash-seeded
+              fallback unless --real-model, so runs are deterministic)
+    lexical   LexicalIndexBuilder over every chunk
+    vectors   FAISS build with the default config (FlatIndex without FAISS)
+    build     build_index from scratch, then `rebuild` with nothing changed
+    query     p50/p99 per retrieval mode over --queries questions
+
+With --baseline, every stage slower (or bigger) than the baseline by more than
+--max-regression (and by more than the noise floors) is reported and the
+exit status is 1.
+"""
+import argparse, json, os, platform, random, resource, shutil, subprocess, sys, tempfile, time, tracemalloc
+from pathlib import Path
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+import RAG.embeddings as embeddings
+from RAG.chunker import chunk_file
+from RAG.indexer import build_index, read_text_file, bounded_map, batched, PATTERNS, BATCH_SIZE, READ_WORKERS, HAS_FAISS
+from RAG.lexical import LexicalIndexBuilder
+from RAG.manifest import list_blobs
+from RAG.store import open_index
+from RAG.vectorindex import FlatIndex, normalize, resolve_config, build_faiss_index, DEFAULT_CONFIG
+
+WORDS = ("index repo chunk vector query embed token path file model cache batch store search score "
+         "build update commit branch page table row column config worker queue job").split()
+MODES = ["semantic", "lexical", "hybrid"]
+
+# ---------- Synthetic repo ----------
+
+def _py_file(rng, n_funcs):
+    out = [f'"""{" ".join(rng.choices(WORDS, k=12))}."""', "import os, json", ""]
+    for i in range(n_funcs):
+        if i % 5 == 0:
+            out += [f"class {rng.choice(WORDS).title()}{i}:", "    def __init__(self, path):", "        self.path = path", ""]
+        a, b = rng.sample(WORDS, 2)
+        out += [f"def {a}_{b}_{i}({a}, {b}=None):", f'    """{" ".join(rng.choices(WORDS, k=10))}."""']
+        out += [f"    {rng.choice(WORDS)} = {a} + {rng.randint(0, 99)}  # {' '.join(rng.choices(WORDS, k=5))}"
+                for _ in range(rng.randint(3, 12))]
+        out += [f"    return {a}", ""]
+    return "\n".join(out)
+
+def _js_file(rng, n_funcs):
+    out = []
+    for i in range(n_funcs):
+        a, b = rng.sample(WORDS, 2)
+        out += [f"function {a}{b.title()}{i}({a}, {b}) {{"]
+        out += [f"  const {rng.choice(WORDS)}{j} = {a}.{rng.choice(WORDS)}({b});" for j in range(rng.randint(3, 10))]
+        out += [f"  return {a};", "}", ""]
+    return "\n".join(out)
+
+def _md_file(rng, n_sections):
+    out = [f"# {' '.join(rng.choices(WORDS, k=3)).title()}", ""]
+    for _ in range(n_sections):
+        out += [f"## {' '.join(rng.choices(WORDS, k=2)).title()}", ""]
+        out += [" ".join(rng.choices(WORDS, k=rng.randint(20, 60))) + ".", ""]
+    return "\n".join(out)
+
+def make_repo(dest: Path, files, file_kb=4, depth=3, fanout=6, seed=0, git=False):
+    """Write `files` source files (~file_kb KB each) under `dest`; returns total bytes."""
+    rng = random.Random(seed)
+    dirs = [Path(".")]
+    for level in range(depth):
+        dirs += [d / f"pkg{level}_{i}" for d in dirs if len(d.parts) == level for i in range(fanout)]
+    total = 0
+    for i in range(files):
+        d = dest / rng.choice(dirs)
+        d.mkdir(parents=True, exist_ok=True)
+        kind = rng.choices(["py", "js", "md"], weights=[6, 2, 2])[0]
+        units = max(1, file_kb * 1024 // (250 if kind == "py" else 200 if kind == "js" else 300))
+        text = {"py": _py_file, "js": _js_file, "md": _md_file}[kind](rng, units)
+        (d / f"{rng.choice(WORDS)}_{i}.{kind}").write_text(text, encoding="utf-8")
+        total += len(text)
+    if git:
+        env = {**os.environ, "GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@localhost",
+               "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@localhost"}
+        for cmd in (["init", "-q"], ["add", "-A"], ["commit", "-q", "-m", "synthetic"]):
+            subprocess.run(["git", "-C", str(dest), *cmd], check=True, env=env)
+    return total
+
+# ---------- Stages ----------
+
+def measure(fn, repeat, memory):
+    """Run fn() `repeat` times: best seconds, its last result, and (memory) the peak MB of one more traced run."""
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        secs = time.perf_counter() - t0
+        best = secs if best is None else min(best, secs)
+    res = {"seconds": round(best, 4)}
+    if memory:
+        tracemalloc.start()
+        fn()
+        res["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+    return res, out
+
+def run(repo: Path, work: Path, provider, args):
+    stages, memory = {}, not args.no_memory
+
+    res, blobs = measure(lambda: list_blobs(repo, PATTERNS), args.repeat, memory)
+    rels = sorted(blobs)
+    stages["walk"] = {**res, "items": len(rels)}
+
+    read = lambda: list(bounded_map(lambda rel: read_text_file(repo / rel), rels, READ_WORKERS))
+    res, texts = measure(read, args.repeat, memory)
+    stages["read"] = {**res, "items": len(texts), "mb": round(sum(map(len, texts)) / 2 ** 20, 2)}
+
+    chunk = lambda: [c for rel, t in zip(rels, texts) if t.strip() for c in chunk_file(rel, t)]
+    res, chunks = measure(chunk, args.repeat, memory)
+    stages["chunk"] = {**res, "items": len(chunks)}
+    chunk_texts = [c["text"] for c in chunks]
+
+    embed = lambda: np.concatenate([provider.encode(b) for b in batched(chunk_texts, BATCH_SIZE)]) \
+        if chunk_texts else np.zeros((0, provider.dim), np.float32)
+    res, vecs = measure(embed, 1, memory)  # the slow one: time it once
+    stages["embed"] = {**res, "items": len(vecs), "model": provider.model_name}
+    vecs = normalize(vecs)
+
+    def lexical():
+        b = LexicalIndexBuilder()
+        for row, t in enumerate(chunk_texts):
+            b.add(row, t)
+        return b
+    res, _ = measure(lexical, args.repeat, memory)
+    stages["lexical"] = {**res, "items": len(chunk_texts)}
+
+    if HAS_FAISS:
+        cfg = resolve_config(DEFAULT_CONFIG, len(vecs), provider.dim)
+        res, _ = measure(lambda: build_faiss_index(cfg, vecs), args.repeat, memory)
+        stages["vectors"] = {**res, "kind": cfg["kind"]}
+    else:
+        def flat():
+            idx = FlatIndex(provider.dim)
+            idx.add(vecs)
+            return idx
+        res, _ = measure(flat, args.repeat, memory)
+        stages["vectors"] = {**res, "kind": "flat (numpy)"}
+
+    index_dir = work / "indexes"
+    def build():
+        shutil.rmtree(index_dir, ignore_errors=True)
+        index_dir.mkdir()
+        return build_index(repo, "bench", index_dir, provider)
+    res, summary = measure(build, 1, memory)
+    stages["build"] = {**res, "chunks": summary["chunks"]}
+    res, _ = measure(lambda: build_index(repo, "bench", index_dir, provider), args.repeat, memory)
+    stages["rebuild"] = res
+
+    rng = random.Random(1)
+    questions = [" ".join(rng.choices(WORDS, k=rng.randint(2, 6))) for _ in range(args.queries)]
+    idx = open_index(index_dir, "bench")
+    query = {}
+    for mode in MODES:
+        lat = []
+        for q in questions:
+            t0 = time.perf_counter()
+            qemb = None if mode == "lexical" else provider.embed([q])[0]
+            idx.search(qemb, args.k, query=q, mode=mode)
+            lat.append((time.perf_counter() - t0) * 1000)
+        lat.sort()
+        query[mode] = {"p50_ms": round(lat[len(lat) // 2], 3), "p99_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.99))], 3)}
+    return stages, query
+
+# ---------- Regression check ----------
+
+def compare(new, base, max_regression, min_seconds, min_mb):
+    """[(metric, baseline, new, ratio)] of everything that got worse by more than max_regression."""
+    worse = []
+    def check(name, b, n, floor):
+        if b is not None and n is not None and n > b * (1 + max_regression) and n - b > floor:
+            worse.append((name, b, n, round(n / b, 2) if b else float("inf")))
+    for stage, res in new["stages"].items():
+        old = base.get("stages", {}).get(stage, {})
+        check(f"{stage}.seconds", old.get("seconds"), res.get("seconds"), min_seconds)
+        check(f"{stage}.peak_mb", old.get("peak_mb"), res.get("peak_mb"), min_mb)
+    for mode, res in new["query"].items():
+        old = base.get("query", {}).get(mode, {})
+        for p in ("p50_ms", "p99_ms"):
+            check(f"query.{mode}.{p}", old.get(p), res.get(p), min_seconds * 1000)
+    return worse
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repo", help="benchmark this local checkout instead of a generated repo")
+    ap.add_argument("--files", type=int, default=500)
+    ap.add_argument("--file-kb", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--git", action="store_true", help="commit the generated repo (walk via git ls-tree)")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--real-model", action="store_true", help="embed with sentence-transformers if installed")
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--baseline", help="earlier --json output to compare against")
+    ap.add_argument("--max-regression", type=float, default=0.2, help="allowed slowdown/growth (0.2 = 20%%)")
+    ap.add_argument("--min-seconds", type=float, default=0.005, help="ignore time differences below this")
+    ap.add_argument("--min-mb", type=float, default=1.0, help="ignore memory differences below this")
+    args = ap.parse_args()
+
+    if not args.real_model:
+        embeddings.HAS_SBER = False
+    provider = embeddings.EmbeddingProvider()
+    work = Path(tempfile.mkdtemp(prefix="repomind-bench-"))
+    try:
+        if args.repo:
+            repo = Path(args.repo).resolve()
+            config = {"repo": str(repo)}
+        else:
+            repo = work / "repo"
+            size = make_repo(repo, args.files, args.file_kb, seed=args.seed, git=args.git)
+            config = {"files": args.files, "file_kb": args.file_kb, "seed": args.seed, "git": args.git,
+                      "mb": round(size / 2 ** 20, 2)}
+        stages, query = run(repo, work, provider, args)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    result = {"config": {**config, "queries": args.queries, "k": args.k, "repeat": args.repeat},
+              "env": {"python": platform.python_version(), "numpy": np.__version__, "faiss": HAS_FAISS,
+                      "model": provider.model_name, "cpus": os.cpu_count()},
+              "stages": stages, "query": query,
+              "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+    for name, res in stages.items():
+        extra = "  ".join(f"{k}={v}" for k, v in res.items() if k not in ("seconds", "peak_mb"))
+        mem = f"  peak {res['peak_mb']:7.1f} MB" if "peak_mb" in res else ""
+        print(f"{name:<8} {res['seconds']:9.4f}s{mem}  {extra}")
+    for mode, res in query.items():
+        print(f"query {mode:<9} p50 {res['p50_ms']:8.3f} ms  p99 {res['p99_ms']:8.3f} ms")
+    print(f"max RSS {result['max_rss_mb']} MB")
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        if base.get("config") != result["config"]:
+            print("warning: baseline was run with a different config", file=sys.stderr)
+        worse = compare(result, base, args.max_regression, args.min_seconds, args.min_mb)
+        for name, b, n, ratio in worse:
+            print(f"REGRESSION {name}: {b} -> {n} (x{ratio})")
+        if worse:
+            sys.exit(1)
+        print(f"no regressions beyond {args.max_regression:.0%} of {args.baseline}")
+
+if __name__ == "__main__":
+    main()
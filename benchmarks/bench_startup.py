@@ -0,0 +1,102 @@
+"""Cold-start cost: how long a fresh interpreter takes to import the app and
+the service, which heavy optional packages get pulled in on the way, and
+whether the import touches the workspace. Exits 1 when a module is over its
+import-time budget, imports a heavy package or creates workspace directories.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --modules RAG.service --budget-ms 400 --repeat 10
+    python benchmarks/bench_startup.py --json startup.json
+
+Each import runs in its own interpreter (median of --repeat), in an empty
+workspace and with the LLM URL pointing at a closed port. `app` is imported
+with Streamlit already loaded, as it is under `streamlit run`, so its time is
+the script's own cost (one bare-mode render included). The slowest imports
+below the module come from `python -X importtime`.
+"""
+import argparse, json, os, statistics, subprocess, sys, tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# must stay out of a cold start: imported on first index/search/extract only
+HEAVY = ["faiss", "torch", "sentence_transformers", "transformers", "tiktoken",
+         "pandas", "pyarrow", "openpyxl", "fitz", "docx", "pptx"]
+PRELOAD = {"app": "streamlit"}
+
+PROBE = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+{preload}
+t0 = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - t0
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def probe(module, workspace, importtime=False):
+    code = PROBE.format(root=str(ROOT), module=module, heavy=HEAVY,
+                        preload=f"import {PRELOAD[module]}" if module in PRELOAD else "")
+    env = {**os.environ, "REPOMIND_WORKSPACE": str(workspace), "REPOMIND_OLLAMA_URL": "http://127.0.0.1:9",
+           "REPOMIND_WARMUP": "0"}
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    out = subprocess.run(cmd, cwd=workspace.parent, env=env, capture_output=True, text=True, timeout=300)
+    if out.returncode:
+        raise RuntimeError(f"import {module} failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1]), out.stderr
+
+def slowest_imports(stderr, module, n=8):
+    """[(ms cumulative, name)] of the slowest direct imports of `module` (preloads left out)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        if name.strip() == PRELOAD.get(module) and not name.startswith("  "):
+            rows = []   # everything so far was imported by the preload
+        elif name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modules", default="RAG.service,app")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=1000, help="median import time allowed per module")
+    ap.add_argument("--allow-heavy", action="store_true", help="don't fail when a heavy package is imported")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    results, failures = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp) / "ws"
+        for module in args.modules.split(","):
+            runs = [probe(module, workspace)[0] for _ in range(args.repeat)]
+            _, stderr = probe(module, workspace, importtime=True)
+            ms = [r["seconds"] * 1000 for r in runs]
+            res = {"module": module, "median_ms": round(statistics.median(ms), 1), "min_ms": round(min(ms), 1),
+                   "heavy": sorted({m for r in runs for m in r["heavy"]}),
+                   "workspace_created": workspace.exists(),
+                   "slowest": [{"ms": round(t, 1), "import": name} for t, name in slowest_imports(stderr, module)]}
+            print(f"{module:<12} median {res['median_ms']:8.1f} ms  min {res['min_ms']:8.1f} ms"
+                  f"  heavy: {', '.join(res['heavy']) or '-'}")
+            for row in res["slowest"]:
+                print(f"    {row['ms']:8.1f} ms  {row['import']}")
+            if res["median_ms"] > args.budget_ms:
+                failures.append(f"{module}: {res['median_ms']} ms > budget {args.budget_ms} ms")
+            if res["heavy"] and not args.allow_heavy:
+                failures.append(f"{module}: imports {', '.join(res['heavy'])} at startup")
+            if res["workspace_created"]:
+                failures.append(f"{module}: creates the workspace on import")
+            results.append(res)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"budget_ms": args.budget_ms, "results": results}, indent=2),
+                                   encoding="utf-8")
+    if failures:
+        print("\n".join(["FAIL"] + failures))
+        sys.exit(1)
+    print(f"all modules within {args.budget_ms:.0f} ms")
+
+if __name__ == "__main__":
+    main()
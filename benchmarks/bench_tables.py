@@ -0,0 +1,87 @@
+"""Peak memory and time of table ingestion: the old whole-DataFrame
+`to_string` path vs. the streaming row-group reader, on a generated CSV/XLSX.
+
+    python benchmarks/bench_tables.py --csv-mb 200 --xlsx-rows 50000
+
+Every mode runs in a fresh subprocess so its peak RSS (ru_maxrss) is its own;
+the figure reported is the peak above the interpreter with the imports loaded.
+"""
+import argparse, json, resource, subprocess, sys, tempfile, time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+MODES = ["legacy", "stream", "stream-pandas"]  # stream: pyarrow for CSV when installed
+
+def write_csv(path: Path, mb):
+    row = 0
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("id,name,region,amount,comment\n")
+        while fh.tell() < mb * 1_000_000:
+            fh.writelines(f"{i},customer_{i % 9973},region_{i % 17},{i * 0.37:.2f},order note {i % 101}\n"
+                          for i in range(row, row + 10000))
+            row += 10000
+
+def write_xlsx(path: Path, rows):
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("orders")
+    ws.append(["id", "name", "region", "amount"])
+    for i in range(rows):
+        ws.append([i, f"customer_{i % 9973}", f"region_{i % 17}", i * 0.37])
+    wb.save(path)
+
+def run_mode(mode, path):
+    """Child process: ingest `path` and print {"seconds", "peak_mb", "units"}."""
+    import RAG.filereader as fr
+    import pandas as pd
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        df = pd.read_csv(path) if path.endswith(".csv") else pd.read_excel(path)
+        df.to_string(index=False)
+        units = 1
+    else:
+        fr.HAS_PYARROW = fr.HAS_PYARROW and mode != "stream-pandas"
+        units = sum(1 for _ in fr.iter_pages(path))
+    secs = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+    print(json.dumps({"seconds": round(secs, 2), "peak_mb": round(peak / 1024, 1), "units": units}))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv-mb", type=int, default=50)
+    ap.add_argument("--xlsx-rows", type=int, default=20000)
+    ap.add_argument("--modes", default=",".join(MODES))
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        return run_mode(*args.child)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [Path(tmp) / "big.csv"]
+        write_csv(files[0], args.csv_mb)
+        if args.xlsx_rows:
+            files.append(Path(tmp) / "big.xlsx")
+            write_xlsx(files[1], args.xlsx_rows)
+        for f in files:
+            print(f"{f.name}: {f.stat().st_size / 1e6:.1f} MB")
+            for mode in args.modes.split(","):
+                if f.suffix == ".xlsx" and mode == "stream-pandas":
+                    continue  # xlsx always streams through openpyxl
+                out = subprocess.run([sys.executable, __file__, "--child", mode, str(f)],
+                                     capture_output=True, text=True, cwd=ROOT)
+                if out.returncode:
+                    print(f"  {mode:<15} failed: {out.stderr.strip().splitlines()[-1]}")
+                    continue
+                r = json.loads(out.stdout)
+                print(f"  {mode:<15} {r['seconds']:7.2f}s  peak +{r['peak_mb']:8.1f} MB")
+                results.append({"file": f.name, "mode": mode, **r})
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Recall@k vs. latency of every ANN config in RAG/vectorindex.INDEX_CONFIGS.
+
+Each config is built over the same corpus and checked against exact search
+(FlatIndex) on the same queries.
+
+    python benchmarks/eval_ann.py --n 200000                       # synthetic corpus
+    python benchmarks/eval_ann.py --embs repo_workspace/indexes/requests_embs.npy
+    python benchmarks/eval_ann.py --configs hnsw,ivf-pq --ef-search 16,64,256 --nprobe 4,16,64
+"""
+import argparse, json, sys, time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from RAG.vectorindex import (FlatIndex, INDEX_CONFIGS, normalize, resolve_config,
+                             build_faiss_index, set_search_params, recall_at_k)
+import faiss
+
+def synthetic_corpus(n, dim, clusters=256, seed=0):
+    # clustered like real embeddings, so IVF/PQ behave as they would on a repo
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    out = np.empty((n, dim), dtype=np.float32)
+    for s in range(0, n, 100_000):
+        m = min(100_000, n - s)
+        out[s:s + m] = centers[rng.integers(0, clusters, m)] + 0.5 * rng.standard_normal((m, dim), dtype=np.float32)
+    return normalize(out)
+
+def variants(name, args):
+    """The config plus its search-time sweeps (efSearch / nprobe)."""
+    cfg = INDEX_CONFIGS[name]
+    if cfg["kind"] == "hnsw" and args.ef_search:
+        return [dict(cfg, ef_search=int(v)) for v in args.ef_search.split(",")]
+    if cfg["kind"].startswith("ivf") and args.nprobe:
+        return [dict(cfg, nprobe=int(v)) for v in args.nprobe.split(",")]
+    return [cfg]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--embs", help="stored {name}_embs.npy to evaluate on (default: synthetic)")
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--configs", default=",".join(INDEX_CONFIGS))
+    ap.add_argument("--ef-search", default="")
+    ap.add_argument("--nprobe", default="")
+    ap.add_argument("--json", help="write results to this file")
+    args = ap.parse_args()
+
+    if args.embs:
+        corpus = normalize(np.load(args.embs, mmap_mode="r"))
+    else:
+        corpus = synthetic_corpus(args.n, args.dim)
+    n, dim = corpus.shape
+    rng = np.random.default_rng(1)
+    # queries near (not on) stored chunks, like questions about existing code
+    queries = normalize(corpus[rng.choice(n, args.queries)] + 0.3 * rng.standard_normal((args.queries, dim), dtype=np.float32) / dim ** 0.5)
+
+    exact = FlatIndex(dim)
+    exact.vectors = corpus
+    t0 = time.perf_counter()
+    _, truth = exact.search_batch(queries, args.k)
+    exact_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+    print(f"corpus {n} x {dim}, {len(queries)} queries, k={args.k}; exact search {exact_ms:.3f} ms/query")
+    print(f"{'config':<10} {'params':<44} {'build s':>8} {'MB':>8} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8}")
+
+    results = []
+    for name in args.configs.split(","):
+        built = None
+        for cfg in variants(name, args):
+            cfg = resolve_config(cfg, n, dim)
+            if built is None:
+                t0 = time.perf_counter()
+                built = build_faiss_index(cfg, corpus)
+                build_s = time.perf_counter() - t0
+                size_mb = len(faiss.serialize_index(built)) / 2 ** 20
+            set_search_params(built, cfg)
+            lat = []
+            found = np.empty((len(queries), args.k), dtype=np.int64)
+            for i, q in enumerate(queries):
+                t0 = time.perf_counter()
+                _, I = built.search(q.reshape(1, -1), args.k)
+                lat.append(time.perf_counter() - t0)
+                found[i] = I[0]
+            params = {k: v for k, v in cfg.items() if k != "kind"}
+            shown = " ".join(f"{k}={v}" for k, v in params.items())
+            row = {"config": name, "params": params, "build_s": round(build_s, 2), "size_mb": round(size_mb, 1),
+                   f"recall@{args.k}": round(recall_at_k(found, truth), 4),
+                   "p50_ms": round(float(np.percentile(lat, 50)) * 1000, 3),
+                   "p99_ms": round(float(np.percentile(lat, 99)) * 1000, 3)}
+            results.append(row)
+            print(f"{name:<10} {shown:<44.44} {row['build_s']:>8.2f} {row['size_mb']:>8.1f} "
+                  f"{row[f'recall@{args.k}']:>7.3f} {row['p50_ms']:>8.3f} {row['p99_ms']:>8.3f}")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"n": n, "dim": dim, "exact_ms": exact_ms, "results": results}, indent=2),
+                                   encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Local stand-in for an Ollama server, for exercising the answer pipeline
+without a model: /api/tags, /api/chat and /api/generate, streamed as NDJSON
+with a configurable time to first token and per-token delay.
+
+    python benchmarks/stub_llm.py --port 11500 --ttft 0.3 --token-delay 0.02
+    REPOMIND_OLLAMA_URL=http://127.0.0.1:11500 streamlit run app.py
+
+GET /stats returns the request (and TCP connection) counts seen so far.
+"""
+import argparse, json, threading, time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class StubLLM(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128   # load tests open many connections at once
+
+    def __init__(self, addr, models=("llama3", "stub"), ttft=0.2, token_delay=0.01, tokens=40):
+        super().__init__(addr, _Handler)
+        self.models = list(models)
+        self.ttft = ttft
+        self.token_delay = token_delay
+        self.tokens = tokens
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def finish_request(self, request, client_address):
+        with self.lock:
+            self.counts["connections"] += 1
+        super().finish_request(request, client_address)
+
+    def handle_error(self, request, client_address):
+        pass  # clients hanging up mid-stream are expected
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+def start_stub(port=0, **kwargs):
+    """Run a StubLLM on a background thread; returns the server (see .url, .shutdown())."""
+    server = StubLLM(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _reply_words(prompt, n):
+    words = [w for w in prompt.split() if w.isalnum()][-8:] or ["nothing"]
+    return [f"{words[i % len(words)]} " for i in range(n)]
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _json(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _chunk(self, obj):
+        data = (json.dumps(obj) + "\n").encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        srv = self.server
+        with srv.lock:
+            srv.counts[self.path] += 1
+        if self.path == "/api/tags":
+            return self._json(200, {"models": [{"name": m, "model": m} for m in srv.models]})
+        if self.path == "/stats":
+            return self._json(200, dict(srv.counts))
+        self._json(404, {"error": "not found"})
+
+    def do_POST(self):
+        srv = self.server
+        with srv.lock:
+            srv.counts[self.path] += 1
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if self.path not in ("/api/chat", "/api/generate"):
+            return self._json(404, {"error": "not found"})
+        if body.get("model") not in srv.models:
+            return self._json(404, {"error": f"model '{body.get('model')}' not found"})
+        chat = self.path == "/api/chat"
+        prompt = body["messages"][-1]["content"] if chat else body.get("prompt", "")
+        prompt_tokens = sum(len(m["content"]) // 4 for m in body.get("messages", [])) if chat else len(prompt) // 4
+        words = _reply_words(prompt, srv.tokens)
+        piece = (lambda w: {"message": {"role": "assistant", "content": w}}) if chat else (lambda w: {"response": w})
+        time.sleep(srv.ttft)
+        if body.get("stream") is False:
+            return self._json(200, {**piece("".join(words)), "done": True,
+                                    "prompt_eval_count": prompt_tokens, "eval_count": len(words)})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for w in words:
+            self._chunk({**piece(w), "done": False})
+            time.sleep(srv.token_delay)
+        self._chunk({**piece(""), "done": True, "prompt_eval_count": prompt_tokens, "eval_count": len(words)})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, fmt, *args):
+        pass
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=11500)
+    ap.add_argument("--ttft", type=float, default=0.2, help="seconds before the first token")
+    ap.add_argument("--token-delay", type=float, default=0.01)
+    ap.add_argument("--tokens", type=int, default=40)
+    args = ap.parse_args()
+    server = StubLLM(("127.0.0.1", args.port), ttft=args.ttft, token_delay=args.token_delay, tokens=args.tokens)
+    print(f"stub LLM on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import hashlib, sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# the tests import RAG/ and benchmarks/ (stub server, synthetic repos) from the checkout
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+class HashProvider:
+    """Deterministic stand-in for an embedding model: a vector per text, nothing downloaded."""
+
+    model_name = "test-hash"
+    dim = 32
+
+    def __init__(self):
+        self.embedded = 0
+
+    def embed(self, texts, cache=None):
+        self.embedded += len(texts)
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            out[i] = np.random.default_rng(int(hashlib.sha1(t.encode()).hexdigest()[:8], 16)).random(self.dim)
+        return out
+
+@pytest.fixture
+def provider():
+    return HashProvider()
+
+@pytest.fixture
+def small_repo(tmp_path):
+    """A plain directory (no git) with a few Python files."""
+    root = tmp_path / "repo"
+    root.mkdir()
+    for i in range(4):
+        (root / f"mod{i}.py").write_text("".join(f"def f{i}_{k}(x):\n    return x + {k}\n\n" for k in range(30)))
+    return root
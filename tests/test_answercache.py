@@ -0,0 +1,72 @@
+import numpy as np
+
+from RAG.answercache import AnswerCache
+
+PARAMS = (8, "hybrid", "llama3")
+
+def vec(*values, dim=8):
+    v = np.zeros(dim, dtype=np.float32)
+    v[:len(values)] = values
+    return v
+
+def put(cache, v, question="q", version=1, repo="demo", params=PARAMS, seconds=1.0):
+    cache.put(repo, version, v, question, f"answer to {question}", params, [{"id": 1}], {"sources": []}, seconds)
+
+def test_similar_question_hits():
+    cache = AnswerCache(similarity=0.9)
+    put(cache, vec(1, 0), "how is auth handled")
+    hit = cache.get("demo", 1, vec(1, 0.1), PARAMS)
+    assert hit["question"] == "how is auth handled" and hit["answer"] == "answer to how is auth handled"
+    assert hit["results"] == [{"id": 1}] and hit["similarity"] > 0.9
+    assert "vec" not in hit
+
+def test_dissimilar_question_misses():
+    cache = AnswerCache(similarity=0.9)
+    put(cache, vec(1, 0))
+    assert cache.get("demo", 1, vec(1, 1), PARAMS) is None    # cosine 0.71
+    assert cache.get("demo", 1, vec(0, 1), PARAMS) is None
+    assert cache.get("other", 1, vec(1, 0), PARAMS) is None
+
+def test_best_match_with_same_params():
+    cache = AnswerCache(similarity=0.8)
+    put(cache, vec(1, 0), "exact", params=(4, "lexical", "llama3"))
+    put(cache, vec(1, 0.2), "close")
+    assert cache.get("demo", 1, vec(1, 0), PARAMS)["question"] == "close"
+    assert cache.get("demo", 1, vec(1, 0), (4, "lexical", "llama3"))["question"] == "exact"
+    assert cache.get("demo", 1, vec(1, 0), (8, "hybrid", "other-model")) is None
+
+def test_new_index_version_invalidates():
+    cache = AnswerCache()
+    put(cache, vec(1), version=1)
+    assert cache.get("demo", 1, vec(1), PARAMS) is not None
+    assert cache.get("demo", 2, vec(1), PARAMS) is None
+    assert cache.stats()["invalidations"] == 1 and cache.stats()["entries"] == 0
+    put(cache, vec(1), version=2)
+    cache.forget("demo")
+    assert cache.get("demo", 2, vec(1), PARAMS) is None
+
+def test_lru_eviction():
+    cache = AnswerCache(max_entries=2)
+    put(cache, vec(1), "a")
+    put(cache, vec(0, 1), "b")
+    cache.get("demo", 1, vec(1), PARAMS)           # a is now the most recently used
+    put(cache, vec(0, 0, 1), "c")
+    assert cache.get("demo", 1, vec(0, 1), PARAMS) is None
+    assert cache.get("demo", 1, vec(1), PARAMS)["question"] == "a"
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_expiry():
+    cache = AnswerCache(ttl=-1)
+    put(cache, vec(1))
+    assert cache.get("demo", 1, vec(1), PARAMS) is None
+    assert cache.stats()["evictions"] == 1
+
+def test_stats():
+    cache = AnswerCache()
+    put(cache, vec(1), seconds=2.5)
+    cache.get("demo", 1, vec(1), PARAMS)
+    cache.get("demo", 1, vec(1), PARAMS)
+    cache.get("demo", 1, vec(0, 1), PARAMS)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 1, 0.667)
+    assert stats["saved_seconds"] == 5.0 and stats["entries"] == 1
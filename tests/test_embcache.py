@@ -0,0 +1,38 @@
+import numpy as np
+
+from RAG.embcache import EmbeddingCache
+
+def vecs(*values, dim=4):
+    return [np.full(dim, v, dtype=np.float32) for v in values]
+
+def reopen(cache, root):
+    cache.close()
+    return EmbeddingCache(root, "m", 4, capacity=cache.capacity)
+
+def test_roundtrip_and_reopen(tmp_path):
+    cache = EmbeddingCache(tmp_path, "m", 4, capacity=8)
+    cache.put_many(["a", "b"], vecs(1, 2))
+    got = cache.get_many(["a", "x", "b"])
+    assert got[1] is None and (got[0] == 1).all() and (got[2] == 2).all()
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache = reopen(cache, tmp_path)
+    assert len(cache) == 2 and (cache.get_many(["b"])[0] == 2).all()
+
+def test_lru_eviction(tmp_path):
+    cache = EmbeddingCache(tmp_path, "m", 4, capacity=2)
+    cache.put_many(["a", "b"], vecs(1, 2))
+    cache.get_many(["a"])                       # b is now the least recently used
+    cache.put_many(["c"], vecs(3))
+    a, b, c = cache.get_many(["a", "b", "c"])
+    assert b is None and (a == 1).all() and (c == 3).all()
+
+def test_unsaved_eviction_is_not_served_after_reopen(tmp_path):
+    cache = EmbeddingCache(tmp_path, "m", 4, capacity=2)
+    cache.put_many(["a", "b"], vecs(1, 2))
+    cache.save()
+    cache.put_many(["c"], vecs(3))              # reuses a's row; index.json still maps a to it
+    cache._lock_file.close()                    # the process goes away without save()
+    cache = EmbeddingCache(tmp_path, "m", 4, capacity=2)
+    a, b, c = cache.get_many(["a", "b", "c"])
+    assert a is None and c is None and (b == 2).all()
+    assert len(cache) == 1 and len(cache.free) == 1
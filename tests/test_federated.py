@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from RAG.federated import ShardSet
+from RAG.indexer import build_index
+from RAG.store import OpenIndex
+
+def _shards(small_repo, tmp_path, provider, n=3, **kw):
+    index_dir = tmp_path / "indexes"
+    index_dir.mkdir()
+    for s in range(n):
+        build_index(small_repo, f"repo{s}", index_dir, provider)
+    return index_dir, ShardSet(index_dir, workers=2, **kw)
+
+def test_search_merges_shards(small_repo, tmp_path, provider):
+    _, shards = _shards(small_repo, tmp_path, provider)
+    results, info = shards.search(provider.embed(["f1_3"])[0], k=6, query="f1_3")
+    assert info["shards"] == 3 and not info["failed"]
+    assert {r["repo"] for r in results} <= {"repo0", "repo1", "repo2"}
+
+def test_replaced_shard_closed_after_last_search(small_repo, tmp_path, provider):
+    index_dir, shards = _shards(small_repo, tmp_path, provider, n=1)
+    old = shards._acquire("repo0")      # a search still running on the shard
+    shards._release(shards._acquire("repo0"))
+    (small_repo / "mod1.py").write_text("def changed():\n    return 1\n")
+    build_index(small_repo, "repo0", index_dir, provider)
+    shards.search(provider.embed(["changed"])[0], k=3, query="changed")
+    assert shards.shards["repo0"] is not old
+    assert old.search(provider.embed(["f0_1"])[0], 3, query="f0_1")   # not closed under the search
+    shards._release(old)
+    assert not shards.retired and old not in shards.users
+    with pytest.raises(sqlite3.ProgrammingError):     # closed once released
+        old.meta.get([0])
+
+def test_cold_shards_evicted(small_repo, tmp_path, provider):
+    _, shards = _shards(small_repo, tmp_path, provider, n=4, max_open=2, memory_mb=0)
+    qvec = provider.embed(["f2_7"])[0]
+    for name in ("repo0", "repo1", "repo2", "repo3"):
+        shards.search(qvec, k=3, query="f2_7", repos=[name])
+    assert list(shards.shards) == ["repo2", "repo3"]
+    stats = shards.stats()
+    assert stats["open"] == 2 and stats["max_open"] == 2
+
+def test_lexical_counted_in_budget(small_repo, tmp_path, provider):
+    index_dir, shards = _shards(small_repo, tmp_path, provider, n=3)
+    lexical = OpenIndex(index_dir, "repo0").lexical.nbytes()
+    shards.budget = lexical * 3 // 2     # room for one shard's BM25 postings, no vectors
+    qvec = provider.embed(["f3_1"])[0]
+    for name in ("repo0", "repo1", "repo2"):
+        shards.search(qvec, k=3, query="f3_1", repos=[name])
+    assert list(shards.shards) == ["repo2"] and not shards.hot
+    stats = shards.stats()
+    assert stats["resident_mb"] == round(lexical / 2 ** 20, 1) and stats["shards"][-1]["lexical_mb"] is not None
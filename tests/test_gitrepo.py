@@ -0,0 +1,85 @@
+import subprocess
+
+import pytest
+
+from benchmarks.bench_clone import make_bare_repo, git
+from RAG.gitrepo import clone_repo, update_repo, clone_many, repo_name_from_url
+
+def out(*args, cwd):
+    return subprocess.check_output(["git", *args], cwd=cwd, text=True).strip()
+
+@pytest.fixture
+def upstream(tmp_path):
+    """(work tree, file:// URL of its bare copy): 3 commits of .py/.md/.js files plus a binary asset."""
+    return make_bare_repo(tmp_path / "src", "demo", commits=3, files=8)
+
+def push(work, rel, text):
+    (work / rel).write_text(text)
+    git("add", "-A", cwd=work)
+    git("commit", "--quiet", "-m", f"edit {rel}", cwd=work)
+    git("push", "--quiet", str(work.parent / "demo.git"), "main", cwd=work)
+
+def test_full_clone(upstream, tmp_path):
+    res = clone_repo(upstream[1], tmp_path / "full")
+    assert res["status"] == "cloned"
+    assert out("rev-list", "--count", "HEAD", cwd=res["path"]) == "3"
+
+def test_shallow_clone(upstream, tmp_path):
+    res = clone_repo(upstream[1], tmp_path / "shallow", depth=1)
+    assert res["status"] == "cloned"
+    assert out("rev-list", "--count", "HEAD", cwd=res["path"]) == "1"
+    assert out("rev-parse", "--is-shallow-repository", cwd=res["path"]) == "true"
+
+def test_partial_clone(upstream, tmp_path):
+    res = clone_repo(upstream[1], tmp_path / "partial", partial=True)
+    assert res["status"] == "cloned"
+    assert out("config", "remote.origin.partialclonefilter", cwd=res["path"]) == "blob:none"
+    # history is there, blobs of older commits are not
+    missing = out("rev-list", "--objects", "--all", "--missing=print", cwd=res["path"])
+    assert any(line.startswith("?") for line in missing.splitlines())
+
+def test_sparse_clone(upstream, tmp_path):
+    dest = tmp_path / "sparse"
+    assert clone_repo(upstream[1], dest, depth=1, partial=True, sparse=[".py"])["status"] == "cloned"
+    files = {p.suffix for p in dest.rglob("*") if p.is_file() and ".git" not in p.parts}
+    assert files == {".py"}
+
+def test_clone_existing_and_errors(upstream, tmp_path):
+    dest = tmp_path / "again"
+    clone_repo(upstream[1], dest)
+    assert clone_repo(upstream[1], dest)["status"] == "exists"
+    assert clone_repo((tmp_path / "nope.git").as_uri(), tmp_path / "nope")["status"] == "error"
+    assert update_repo(tmp_path)["status"] == "error"
+
+@pytest.mark.parametrize("depth", [None, 1])
+def test_update_fast_forwards(upstream, tmp_path, depth):
+    work, url = upstream
+    dest = tmp_path / "clone"
+    clone_repo(url, dest, depth=depth)
+    assert update_repo(dest)["status"] == "up-to-date"
+    push(work, "new.py", "def added():\n    return 1\n")
+    res = update_repo(dest)
+    assert res["status"] == "updated"
+    assert res["new"] == out("rev-parse", "HEAD", cwd=work) != res["old"]
+    assert (dest / "new.py").exists()
+
+def test_update_keeps_local_edits(upstream, tmp_path):
+    work, url = upstream
+    dest = tmp_path / "clone"
+    clone_repo(url, dest)
+    (dest / "local.txt").write_text("not committed\n")
+    push(work, "new.py", "x = 1\n")
+    assert update_repo(dest)["status"] == "updated"
+    assert (dest / "local.txt").read_text() == "not committed\n"
+
+def test_clone_many(upstream, tmp_path):
+    url = upstream[1]
+    jobs = [(url, tmp_path / f"c{i}") for i in range(4)]
+    assert [r["status"] for r in clone_many(jobs, workers=2, depth=1)] == ["cloned"] * 4
+    # existing clones are updated instead
+    assert [r["status"] for r in clone_many(jobs, workers=2)] == ["up-to-date"] * 4
+
+def test_repo_name_from_url():
+    assert repo_name_from_url("https://github.com/psf/requests.git") == "requests"
+    assert repo_name_from_url("https://github.com/psf/requests/") == "requests"
+    assert repo_name_from_url("") == ""
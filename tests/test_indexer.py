@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+import pytest
+
+from RAG.indexer import build_index
+from RAG.store import index_paths, MetaStore
+
+def build(repo, index_dir, provider, **kwargs):
+    return build_index(repo, "demo", index_dir, provider, **kwargs)
+
+def stored(index_dir):
+    """(ids, sorted (file, start_line) of every stored chunk) of the demo index."""
+    paths = index_paths(index_dir, "demo")
+    ids = np.load(str(paths["ids"]))
+    metas = MetaStore(paths["meta"])
+    spans = sorted((m["file"], m["start_line"]) for m in metas.iter_metas())
+    metas.close()
+    assert len(np.load(str(paths["embs"]), mmap_mode="r")) == len(ids) == len(spans)
+    return ids, spans
+
+def fresh(repo, tmp_path, provider):
+    """What a first build of the repo as it is now stores."""
+    index_dir = tmp_path / "fresh"
+    index_dir.mkdir(exist_ok=True)
+    build(repo, index_dir, provider, full_rebuild=True)
+    return stored(index_dir)[1]
+
+@pytest.fixture
+def index_dir(tmp_path):
+    d = tmp_path / "indexes"
+    d.mkdir()
+    return d
+
+def test_incremental_embeds_only_changes(small_repo, index_dir, tmp_path, provider):
+    first = build(small_repo, index_dir, provider)
+    assert first["added"] == 4 and first["embedded"] == first["chunks"] > 0
+    assert build(small_repo, index_dir, provider)["status"] == "up-to-date"
+
+    (small_repo / "mod1.py").write_text("def changed():\n    return 1\n")
+    (small_repo / "mod3.py").unlink()
+    (small_repo / "new.py").write_text("def new():\n    return 2\n")
+    before = provider.embedded
+    res = build(small_repo, index_dir, provider)
+    assert (res["added"], res["changed"], res["removed"], res["unchanged"]) == (1, 1, 1, 2)
+    assert res["embedded"] == provider.embedded - before == 2
+    ids, spans = stored(index_dir)
+    assert len(set(ids.tolist())) == len(ids)
+    assert spans == fresh(small_repo, tmp_path, provider)
+
+@pytest.mark.parametrize("damage", ["missing", "corrupt", "other"])
+def test_unusable_manifest_drops_stored_vectors(small_repo, index_dir, tmp_path, provider, damage):
+    first = build(small_repo, index_dir, provider)
+    manifest = index_paths(index_dir, "demo")["manifest"]
+    if damage == "missing":
+        manifest.unlink()
+    elif damage == "corrupt":
+        manifest.write_text("{not json")
+    else:   # a valid manifest that does not describe the stored vectors
+        m = json.loads(manifest.read_text())
+        m["files"].popitem()
+        manifest.write_text(json.dumps(m))
+    res = build(small_repo, index_dir, provider)
+    assert res["chunks"] == first["chunks"]
+    ids, spans = stored(index_dir)
+    assert len(set(ids.tolist())) == len(ids)
+    assert spans == fresh(small_repo, tmp_path, provider)
+
+def test_full_rebuild_starts_over(small_repo, index_dir, provider):
+    first = build(small_repo, index_dir, provider)
+    res = build(small_repo, index_dir, provider, full_rebuild=True)
+    assert res["embedded"] == res["chunks"] == first["chunks"]
+    assert len(stored(index_dir)[1]) == first["chunks"]
+
+class Cancelled(Exception):
+    pass
+
+@pytest.mark.parametrize("stage", ["embed", "index", "store"])
+def test_failed_build_leaves_no_scratch_files(small_repo, index_dir, provider, stage):
+    build(small_repo, index_dir, provider)
+    before = sorted(p.name for p in index_dir.iterdir())
+    (small_repo / "mod0.py").write_text("def changed():\n    return 1\n")
+    def progress(s, done, total):
+        if s == stage:
+            raise Cancelled()
+    with pytest.raises(Cancelled):
+        build(small_repo, index_dir, provider, progress=progress)
+    assert sorted(p.name for p in index_dir.iterdir()) == before
+    # the previous index is untouched and the next build still works
+    assert build(small_repo, index_dir, provider)["changed"] == 1
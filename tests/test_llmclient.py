@@ -0,0 +1,123 @@
+import socket, threading, time
+
+import pytest
+import requests
+
+from benchmarks.stub_llm import start_stub
+from RAG.llmclient import LLMClient, throttle
+
+@pytest.fixture
+def stub():
+    server = start_stub(ttft=0.2, token_delay=0.005, tokens=10)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def chat(client, text, model="stub", stats=None):
+    return "".join(client.chat([{"role": "user", "content": text}], model, stats))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_identical_prompts_are_coalesced(stub):
+    client = LLMClient(stub.url)
+    stats = [{} for _ in range(4)]
+    replies = [None] * 4
+    def ask(i):
+        replies[i] = chat(client, "how are sessions pooled", stats=stats[i])
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(replies)) == 1 and "pooled" in replies[0]
+    assert stub.counts["/api/chat"] == 1
+    assert client.counts["requests"] == 1 and client.counts["coalesced"] == 3
+    assert sorted(s["coalesced"] for s in stats) == [False, True, True, True]
+    assert all(s["pieces"] == 10 for s in stats)
+
+def test_different_prompts_are_not_coalesced(stub):
+    client = LLMClient(stub.url)
+    threads = [threading.Thread(target=chat, args=(client, f"question {i}")) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stub.counts["/api/chat"] == 3 and client.counts["coalesced"] == 0
+
+def test_coalescing_off(stub):
+    client = LLMClient(stub.url, coalesce=False)
+    threads = [threading.Thread(target=chat, args=(client, "same")) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stub.counts["/api/chat"] == 3
+
+def test_connections_are_reused(stub):
+    client = LLMClient(stub.url)
+    for i in range(3):
+        chat(client, f"question {i}")
+    client.models()
+    assert stub.counts["connections"] == 1
+
+def test_reader_stopping_early_cancels(stub):
+    client = LLMClient(stub.url)
+    pieces = client.chat([{"role": "user", "content": "stop early"}], "stub")
+    next(pieces)
+    pieces.close()
+    time.sleep(0.3)
+    assert not client._flights
+
+def test_models_cached_for_ttl(stub):
+    client = LLMClient(stub.url, models_ttl=60)
+    assert client.models() == ["llama3", "stub"]
+    client.models()
+    assert stub.counts["/api/tags"] == 1 and client.counts["model_list_hits"] == 1
+    client.models(refresh=True)
+    assert stub.counts["/api/tags"] == 2
+
+def test_models_failure_cached():
+    client = LLMClient(f"http://127.0.0.1:{free_port()}", models_ttl=60)
+    assert client.models() == [] and client.models() == []
+    assert client.counts["model_list_fetches"] == 1
+
+def test_retry_until_server_is_up():
+    port = free_port()
+    client = LLMClient(f"http://127.0.0.1:{port}", retries=4)
+    servers = []
+    threading.Timer(0.1, lambda: servers.append(start_stub(port=port, ttft=0, token_delay=0, tokens=3))).start()
+    try:
+        assert "late" in chat(client, "late server")
+        assert client.counts["retries"] >= 1
+    finally:
+        time.sleep(0.2)
+        for s in servers:
+            s.shutdown()
+            s.server_close()
+
+def test_retry_gives_up():
+    client = LLMClient(f"http://127.0.0.1:{free_port()}", retries=2)
+    with pytest.raises(requests.ConnectionError):
+        chat(client, "nobody home")
+    assert client.counts["retries"] == 2
+
+def test_http_errors_are_not_retried(stub):
+    client = LLMClient(stub.url, retries=2)
+    with pytest.raises(requests.HTTPError):
+        chat(client, "q", model="missing")
+    assert client.counts["retries"] == 0 and stub.counts["/api/chat"] == 1
+
+def test_throttle():
+    def slow(pieces, delay):
+        for p in pieces:
+            time.sleep(delay)
+            yield p
+    pieces = [f"w{i} " for i in range(20)]
+    assert list(throttle(iter(pieces), interval=0)) == pieces
+    chunks = list(throttle(slow(pieces, 0.005), interval=0.03))
+    assert "".join(chunks) == "".join(pieces)
+    assert 2 <= len(chunks) < len(pieces)
+    assert list(throttle(iter(pieces), interval=3600)) == [pieces[0], "".join(pieces[1:])]
@@ -0,0 +1,31 @@
+import json, threading, urllib.error, urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from RAG.service import Handler
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+def _call(url, data=None):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+@pytest.mark.parametrize("n", ["abc", "-1", "2.5"])
+def test_traces_rejects_bad_n(server, n):
+    status, body = _call(f"{server}/traces?n={n}")
+    assert status == 400 and "n must be" in body["error"]
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b'"question"', b"3", b"{bad json"])
+def test_post_rejects_non_object_body(server, body):
+    status, reply = _call(f"{server}/query", body)
+    assert status == 400 and reply["error"]
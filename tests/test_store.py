@@ -0,0 +1,26 @@
+from RAG.indexer import build_index
+from RAG.store import open_index, index_cache
+
+def test_rebuild_keeps_open_index_usable(small_repo, tmp_path, provider):
+    index_dir = tmp_path / "indexes"
+    index_dir.mkdir()
+    build_index(small_repo, "demo", index_dir, provider)
+    old = open_index(index_dir, "demo")
+    qvec = provider.embed(["def f1_3(x)"])[0]
+    assert old.search(qvec, 3, query="f1_3")
+
+    (small_repo / "mod1.py").write_text("def changed():\n    return 1\n")
+    build_index(small_repo, "demo", index_dir, provider)   # drops the cached entry
+    # a query that still holds the previous index (another session) keeps working
+    assert old.search(qvec, 3, query="f1_3")
+    new = open_index(index_dir, "demo")
+    assert new is not old and new.version != old.version
+    assert any(r["meta"]["file"] == "mod1.py" for r in new.search(provider.embed(["changed"])[0], 5, query="changed"))
+
+def test_cache_reuses_entry(small_repo, tmp_path, provider):
+    index_dir = tmp_path / "indexes"
+    index_dir.mkdir()
+    assert open_index(index_dir, "demo") is None
+    build_index(small_repo, "demo", index_dir, provider)
+    assert open_index(index_dir, "demo") is open_index(index_dir, "demo")
+    index_cache.forget(index_dir, "demo")
@@ -0,0 +1,14 @@
+import pytest
+
+from RAG.vectorindex import resolve_config
+
+@pytest.mark.parametrize("n, kind", [(0, "flat"), (5000, "sq"), (39 * 256 - 1, "sq"), (39 * 256, "ivf-pq")])
+def test_ivf_pq_needs_enough_training_points(n, kind):
+    cfg = resolve_config("ivf-pq", n, 384)
+    assert cfg["kind"] == kind
+    if kind == "ivf-pq":
+        assert n >= 39 * cfg["nlist"] and 384 % cfg["m"] == 0
+
+def test_ivf_nlist_capped_by_corpus():
+    cfg = resolve_config("ivf-flat", 2000, 64)
+    assert cfg["nlist"] == 2000 // 39 and cfg["nprobe"] <= cfg["nlist"]